@@ -0,0 +1,120 @@
+"""Admin API endpoints"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+from backend.database.database import get_db, User, AuditLog, RoleDepartmentAccess
+from backend.database.schemas import DepartmentAccessUpdate, DepartmentAccessResponse
+from backend.auth.dependencies import require_admin
+from rbac.access_mask import ROLE_BITS
+from rbac.department_access import DEPARTMENTS
+from llm.usage import usage_aggregator
+
+router = APIRouter()
+
+
+def _to_response(row: RoleDepartmentAccess) -> DepartmentAccessResponse:
+    return DepartmentAccessResponse(
+        role=row.role,
+        departments=row.department_list,
+        updated_by=row.updated_by,
+        updated_at=row.updated_at
+    )
+
+
+@router.get("/department-access", response_model=List[DepartmentAccessResponse])
+async def list_department_access(
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    List the departments each role may read
+    
+    Args:
+        current_user: Current admin user
+        db: Database session
+        
+    Returns:
+        One entry per role
+    """
+    rows = db.query(RoleDepartmentAccess).order_by(RoleDepartmentAccess.role).all()
+    return [_to_response(row) for row in rows]
+
+
+@router.put("/department-access/{role}", response_model=DepartmentAccessResponse)
+async def update_department_access(
+    role: str,
+    update: DepartmentAccessUpdate,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Replace the departments a role may read
+    
+    Takes effect on the next query; chunks are not reindexed. Roles inherited
+    through the hierarchy (e.g. employee for finance) keep contributing their
+    own departments.
+    
+    Args:
+        role: Role to update
+        update: New department list (empty revokes all direct access)
+        current_user: Current admin user
+        db: Database session
+        
+    Returns:
+        Updated access entry
+        
+    Raises:
+        HTTPException: If the role or a department is unknown
+    """
+    if role not in ROLE_BITS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown role '{role}'"
+        )
+    
+    unknown = sorted(set(update.departments) - set(DEPARTMENTS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown departments: {', '.join(unknown)}"
+        )
+    
+    row = db.query(RoleDepartmentAccess).filter(RoleDepartmentAccess.role == role).first()
+    if row is None:
+        row = RoleDepartmentAccess(role=role)
+        db.add(row)
+    previous = row.departments or ""
+    row.departments = ",".join(sorted(set(update.departments)))
+    row.updated_by = current_user.username
+    
+    # Log the permission change
+    audit_log = AuditLog(
+        user_id=current_user.id,
+        username=current_user.username,
+        action="department_access_update",
+        endpoint=f"/api/admin/department-access/{role}",
+        method="PUT",
+        status_code=200,
+        details=f"Role: {role} | Departments: {previous or '-'} -> {row.departments or '-'}"
+    )
+    db.add(audit_log)
+    db.commit()
+    db.refresh(row)
+    
+    return _to_response(row)
+
+
+@router.get("/llm-usage")
+async def llm_usage(current_user: User = Depends(require_admin)) -> Dict[str, Any]:
+    """
+    LLM tokens, latency and cost since the server started
+    
+    Args:
+        current_user: Current admin user
+        
+    Returns:
+        Recent latency/TTFB percentiles and totals by model, caller
+        (answer, rerank, score), user and role
+    """
+    return usage_aggregator.snapshot()
@@ -1,12 +1,15 @@
 """Chat API endpoints with RAG integration"""
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from backend.database.database import get_db, User, AuditLog
+from backend.database.database import get_db, load_department_access, SessionLocal, User, AuditLog
 from backend.database.schemas import ChatRequest, ChatResponse
 from backend.auth.dependencies import get_current_active_user
 from rag.rag_pipeline import RAGPipeline
+from llm.usage import summarize, usage_context
 from dotenv import load_dotenv
+import json
 import os
 
 # Load environment variables
@@ -25,6 +28,13 @@ def get_rag_pipeline() -> RAGPipeline:
     return _rag_pipeline
 
 
+def format_usage(records: list) -> str:
+    """Audit log summary of the LLM calls made for one request"""
+    totals = summarize(records)
+    return (f"LLM: {totals['calls']} calls, {totals['prompt_tokens']}+{totals['completion_tokens']} tokens, "
+            f"{totals['latency']:.2f}s, ${totals['cost']:.6f}")
+
+
 @router.post("/query", response_model=ChatResponse)
 async def chat_query(
     request: ChatRequest,
@@ -46,13 +56,16 @@ async def chat_query(
         # Get RAG pipeline
         pipeline = get_rag_pipeline()
         
-        # Query with user's role
-        result = pipeline.query(
-            user_query=request.query,
-            user_role=current_user.role,
-            n_results=request.n_results,
-            include_citations=request.include_citations
-        )
+        # Query with user's role; departments come from the live access table
+        with usage_context(user=current_user.username, role=current_user.role, collect=True) as usage:
+            result = await pipeline.aquery(
+                user_query=request.query,
+                user_role=current_user.role,
+                n_results=request.n_results,
+                include_citations=request.include_citations,
+                access=load_department_access(db),
+                extractive=request.extractive
+            )
         
         # Log successful query
         audit_log = AuditLog(
@@ -62,7 +75,8 @@ async def chat_query(
             endpoint="/api/chat/query",
             method="POST",
             status_code=200,
-            details=f"Query: {request.query[:100]}... | Confidence: {result['confidence']['level']}"
+            details=(f"Query: {request.query[:100]}... | Confidence: {result['confidence']['level']}"
+                     f" | {format_usage(usage)}{format_degraded(result)}")
         )
         db.add(audit_log)
         db.commit()
@@ -89,6 +103,92 @@ async def chat_query(
         )
 
 
+def format_degraded(result: dict) -> str:
+    """Audit log note for a retrieval-only answer (LLM failed or circuit open)"""
+    if result["metadata"].get("answer_mode") != "degraded":
+        return ""
+    return f" | Degraded: {result['metadata'].get('degraded_reason', '')[:100]}"
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Process chat query with RAG pipeline, streaming the answer (SSE)
+    
+    Events, in order:
+        - sources: sources, confidence and metadata, once retrieval finishes
+        - token: {"text": ...} per answer fragment
+        - done: the full response, as returned by /query
+    An "error" event replaces "done" if the query fails midway.
+    
+    Args:
+        request: Chat query request
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        text/event-stream response
+    """
+    pipeline = get_rag_pipeline()
+    access = load_department_access(db)
+    user_id, username, role = current_user.id, current_user.username, current_user.role
+    
+    async def events():
+        action, status_code, details = "chat_query", 200, ""
+        usage = []
+        try:
+            with usage_context(user=username, role=role, collect=True) as usage:
+                async for event, data in pipeline.astream(
+                    user_query=request.query,
+                    user_role=role,
+                    n_results=request.n_results,
+                    include_citations=request.include_citations,
+                    access=access,
+                    extractive=request.extractive
+                ):
+                    if event == "done":
+                        details = (f"Query: {request.query[:100]}... | Confidence: {data['confidence']['level']}"
+                                   f" | {format_usage(usage)}{format_degraded(data)}")
+                    elif event == "error":
+                        action, status_code = "chat_query_error", 500
+                        details = f"Error: {data['metadata'].get('error', '')}"
+                    yield format_sse(event, data)
+        except Exception as e:
+            action, status_code, details = "chat_query_error", 500, f"Error: {str(e)}"
+            yield format_sse("error", {"detail": f"Error processing query: {str(e)}"})
+        finally:
+            # Log once the stream completes (the request's session may be closed by now)
+            audit_db = SessionLocal()
+            try:
+                audit_db.add(AuditLog(
+                    user_id=user_id,
+                    username=username,
+                    action=action,
+                    endpoint="/api/chat/stream",
+                    method="POST",
+                    status_code=status_code,
+                    details=details or "Stream closed before completion"
+                ))
+                audit_db.commit()
+            finally:
+                audit_db.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/history")
 async def get_chat_history(
     current_user: User = Depends(get_current_active_user),
@@ -103,6 +103,8 @@ def require_role(*allowed_roles: str):
             )
         return current_user
     
+    # Read by RoutePermissionTable to compile the middleware's route table
+    role_checker.allowed_roles = allowed_roles
     return role_checker
 
 
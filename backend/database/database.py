@@ -4,8 +4,11 @@ from sqlalchemy import Boolean, Column, Integer, String, DateTime, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+from typing import List
 import os
 
+from rbac.department_access import DepartmentAccess, default_role_departments
+
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./backend/chatbot.db")
 
@@ -58,6 +61,25 @@ class AuditLog(Base):
         return f"<AuditLog(user='{self.username}', action='{self.action}', timestamp='{self.timestamp}')>"
 
 
+# Role -> department access model
+class RoleDepartmentAccess(Base):
+    """Departments a role may read; resolved into the search filter on every query"""
+    __tablename__ = "role_department_access"
+
+    id = Column(Integer, primary_key=True, index=True)
+    role = Column(String, unique=True, index=True, nullable=False)
+    departments = Column(String, nullable=False, default="")  # comma-separated; empty = no access
+    updated_by = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def department_list(self) -> List[str]:
+        return [d for d in self.departments.split(",") if d]
+
+    def __repr__(self):
+        return f"<RoleDepartmentAccess(role='{self.role}', departments='{self.departments}')>"
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -67,6 +89,26 @@ def get_db():
         db.close()
 
 
+def seed_department_access(db):
+    """Add default access rows (from DEPARTMENT_ROLE_MAP) for roles that have none"""
+    existing = {row.role for row in db.query(RoleDepartmentAccess.role)}
+    for role, departments in default_role_departments().items():
+        if role not in existing:
+            db.add(RoleDepartmentAccess(role=role, departments=",".join(sorted(departments))))
+    db.commit()
+
+
+def load_department_access(db) -> DepartmentAccess:
+    """Read the live role -> department table"""
+    return DepartmentAccess({row.role: row.department_list for row in db.query(RoleDepartmentAccess)})
+
+
 def init_db():
     """Initialize database and create tables"""
     Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        seed_department_access(db)
+    finally:
+        db.close()
@@ -1,7 +1,7 @@
 """Pydantic schemas for request/response validation"""
 
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -64,6 +64,9 @@ class ChatRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=1000)
     n_results: int = Field(default=5, ge=1, le=10)
     include_citations: bool = Field(default=True)
+    # Answer factual queries from retrieved lines without the LLM when confident
+    # (only where the deployment enables extractive answers)
+    extractive: bool = Field(default=False)
 
 
 class ChatResponse(BaseModel):
@@ -74,6 +77,20 @@ class ChatResponse(BaseModel):
     metadata: dict
 
 
+# Department access schemas
+class DepartmentAccessUpdate(BaseModel):
+    """Replace the departments a role may read"""
+    departments: List[str]
+
+
+class DepartmentAccessResponse(BaseModel):
+    """Departments a role may read"""
+    role: str
+    departments: List[str]
+    updated_by: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
 # Audit log schema
 class AuditLogResponse(BaseModel):
     """Audit log response"""
@@ -2,7 +2,7 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.api import auth, chat
+from backend.api import admin, auth, chat
 from backend.middleware.rbac_middleware import RBACMiddleware
 from backend.middleware.audit_middleware import AuditMiddleware
 from backend.database.database import init_db
@@ -37,6 +37,7 @@ async def startup_event():
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 # Root endpoint
 @app.get("/")
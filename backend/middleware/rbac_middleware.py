@@ -1,98 +1,94 @@
 """RBAC Middleware for role-based access control"""
 
-from fastapi import Request, HTTPException, status
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from backend.auth.security import verify_token
+from backend.middleware.route_permissions import RoutePermissionTable
 from typing import Optional
 
 
 class RBACMiddleware(BaseHTTPMiddleware):
     """
     Middleware to enforce role-based access control
-    
-    Checks if user has appropriate role for protected endpoints
+
+    Checks if user has appropriate role for protected endpoints. Route
+    permissions are compiled from the application's routes on the first
+    request (after all routers are included) into a RoutePermissionTable,
+    so each check is a trie lookup plus a role bit test.
     """
-    
-    # Publicly accessible endpoints (no authentication required)
-    PUBLIC_ENDPOINTS = [
-        "/",
-        "/health",
-        "/docs",
-        "/redoc",
-        "/openapi.json",
-        "/api/auth/login"
-    ]
-    
-    # Role-based endpoint permissions
-    ROLE_PERMISSIONS = {
-        "/api/chat/query": ["admin", "finance", "engineering", "marketing", "hr", "employee"],
-        "/api/chat/history": ["admin", "finance", "engineering", "marketing", "hr", "employee"],
-        "/api/admin/users": ["admin"],
-        "/api/admin/audit-logs": ["admin"],
-    }
-    
+
+    def __init__(self, app, route_table: Optional[RoutePermissionTable] = None):
+        """
+        Initialize middleware
+
+        Args:
+            app: Next ASGI application
+            route_table: Precompiled permissions (default: compiled from request.app.routes)
+        """
+        super().__init__(app)
+        self.route_table = route_table
+
+    def get_route_table(self, request: Request) -> RoutePermissionTable:
+        """Compile the permission table once from the FastAPI routes"""
+        if self.route_table is None:
+            self.route_table = RoutePermissionTable.from_routes(request.app.routes)
+        return self.route_table
+
     async def dispatch(self, request: Request, call_next):
         """
         Process request and enforce RBAC
-        
+
         Args:
             request: HTTP request
             call_next: Next middleware/endpoint
-            
+
         Returns:
             Response from next middleware/endpoint
         """
-        path = request.url.path
-        
-        # Skip RBAC for public endpoints
-        if any(path.startswith(endpoint) for endpoint in self.PUBLIC_ENDPOINTS):
+        permission = self.get_route_table(request).match(request.url.path, request.method)
+
+        # Public endpoints and unknown paths (the router answers 404/405)
+        if permission is None or permission.public:
             return await call_next(request)
-        
+
         # Get authorization header
         auth_header = request.headers.get("Authorization")
-        
-        # Check if authentication is required
         if not auth_header:
-            # Only enforce on protected endpoints
-            if not any(path.startswith(endpoint) for endpoint in self.PUBLIC_ENDPOINTS):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Authentication required"
-                )
-        else:
-            # Extract and verify token
-            try:
-                scheme, token = auth_header.split()
-                if scheme.lower() != "bearer":
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid authentication scheme"
-                    )
-                
-                payload = verify_token(token)
-                if not payload:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid or expired token"
-                    )
-                
-                user_role = payload.get("role")
-                
-                # Check role permissions for specific endpoints
-                for endpoint, allowed_roles in self.ROLE_PERMISSIONS.items():
-                    if path.startswith(endpoint):
-                        if user_role not in allowed_roles:
-                            raise HTTPException(
-                                status_code=status.HTTP_403_FORBIDDEN,
-                                detail=f"Access denied. Required roles: {', '.join(allowed_roles)}"
-                            )
-                        break
-                
-            except ValueError:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid authorization header format"
-                )
-        
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"detail": "Not authenticated"}
+            )
+
+        # Extract and verify token
+        try:
+            scheme, token = auth_header.split()
+        except ValueError:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Invalid authorization header format"}
+            )
+
+        if scheme.lower() != "bearer":
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Invalid authentication scheme"}
+            )
+
+        payload = verify_token(token)
+        if not payload:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Invalid or expired token"},
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+
+        # Check role permissions for the matched route
+        if not permission.allows(payload.get("role")):
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"detail": f"Access denied. Required roles: {', '.join(permission.roles)}"}
+            )
+
         response = await call_next(request)
         return response
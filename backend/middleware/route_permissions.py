@@ -0,0 +1,151 @@
+"""Route permission table compiled from the FastAPI routes
+
+Each route is classified once from its dependency tree:
+
+- no authentication dependency      -> public
+- depends on get_current_user       -> any authenticated role
+- depends on a require_role checker -> only those roles (a role bitset)
+
+Lookups walk a trie of path segments (``{param}`` segments match any value),
+so the cost per request depends on path depth, not on the number of routes.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.routing import APIRoute
+
+from backend.auth.dependencies import get_current_user
+from rbac.access_mask import ALL_ROLES_MASK, mask_for_roles, roles_for_mask
+
+
+class RoutePermission:
+    """Access rule for one route and method"""
+
+    __slots__ = ("path", "public", "roles_mask")
+
+    def __init__(self, path: str, public: bool, roles_mask: int = ALL_ROLES_MASK):
+        self.path = path
+        self.public = public
+        self.roles_mask = roles_mask
+
+    def allows(self, role: Optional[str]) -> bool:
+        """Check a token role against the route's role bitset"""
+        if self.public:
+            return True
+        try:
+            return bool(self.roles_mask & mask_for_roles([role]))
+        except ValueError:
+            return False
+
+    @property
+    def roles(self) -> List[str]:
+        return roles_for_mask(self.roles_mask)
+
+    def __repr__(self):
+        access = "public" if self.public else ",".join(self.roles)
+        return f"<RoutePermission(path='{self.path}', access='{access}')>"
+
+
+class _Node:
+    __slots__ = ("children", "param", "methods")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        self.methods: Dict[str, RoutePermission] = {}
+
+
+def _split(path: str) -> List[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+def _dependency_calls(dependant) -> Iterable:
+    """Every callable in a route's dependency tree"""
+    for dependency in dependant.dependencies:
+        yield dependency.call
+        yield from _dependency_calls(dependency)
+
+
+def classify_route(route: APIRoute) -> RoutePermission:
+    """Derive the access rule of a route from its dependencies"""
+    authenticated = False
+    roles_mask = ALL_ROLES_MASK
+    for call in _dependency_calls(route.dependant):
+        if call is get_current_user:
+            authenticated = True
+        allowed_roles = getattr(call, "allowed_roles", None)
+        if allowed_roles is not None:
+            authenticated = True
+            roles_mask &= mask_for_roles(allowed_roles)
+    return RoutePermission(route.path, public=not authenticated, roles_mask=roles_mask)
+
+
+class RoutePermissionTable:
+    """Trie of route permissions keyed by path segments and method"""
+
+    def __init__(self):
+        self._root = _Node()
+
+    @classmethod
+    def from_routes(cls, routes) -> "RoutePermissionTable":
+        """
+        Compile permissions for an application's routes
+
+        Non-API routes (docs, openapi.json, static mounts) are public.
+        """
+        table = cls()
+        for route in routes:
+            path = getattr(route, "path", None)
+            if path is None:
+                continue
+            if isinstance(route, APIRoute):
+                permission = classify_route(route)
+                methods = route.methods or {"GET"}
+            else:
+                permission = RoutePermission(path, public=True)
+                methods = getattr(route, "methods", None) or {"*"}
+            table.add(path, methods, permission)
+        return table
+
+    def add(self, path: str, methods: Iterable[str], permission: RoutePermission):
+        """Register a permission for a path template"""
+        node = self._root
+        for segment in _split(path):
+            if segment.startswith("{") and segment.endswith("}"):
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        for method in methods:
+            node.methods[method.upper()] = permission
+
+    def match(self, path: str, method: str) -> Optional[RoutePermission]:
+        """
+        Find the permission for a request
+
+        Returns:
+            The matching rule, or None if no route matches (the router
+            then answers 404/405 itself)
+        """
+        node = self._find(self._root, _split(path), 0)
+        if node is None:
+            return None
+
+        method = method.upper()
+        if method == "HEAD":
+            method = "GET" if "GET" in node.methods else method
+        return node.methods.get(method) or node.methods.get("*")
+
+    def _find(self, node: _Node, segments: List[str], index: int) -> Optional[_Node]:
+        """Literal segments first, then the parameter branch"""
+        if index == len(segments):
+            return node if node.methods else None
+        child = node.children.get(segments[index])
+        if child is not None:
+            found = self._find(child, segments, index + 1)
+            if found is not None:
+                return found
+        if node.param is not None:
+            return self._find(node.param, segments, index + 1)
+        return None
@@ -9,8 +9,9 @@ from backend.auth.security import get_password_hash
 
 @pytest.fixture
 def client():
-    """Create test client"""
-    return FastAPITestClient(app)
+    """Create test client (entering it runs the startup hooks, e.g. init_db)"""
+    with FastAPITestClient(app) as test_client:
+        yield test_client
 
 
 class TestAuthentication:
@@ -156,6 +157,33 @@ class TestRBAC:
         )
         assert response.status_code == 200
     
+    def test_chat_stream_events(self, client):
+        """Test streamed chat sends sources first and ends with done/error"""
+        token = self.get_token(client, "employee", "employee123")
+        
+        response = client.post(
+            "/api/chat/stream",
+            headers={"Authorization": f"Bearer {token}"},
+            json={"query": "What is the remote work policy?"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line.split(":", 1)[1].strip() for line in response.text.splitlines()
+                  if line.startswith("event:")]
+        assert events[0] == "sources"
+        assert events[-1] in ("done", "error")
+    
+    def test_llm_usage_admin_only(self, client):
+        """Test LLM usage metrics are served to admins only"""
+        token = self.get_token(client, "employee", "employee123")
+        response = client.get("/api/admin/llm-usage", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 403
+        
+        token = self.get_token(client, "admin", "admin123")
+        response = client.get("/api/admin/llm-usage", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert {"recent", "by_model", "by_caller", "by_user", "by_role"} <= set(response.json())
+    
     def test_unauthenticated_access_denied(self, client):
         """Test unauthenticated access is denied"""
         response = client.post(
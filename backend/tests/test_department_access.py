@@ -0,0 +1,82 @@
+"""Tests for the live role -> department access table"""
+
+import pytest
+from fastapi.testclient import TestClient as FastAPITestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.main import app
+from backend.database.database import (
+    Base, RoleDepartmentAccess, SessionLocal, init_db, load_department_access, seed_department_access
+)
+
+
+@pytest.fixture
+def client():
+    """Create test client with the access table seeded"""
+    init_db()
+    return FastAPITestClient(app)
+
+
+def login(client, username, password):
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_grant_applies_without_reindexing(client):
+    """A PUT changes the departments resolved for the next query"""
+    headers = login(client, "admin", "admin123")
+    listed = {entry["role"]: entry["departments"] for entry in client.get(
+        "/api/admin/department-access", headers=headers
+    ).json()}
+    assert listed["marketing"] == ["marketing"]
+
+    try:
+        response = client.put(
+            "/api/admin/department-access/marketing",
+            json={"departments": ["marketing", "finance"]},
+            headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["departments"] == ["finance", "marketing"]
+
+        db = SessionLocal()
+        try:
+            access = load_department_access(db)
+        finally:
+            db.close()
+        assert access.departments_for(["marketing", "employee"]) == ["finance", "general", "marketing"]
+    finally:
+        client.put("/api/admin/department-access/marketing",
+                   json={"departments": listed["marketing"]}, headers=headers)
+
+
+def test_department_access_is_admin_only(client):
+    """Other roles cannot read or change grants; unknown names are rejected"""
+    finance = login(client, "john_finance", "finance123")
+    assert client.get("/api/admin/department-access", headers=finance).status_code == 403
+
+    admin = login(client, "admin", "admin123")
+    response = client.put("/api/admin/department-access/finance",
+                          json={"departments": ["legal"]}, headers=admin)
+    assert response.status_code == 400
+    assert client.put("/api/admin/department-access/intern",
+                      json={"departments": []}, headers=admin).status_code == 404
+
+
+def test_seed_adds_missing_roles_only(tmp_path):
+    """Startup seeding fills in default rows without overwriting live grants"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'access.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        db.add(RoleDepartmentAccess(role="finance", departments="finance,marketing"))
+        db.commit()
+        seed_department_access(db)
+        seed_department_access(db)
+
+        access = load_department_access(db)
+        assert access.departments_for(["finance"]) == ["finance", "marketing"]
+        assert access.departments_for(["employee"]) == ["general"]
+        assert db.query(RoleDepartmentAccess).count() == len(access.role_departments)
+    finally:
+        db.close()
@@ -0,0 +1,52 @@
+"""Tests for the compiled route permission table"""
+
+from fastapi import Depends, FastAPI
+
+from backend.auth.dependencies import get_current_active_user, require_admin
+from backend.middleware.route_permissions import RoutePermissionTable
+
+
+def build_table() -> RoutePermissionTable:
+    """Small app covering public, authenticated, role-gated and path-param routes"""
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {}
+
+    @app.get("/api/chat/history")
+    async def history(user=Depends(get_current_active_user)):
+        return []
+
+    @app.get("/api/admin/users/{user_id}")
+    async def admin_user(user_id: int, user=Depends(require_admin)):
+        return {}
+
+    return RoutePermissionTable.from_routes(app.routes)
+
+
+def test_root_is_not_a_prefix_for_everything():
+    """'/' is public without making every other path public"""
+    table = build_table()
+    assert table.match("/", "GET").public
+    assert not table.match("/api/chat/history", "GET").public
+    assert table.match("/api/unknown", "GET") is None
+
+
+def test_role_bitsets_from_dependencies():
+    """Authenticated routes allow every role; require_role narrows the bitset"""
+    table = build_table()
+    history = table.match("/api/chat/history", "GET")
+    assert history.allows("employee") and history.allows("admin")
+
+    admin_user = table.match("/api/admin/users/42", "GET")
+    assert admin_user.allows("admin")
+    assert not admin_user.allows("finance")
+    assert table.match("/api/admin/users/42", "DELETE") is None
+
+
+def test_docs_routes_are_public():
+    """Framework routes such as /openapi.json and /docs stay public"""
+    table = build_table()
+    assert table.match("/openapi.json", "GET").public
+    assert table.match("/docs", "GET").public
@@ -14,6 +14,7 @@ sys.path.insert(0, str(project_root))
 import chromadb
 from sentence_transformers import SentenceTransformer
 from chromadb.config import Settings
+from rbac.department_access import DepartmentAccess
 
 class SimpleRAGChatbot:
     """Simple RAG chatbot with RBAC"""
@@ -54,17 +55,11 @@ class SimpleRAGChatbot:
         # Use normalize_embeddings=True for better cosine similarity and faster search
         query_embedding = self.model.encode(normalized, normalize_embeddings=True).tolist()
         
-        # Map role to correct ChromaDB filter key
-        if user_role == "employee":
-            role_key = "role_general"  # Employee role uses role_general flag
-        else:
-            role_key = f"role_{user_role}"
-        
-        # Search with role filter
+        # Search with role filter (departments the role may read)
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=top_k,
-            where={role_key: True}  # Filter by role
+            where=DepartmentAccess.default().where([user_role])  # Filter by role
         )
         
         return results
@@ -9,6 +9,7 @@ Requirements:
 
 import streamlit as st
 import sys
+import json
 import requests
 from pathlib import Path
 from datetime import datetime
@@ -23,6 +24,7 @@ API_AUTH_LOGIN = f"{API_BASE_URL}/api/auth/login"
 API_AUTH_LOGOUT = f"{API_BASE_URL}/api/auth/logout"
 API_AUTH_ME = f"{API_BASE_URL}/api/auth/me"
 API_CHAT_QUERY = f"{API_BASE_URL}/api/chat/query"
+API_CHAT_STREAM = f"{API_BASE_URL}/api/chat/stream"
 
 # Page config
 st.set_page_config(
@@ -115,6 +117,42 @@ def query_chatbot(token: str, query: str, n_results: int = 5):
             "error": f"Connection error: {str(e)}"
         }
 
+def stream_chatbot(token: str, query: str, n_results: int = 5):
+    """
+    Query chatbot via the streaming backend API
+    
+    Yields:
+        (event, data) pairs parsed from the server-sent events:
+        sources, token..., then done (or error)
+    """
+    try:
+        headers = {"Authorization": f"Bearer {token}"}
+        with requests.post(
+            API_CHAT_STREAM,
+            headers=headers,
+            json={
+                "query": query,
+                "n_results": n_results,
+                "include_citations": True
+            },
+            stream=True,
+            timeout=(5, 60)
+        ) as response:
+            if response.status_code != 200:
+                yield "error", {"detail": response.json().get("detail", "Query failed")}
+                return
+            
+            response.encoding = "utf-8"
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:") and event:
+                    yield event, json.loads(line[len("data:"):])
+                    event = None
+    except Exception as e:
+        yield "error", {"detail": f"Connection error: {str(e)}"}
+
 # Initialize session state
 if 'messages' not in st.session_state:
     st.session_state.messages = []
@@ -298,71 +336,90 @@ else:
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Query backend
+        # Query backend (streamed: sources first, then the answer as it is generated)
         with st.chat_message("assistant"):
-            with st.spinner("🔍 Searching knowledge base..."):
-                result = query_chatbot(st.session_state.token, prompt)
+            status_placeholder = st.empty()
+            status_placeholder.caption("🔍 Searching knowledge base...")
+            answer_placeholder = st.empty()
+            answer = ""
+            data = None
+            error = None
+            
+            for event, payload in stream_chatbot(st.session_state.token, prompt):
+                if event == "sources":
+                    status_placeholder.caption(
+                        f"📚 Found {len(payload['sources'])} sources - generating answer..."
+                    )
+                elif event == "token":
+                    answer += payload["text"]
+                    answer_placeholder.markdown(answer + "▌")
+                elif event == "done":
+                    data = payload
+                elif event == "error":
+                    error = payload.get("detail") or payload.get("answer", "Query failed")
+            
+            status_placeholder.empty()
+            
+            if data is not None:
+                # Display answer
+                answer_placeholder.markdown(data["answer"])
                 
-                if result["success"]:
-                    data = result["data"]
-                    
-                    # Display answer
-                    st.markdown(data["answer"])
-                    
-                    # Display confidence badge
-                    confidence = data["confidence"]
-                    confidence_color = {
-                        "VERY_HIGH": "🟢",
-                        "HIGH": "🟡",
-                        "MEDIUM": "🟠",
-                        "LOW": "🔴"
-                    }.get(confidence["level"], "⚪")
-                    
-                    st.caption(f"{confidence_color} **Confidence:** {confidence['level']} ({confidence['score']:.1%})")
-                    st.caption(f"💡 {confidence['reasoning']}")
-                    
-                    # Save assistant response
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": data["answer"],
-                        "sources": data.get("sources", []),
-                        "metadata": data
-                    })
-                    
-                    # Display sources
-                    if data.get("sources"):
-                        with st.expander(f"📚 View {len(data['sources'])} Sources"):
-                            for source in data["sources"]:
-                                quality_emoji = {
-                                    "Highly Relevant": "🟢",
-                                    "Relevant": "🟡",
-                                    "Somewhat Relevant": "🟠",
-                                    "Marginally Relevant": "🔴"
-                                }.get(source["quality"], "⚪")
-                                
-                                st.markdown(f"""
-                                {quality_emoji} **Source {source['rank']}** - {source['quality']}
-                                - **Document:** `{source['source']}`
-                                - **Section:** {source['section']}
-                                - **Relevance:** {source['relevance_percent']} (Score: {source['relevance_score']:.3f})
-                                """)
-                                st.divider()
-                else:
-                    error_msg = f"❌ Error: {result['error']}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": error_msg
-                    })
-                    
-                    # Check if token expired
-                    if "token" in result["error"].lower() or "unauthorized" in result["error"].lower():
-                        st.warning("Your session may have expired. Please login again.")
-                        if st.button("Logout and Re-login"):
-                            st.session_state.token = None
-                            st.session_state.user = None
-                            st.session_state.messages = []
-                            st.rerun()
+                # Display confidence badge
+                confidence = data["confidence"]
+                confidence_color = {
+                    "VERY_HIGH": "🟢",
+                    "HIGH": "🟡",
+                    "MEDIUM": "🟠",
+                    "LOW": "🔴"
+                }.get(confidence["level"], "⚪")
+                
+                st.caption(f"{confidence_color} **Confidence:** {confidence['level']} ({confidence['score']:.1%})")
+                st.caption(f"💡 {confidence['reasoning']}")
+                
+                # Save assistant response
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": data["answer"],
+                    "sources": data.get("sources", []),
+                    "metadata": data
+                })
+                
+                # Display sources
+                if data.get("sources"):
+                    with st.expander(f"📚 View {len(data['sources'])} Sources"):
+                        for source in data["sources"]:
+                            quality_emoji = {
+                                "Highly Relevant": "🟢",
+                                "Relevant": "🟡",
+                                "Somewhat Relevant": "🟠",
+                                "Marginally Relevant": "🔴"
+                            }.get(source["quality"], "⚪")
+                            
+                            st.markdown(f"""
+                            {quality_emoji} **Source {source['rank']}** - {source['quality']}
+                            - **Document:** `{source['source']}`
+                            - **Section:** {source['section']}
+                            - **Relevance:** {source['relevance_percent']} (Score: {source['relevance_score']:.3f})
+                            """)
+                            st.divider()
+            else:
+                if answer:
+                    answer_placeholder.markdown(answer)
+                error_msg = f"❌ Error: {error or 'Stream ended unexpectedly'}"
+                st.error(error_msg)
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": error_msg
+                })
+                
+                # Check if token expired
+                if "token" in error_msg.lower() or "unauthorized" in error_msg.lower() or "credentials" in error_msg.lower():
+                    st.warning("Your session may have expired. Please login again.")
+                    if st.button("Logout and Re-login"):
+                        st.session_state.token = None
+                        st.session_state.user = None
+                        st.session_state.messages = []
+                        st.rerun()
 
 # Footer
 st.divider()
@@ -10,9 +10,10 @@ sys.path.insert(0, str(project_root))
 
 import chromadb
 from sentence_transformers import SentenceTransformer
+from rbac.department_access import DepartmentAccess
 from llm.llm_engine import LLMEngine
 from llm.answer_generator import AnswerGenerator
-from llm.reranker import ResultReranker
+from llm.reranker import get_reranker
 from llm.config import OPENROUTER_API_KEY, DEFAULT_LLM_MODEL, FEATURES
 
 class LLMPoweredChatbot:
@@ -42,8 +43,8 @@ class LLMPoweredChatbot:
                     self.answer_gen = None
                 
                 if FEATURES["enable_reranking"]:
-                    self.reranker = ResultReranker(self.llm)
-                    print("  ✓ Result reranker ready")
+                    self.reranker = get_reranker(self.llm)
+                    print(f"  ✓ Result reranker ready ({type(self.reranker).__name__})")
                 else:
                     self.reranker = None
                     
@@ -82,15 +83,10 @@ class LLMPoweredChatbot:
         query_embedding = self.model.encode(normalized, normalize_embeddings=True).tolist()
         
         # Map role to ChromaDB filter
-        if user_role == "employee":
-            role_key = "role_general"
-        else:
-            role_key = f"role_{user_role}"
-        
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=top_k,
-            where={role_key: True}
+            where=DepartmentAccess.default().where([user_role])
         )
         
         return results
@@ -2,6 +2,11 @@
 
 from .llm_engine import LLMEngine
 from .answer_generator import AnswerGenerator
-from .reranker import ResultReranker
+from .reranker import CrossEncoderReranker, ResultReranker, get_reranker
+from .errors import LLMError
+from .model_router import ModelRouter
+from .circuit_breaker import CircuitBreaker
+from .usage import usage_aggregator, usage_context
 
-__all__ = ["LLMEngine", "AnswerGenerator", "ResultReranker"]
+__all__ = ["LLMEngine", "AnswerGenerator", "ResultReranker", "CrossEncoderReranker", "get_reranker", "LLMError", "ModelRouter", "CircuitBreaker",
+           "usage_aggregator", "usage_context"]
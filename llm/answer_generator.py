@@ -29,6 +29,9 @@ class AnswerGenerator:
             
         Returns:
             Dict with answer and sources
+            
+        Raises:
+            LLMError: If the LLM call fails
         """
         
         # Extract documents and metadata
@@ -90,6 +93,9 @@ Please provide a clear, concise answer based on the documents above. If the answ
             
         Returns:
             Dict with answer, explanation, and sources
+            
+        Raises:
+            LLMError: If the LLM call fails
         """
         
         documents = search_results.get("documents", [[]])[0]
@@ -0,0 +1,210 @@
+"""Circuit breaker around an LLM client"""
+
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Union
+
+from .config import LLM_BREAKER_CONFIG
+from .errors import LLMCircuitOpenError, LLMError
+from .llm_engine import LLMEngine, Prompt
+from .model_router import ModelRouter
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the LLM provider is down or too slow
+
+    Drop-in for LLMEngine/ModelRouter (generate, agenerate, the stream
+    variants, model, close/aclose). States:
+
+    - closed: calls go through. A call that fails with a provider error
+      (connection, timeout, 429, 5xx) or takes longer than the latency SLO
+      counts as bad; `failure_threshold` bad calls in a row open the circuit.
+    - open: calls raise LLMCircuitOpenError at once, so no worker waits on
+      timeouts and retries, until `reset_timeout` seconds have passed.
+    - half-open: up to `half_open_probes` calls at a time are let through
+      (the rest still fail fast). A good probe closes the circuit, a bad one
+      opens it for another `reset_timeout`.
+
+    Client errors (auth, bad request, unusable response) say nothing about
+    the provider's health and leave the state unchanged.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self,
+                 llm: Union[LLMEngine, ModelRouter],
+                 failure_threshold: int = LLM_BREAKER_CONFIG["failure_threshold"],
+                 latency_slo: float = LLM_BREAKER_CONFIG["latency_slo"],
+                 reset_timeout: float = LLM_BREAKER_CONFIG["reset_timeout"],
+                 half_open_probes: int = LLM_BREAKER_CONFIG["half_open_probes"],
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the breaker
+
+        Args:
+            llm: Client whose calls are guarded
+            failure_threshold: Bad calls in a row that open the circuit
+            latency_slo: Seconds a call may take (to the first token for
+                streams) before it counts as bad
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_probes: Probe calls in flight at once while half-open
+            clock: Monotonic time source (tests)
+        """
+        self.llm = llm
+        self.model = llm.model
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._bad_calls = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.trips = 0
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        """State, bad calls in a row and times the circuit opened"""
+        return {"state": self.state, "bad_calls": self._bad_calls, "trips": self.trips}
+
+    def _acquire(self) -> bool:
+        """
+        Admit a call, or raise LLMCircuitOpenError
+
+        Returns:
+            True if the call is a half-open probe
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self.reset_timeout - (self._clock() - self._opened_at)
+                if remaining > 0:
+                    raise LLMCircuitOpenError(
+                        f"LLM circuit open after {self._bad_calls} failed or slow calls; "
+                        f"next attempt in {remaining:.0f}s", retry_after=remaining
+                    )
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    raise LLMCircuitOpenError("LLM circuit half-open: a probe call is in flight", retry_after=1.0)
+                self._probes += 1
+                return True
+            return False
+
+    def _release(self, probe: bool, good: Optional[bool]):
+        """
+        Record a call's outcome
+
+        Args:
+            probe: Whether the call was a half-open probe
+            good: True (fast success), False (provider error or SLO
+                violation), None (no signal: client error or cancelled)
+        """
+        with self._lock:
+            if probe:
+                self._probes -= 1
+            if good is None:
+                return
+            if good:
+                self._bad_calls = 0
+                self._state = self.CLOSED
+                return
+            self._bad_calls += 1
+            if self._state == self.HALF_OPEN or self._bad_calls >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def _outcome(self, error: Optional[BaseException], latency: Optional[float]) -> Optional[bool]:
+        if error is None:
+            return latency is None or latency <= self.latency_slo
+        if isinstance(error, LLMError):
+            return False if error.retryable else None
+        return None
+
+    # ------------------------------------------------------------------
+    # Guarded calls
+    # ------------------------------------------------------------------
+
+    def generate(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> str:
+        """LLM generate() unless the circuit is open (then LLMCircuitOpenError)"""
+        probe = self._acquire()
+        start = self._clock()
+        try:
+            answer = self.llm.generate(prompt, max_tokens, temperature)
+        except BaseException as e:
+            self._release(probe, self._outcome(e, None))
+            raise
+        self._release(probe, self._outcome(None, self._clock() - start))
+        return answer
+
+    async def agenerate(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> str:
+        """LLM agenerate() unless the circuit is open (then LLMCircuitOpenError)"""
+        probe = self._acquire()
+        start = self._clock()
+        try:
+            answer = await self.llm.agenerate(prompt, max_tokens, temperature)
+        except BaseException as e:
+            self._release(probe, self._outcome(e, None))
+            raise
+        self._release(probe, self._outcome(None, self._clock() - start))
+        return answer
+
+    def generate_stream(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> Iterator[str]:
+        """LLM generate_stream(); judged on time to first token"""
+        probe = self._acquire()
+        start, first_token, good = self._clock(), None, None
+        try:
+            for text in self.llm.generate_stream(prompt, max_tokens, temperature):
+                if first_token is None:
+                    first_token = self._clock() - start
+                yield text
+            good = self._outcome(None, first_token)
+        except BaseException as e:
+            good = self._outcome(e, None)
+            raise
+        finally:
+            # Also runs when the consumer abandons the stream (close or garbage
+            # collection), so a half-open probe slot is never leaked
+            self._release(probe, good)
+
+    async def agenerate_stream(self, prompt: Prompt, max_tokens: int = 500,
+                               temperature: float = 0.7) -> AsyncIterator[str]:
+        """LLM agenerate_stream(); judged on time to first token"""
+        probe = self._acquire()
+        start, first_token, good = self._clock(), None, None
+        try:
+            async for text in self.llm.agenerate_stream(prompt, max_tokens, temperature):
+                if first_token is None:
+                    first_token = self._clock() - start
+                yield text
+            good = self._outcome(None, first_token)
+        except BaseException as e:
+            good = self._outcome(e, None)
+            raise
+        finally:
+            # Also runs when the consumer abandons the stream (close or garbage
+            # collection), so a half-open probe slot is never leaked
+            self._release(probe, good)
+
+    async def aclose(self):
+        await self.llm.aclose()
+
+    def close(self):
+        self.llm.close()
+
+    def test_connection(self) -> bool:
+        return self.llm.test_connection()
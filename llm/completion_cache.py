@@ -0,0 +1,248 @@
+"""
+Disk-backed LLM Completion Cache
+Answers persisted in SQLite under two keys, with LRU eviction and
+invalidation when a chunk an answer was built from changes
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .config import COMPLETION_CACHE_CONFIG
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    exact_key      TEXT NOT NULL UNIQUE,
+    structural_key TEXT,
+    answer         TEXT NOT NULL,
+    chunk_hashes   TEXT NOT NULL DEFAULT '{}',
+    created_at     REAL NOT NULL,
+    accessed_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completions_structural ON completions (structural_key);
+CREATE INDEX IF NOT EXISTS idx_completions_accessed ON completions (accessed_at);
+CREATE TABLE IF NOT EXISTS completion_chunks (
+    completion_id INTEGER NOT NULL REFERENCES completions (id) ON DELETE CASCADE,
+    chunk_id      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completion_chunks_chunk ON completion_chunks (chunk_id);
+"""
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!. ")
+
+
+def content_hash(text: str) -> str:
+    """Hash of a chunk's text, stored to detect changed chunks"""
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    LRU-bounded completion cache persisted in a SQLite file
+
+    Every entry has an exact key (model, prompt hash, temperature,
+    max_tokens) and optionally a structural key (query type, normalized
+    query, sorted chunk ids, ...). The structural key is what lets two roles
+    that retrieve the identical chunk set share an answer; since it does not
+    cover chunk texts, structural hits are only served while the stored
+    content hash of every chunk still matches.
+    """
+
+    def __init__(self, path: str, max_entries: int = 2000):
+        """
+        Open (or create) a cache file
+
+        Args:
+            path: SQLite file path; parent directories are created
+            max_entries: Least recently used entries beyond this are evicted
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def exact_key(model: str, prompt: Union[str, List[Dict[str, Any]]], temperature: float, max_tokens: int) -> str:
+        """Key of one exact LLM request (prompt string or chat messages)"""
+        if not isinstance(prompt, str):
+            prompt = json.dumps(prompt, ensure_ascii=False, sort_keys=True)
+        return _digest("exact", model, hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+                       round(float(temperature), 4), int(max_tokens))
+
+    @staticmethod
+    def structural_key(query_type: str, query: str, chunk_ids: Sequence[str], *variant) -> str:
+        """
+        Key of a question asked over a chunk set, independent of who asked
+
+        Args:
+            query_type: Detected query type (selects the prompt template)
+            query: User question; normalized with normalize_query()
+            chunk_ids: Chunks the answer is built from (order does not matter)
+            *variant: Anything else that changes the answer (model, prompt options)
+        """
+        return _digest("structural", query_type, normalize_query(query), sorted(chunk_ids), *variant)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get(self, exact_key: Optional[str] = None, structural_key: Optional[str] = None,
+            chunk_hashes: Optional[Dict[str, str]] = None) -> Optional[Dict[str, str]]:
+        """
+        Look up an answer, preferring an exact match
+
+        Args:
+            exact_key: Key from exact_key()
+            structural_key: Key from structural_key()
+            chunk_hashes: Current chunk id -> content_hash(); a structural
+                entry whose stored hashes differ is deleted instead of served
+
+        Returns:
+            {"answer": ..., "match": "exact" | "structural"}, or None
+        """
+        with self._lock:
+            if exact_key is not None:
+                row = self._conn.execute(
+                    "SELECT id, answer FROM completions WHERE exact_key = ?", (exact_key,)
+                ).fetchone()
+                if row is not None:
+                    self._touch(row[0])
+                    return {"answer": row[1], "match": "exact"}
+
+            if structural_key is not None:
+                rows = self._conn.execute(
+                    "SELECT id, answer, chunk_hashes FROM completions WHERE structural_key = ? "
+                    "ORDER BY accessed_at DESC", (structural_key,)
+                ).fetchall()
+                for entry_id, answer, stored in rows:
+                    if chunk_hashes is not None and json.loads(stored) != chunk_hashes:
+                        self._conn.execute("DELETE FROM completions WHERE id = ?", (entry_id,))
+                        continue
+                    self._touch(entry_id)
+                    return {"answer": answer, "match": "structural"}
+        return None
+
+    def put(self, exact_key: str, answer: str, structural_key: Optional[str] = None,
+            chunk_hashes: Optional[Dict[str, str]] = None):
+        """
+        Store an answer (replacing an entry with the same exact key)
+
+        Args:
+            exact_key: Key from exact_key()
+            answer: Completion text
+            structural_key: Key from structural_key(), if the answer may be shared
+            chunk_hashes: Chunk id -> content_hash() of the chunks it was built from
+        """
+        chunk_hashes = chunk_hashes or {}
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM completions WHERE exact_key = ?", (exact_key,))
+                cursor = self._conn.execute(
+                    "INSERT INTO completions (exact_key, structural_key, answer, chunk_hashes, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (exact_key, structural_key, answer, json.dumps(chunk_hashes, sort_keys=True), now, now)
+                )
+                self._conn.executemany(
+                    "INSERT INTO completion_chunks (completion_id, chunk_id) VALUES (?, ?)",
+                    [(cursor.lastrowid, chunk_id) for chunk_id in chunk_hashes]
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def invalidate_chunks(self, chunk_ids: List[str]) -> int:
+        """
+        Drop every answer built from any of these chunks
+
+        Indexers call this (through invalidate_cached_answers) when they
+        write chunks; lookups also catch changed chunks lazily through their
+        content hashes.
+
+        Returns:
+            Number of entries removed
+        """
+        if not chunk_ids:
+            return 0
+        placeholders = ",".join("?" * len(chunk_ids))
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM completions WHERE id IN "
+                f"(SELECT completion_id FROM completion_chunks WHERE chunk_id IN ({placeholders}))",
+                list(chunk_ids)
+            )
+            return cursor.rowcount
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def _touch(self, entry_id: int):
+        self._conn.execute("UPDATE completions SET accessed_at = ? WHERE id = ?", (time.time(), entry_id))
+
+    def _evict(self):
+        """Delete least recently used entries beyond max_entries"""
+        self._conn.execute(
+            "DELETE FROM completions WHERE id IN "
+            "(SELECT id FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+
+def invalidate_cached_answers(chunk_ids: List[str], path: Optional[str] = None) -> int:
+    """
+    Drop cached answers built from chunks an indexer has just written
+
+    Args:
+        chunk_ids: Written chunk ids
+        path: Cache file (default: COMPLETION_CACHE_CONFIG["path"]); nothing
+            happens if it does not exist
+
+    Returns:
+        Number of entries removed
+    """
+    path = path or COMPLETION_CACHE_CONFIG["path"]
+    if not chunk_ids or not Path(path).exists():
+        return 0
+    cache = CompletionCache(path, max_entries=COMPLETION_CACHE_CONFIG["max_entries"])
+    try:
+        return cache.invalidate_chunks(list(chunk_ids))
+    finally:
+        cache.close()
@@ -26,9 +26,42 @@ ANSWER_GENERATION_CONFIG = {
     "temperature": 0.5,  # Lower for more consistent answers
 }
 
+# Answer length per query type (RAGPipeline default when max_tokens is not given)
+ANSWER_MAX_TOKENS = {
+    "factual": 200,
+    "general": 350,
+    "summary": 450,
+    "comparison": 450,
+}
+
+# Context Packing Config (rag/context_packer.py)
+CONTEXT_PACKING_CONFIG = {
+    "max_context_tokens": int(os.getenv("CONTEXT_TOKEN_BUDGET", "450")),  # context block, excl. template
+    "max_chunks": 4,
+    "max_chunk_tokens": 150,      # longer chunks are trimmed to their best sentences
+    "mmr_lambda": 0.7,            # relevance vs. redundancy
+    "relevance_margin": 0.2,      # skip chunks this far below the best chunk's relevance
+    "max_candidates": 8,          # nearest results whose texts are fetched and offered to the packer
+}
+
+# Extractive Answers (rag/extractive_answerer.py): factual questions answered
+# from the retrieved lines without an LLM call, for requests that opt in
+EXTRACTIVE_CONFIG = {
+    "min_relevance": float(os.getenv("EXTRACTIVE_MIN_RELEVANCE", "0.6")),  # top chunk, 1 - distance
+    "min_score": 0.8,     # query terms covered by the best line (with its section title)
+    "max_units": 2,       # lines/sentences per answer
+}
+
 # Re-ranking Config
 RERANKING_CONFIG = {
-    "max_tokens": 50,
+    "backend": os.getenv("RERANKER_BACKEND", "cross-encoder"),  # "cross-encoder" (local CPU) or "llm"
+    "cross_encoder_model": os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+    "batch_size": 32,        # (query, chunk) pairs per forward pass
+    "cache_size": 4096,      # cached (query, chunk) scores
+    "max_tokens": 50,        # llm backend
+    "score_mode": "batch",   # ResultReranker.score_many: "batch" (one JSON prompt) or "concurrent"
+    "score_timeout": 10.0,   # seconds per scoring call; late documents keep their vector score
+    "score_concurrency": 5,  # scoring calls in flight ("concurrent" mode)
     "temperature": 0.1,  # Very low for consistent scoring
 }
 
@@ -37,8 +70,71 @@ AVAILABLE_MODELS = {
     "mistral-7b": "mistralai/mistral-7b-instruct:free",
 }
 
-# OpenRouter Endpoint (corrected to .ai domain)
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+# USD per million (prompt, completion) tokens, for usage accounting when the
+# API does not report a cost; unlisted models count as free
+MODEL_PRICES = {
+    "mistralai/mistral-7b-instruct:free": (0.0, 0.0),
+    "mistralai/mistral-7b-instruct": (0.03, 0.055),
+}
+
+# OpenRouter Endpoint (corrected to .ai domain); override the base URL to
+# target a compatible server, e.g. scripts/mock_openrouter_server.py
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
+OPENROUTER_API_URL = f"{OPENROUTER_BASE_URL}/chat/completions"
+
+# HTTP Client Config (pooled connections, retries, outbound concurrency)
+LLM_CLIENT_CONFIG = {
+    "timeout": float(os.getenv("LLM_TIMEOUT", "30")),           # seconds per attempt
+    "connect_timeout": 5.0,
+    "max_retries": int(os.getenv("LLM_MAX_RETRIES", "3")),      # on 429, 5xx, timeouts
+    "backoff_base": 0.5,                                        # seconds; doubles per retry
+    "backoff_max": 8.0,
+    "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "8")),  # in-flight calls per engine
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0,
+}
+
+# Model Routing Config (llm/model_router.py); routing is on when the pool has 2+ models
+LLM_ROUTER_CONFIG = {
+    "models": [m.strip() for m in os.getenv("LLM_MODEL_POOL", "").split(",") if m.strip()],
+    "hedge": os.getenv("LLM_HEDGE", "1").lower() in ("1", "true", "yes"),
+    "window": 50,                 # recent calls per model in the latency/error stats
+    "min_samples": 3,             # calls before a model's stats are trusted
+    "explore_rate": 0.05,         # calls sent to a random model to refresh its stats
+    "error_penalty": 4.0,         # p50 latency x (1 + penalty x error rate)
+    "hedge_min_delay": 0.5,       # seconds; the hedge fires after the model's p95, within these bounds
+    "hedge_max_delay": 10.0,
+}
+
+# Circuit Breaker (llm/circuit_breaker.py): after `failure_threshold` calls in
+# a row fail or exceed the latency SLO, LLM calls are rejected at once for
+# `reset_timeout` seconds, then single probe calls test the provider again
+LLM_BREAKER_CONFIG = {
+    "enabled": os.getenv("LLM_CIRCUIT_BREAKER", "1").lower() in ("1", "true", "yes"),
+    "failure_threshold": int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+    "latency_slo": float(os.getenv("LLM_LATENCY_SLO", "15")),  # seconds; first token for streams
+    "reset_timeout": float(os.getenv("LLM_BREAKER_RESET", "30")),
+    "half_open_probes": 1,    # calls let through at once while half-open
+}
+
+# Provider prompt caching: the system message (PromptTemplates.build_messages)
+# is a stable prefix. OpenAI/DeepSeek-style providers cache it automatically;
+# Anthropic and Gemini models need a cache_control hint on it
+PROMPT_CACHE_CONFIG = {
+    "hints": os.getenv("LLM_PROMPT_CACHE_HINTS", "1").lower() in ("1", "true", "yes"),
+    "hint_model_prefixes": ("anthropic/", "google/gemini"),
+}
+
+# Completion Cache Config (SQLite file, LRU-bounded; see llm/completion_cache.py)
+COMPLETION_CACHE_CONFIG = {
+    "enabled": os.getenv("LLM_CACHE", "1").lower() in ("1", "true", "yes"),
+    "path": os.getenv(
+        "LLM_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_completions.sqlite3")
+    ),
+    "max_entries": int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000")),
+}
 
 # Feature Flags
 FEATURES = {
@@ -46,4 +142,6 @@ FEATURES = {
     "enable_answer_generation": True,
     "enable_reranking": True,
     "enable_query_expansion": False,  # Future feature
+    # Deployment opt-in for extractive answers; requests still opt in per query
+    "enable_extractive_answers": os.getenv("EXTRACTIVE_ANSWERS", "0").lower() in ("1", "true", "yes"),
 }
@@ -0,0 +1,58 @@
+"""Typed errors raised by the LLM client"""
+
+from typing import Optional
+
+
+class LLMError(Exception):
+    """Base class for LLM call failures"""
+
+    # Whether the call may succeed if repeated
+    retryable = False
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMConnectionError(LLMError):
+    """The API could not be reached (DNS, TLS, connection reset)"""
+    retryable = True
+
+
+class LLMTimeoutError(LLMError):
+    """The API did not answer within the timeout"""
+    retryable = True
+
+
+class LLMRateLimitError(LLMError):
+    """HTTP 429; retry_after is the server's hint in seconds, if any"""
+    retryable = True
+
+    def __init__(self, message: str, status_code: Optional[int] = 429, retry_after: Optional[float] = None):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
+
+class LLMServerError(LLMError):
+    """HTTP 5xx from the API or the upstream model provider"""
+    retryable = True
+
+
+class LLMAuthError(LLMError):
+    """HTTP 401/403: missing, invalid or unauthorized API key"""
+
+
+class LLMRequestError(LLMError):
+    """Any other 4xx: the request itself was rejected"""
+
+
+class LLMResponseError(LLMError):
+    """The API answered 200 but the body has no usable completion"""
+
+
+class LLMCircuitOpenError(LLMError):
+    """The circuit breaker is open: the call was not sent; retry_after is seconds until the next probe"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
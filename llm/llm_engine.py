@@ -1,79 +1,535 @@
 """LLM Engine using OpenRouter API"""
 
+import asyncio
+import json
 import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+import httpx
 import requests
-from typing import Optional, List, Dict
+from requests.adapters import HTTPAdapter
+
+from .config import LLM_CLIENT_CONFIG, OPENROUTER_API_URL, PROMPT_CACHE_CONFIG
+from .usage import estimate_tokens, usage_aggregator
+from .errors import (
+    LLMAuthError,
+    LLMConnectionError,
+    LLMError,
+    LLMRateLimitError,
+    LLMRequestError,
+    LLMResponseError,
+    LLMServerError,
+    LLMTimeoutError,
+)
+
+# A prompt string (sent as one user message) or chat messages
+Prompt = Union[str, List[Dict[str, Any]]]
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    """Text of a chat message whose content is a string or a list of parts"""
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
 
 class LLMEngine:
-    """Interface to OpenRouter API for LLM calls"""
-    
-    def __init__(self, api_key: Optional[str] = None, model: str = "mistral-7b"):
+    """
+    Interface to OpenRouter API for LLM calls
+
+    Calls go through pooled keep-alive connections (a requests.Session for
+    generate(), an httpx.AsyncClient for agenerate()), are retried with
+    jittered exponential backoff on 429/5xx/timeouts, and are limited to
+    max_concurrency in flight per engine. Failures raise llm.errors.LLMError
+    subclasses. Every call's tokens, timing and cost are recorded in
+    llm.usage.usage_aggregator.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "mistral-7b",
+                 timeout: float = LLM_CLIENT_CONFIG["timeout"],
+                 max_retries: int = LLM_CLIENT_CONFIG["max_retries"],
+                 max_concurrency: int = LLM_CLIENT_CONFIG["max_concurrency"],
+                 base_url: Optional[str] = None):
         """
         Initialize LLM Engine
-        
+
         Args:
             api_key: OpenRouter API key (or use OPENROUTER_API_KEY env var)
             model: Model to use (mistral-7b, mixtral-8x7b, neural-chat-7b, llama-2-7b)
+            timeout: Read timeout per attempt in seconds
+            max_retries: Retries after the first attempt for retryable errors
+            max_concurrency: Maximum calls in flight from this engine
+            base_url: OpenRouter-compatible API root, e.g. http://127.0.0.1:8001/api/v1
+                (default: OPENROUTER_BASE_URL env var, else openrouter.ai)
         """
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         if not self.api_key:
             raise ValueError("OpenRouter API key not provided. Set OPENROUTER_API_KEY env var or pass api_key parameter")
-        
+
         # Map friendly names to OpenRouter model IDs (using :free suffix for free tier)
         self.model_map = {
             "mistral-7b": "mistralai/mistral-7b-instruct:free",
         }
-        
+
         self.model = self.model_map.get(model, model)  # Support both friendly names and full model IDs
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
-        
-    def generate(self, prompt: str, max_tokens: int = 500, temperature: float = 0.7) -> str:
+        self.api_url = f"{base_url.rstrip('/')}/chat/completions" if base_url else OPENROUTER_API_URL
+
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+
+        # Sync path: one session per engine keeps TLS connections alive
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=LLM_CLIENT_CONFIG["max_connections"]
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+
+        # Async path: created lazily on the event loop that uses it
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_closer: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Request / response handling shared by both paths
+    # ------------------------------------------------------------------
+
+    @property
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    @staticmethod
+    def _messages(prompt: Prompt, model: str) -> List[Dict[str, Any]]:
+        """
+        Chat messages for a prompt, with prompt-cache hints where the model needs them
+
+        OpenAI- and DeepSeek-style providers cache a repeated prefix on their
+        own; Anthropic and Gemini models only cache up to a content part
+        marked with cache_control, so the system messages (the static part
+        of PromptTemplates.build_messages()) are marked for those.
+        """
+        if isinstance(prompt, str):
+            return [{"role": "user", "content": prompt}]
+        if not (PROMPT_CACHE_CONFIG["hints"]
+                and model.startswith(tuple(PROMPT_CACHE_CONFIG["hint_model_prefixes"]))):
+            return list(prompt)
+        return [
+            {**message, "content": [{"type": "text", "text": message_text(message),
+                                     "cache_control": {"type": "ephemeral"}}]}
+            if message.get("role") == "system" else message
+            for message in prompt
+        ]
+
+    def _payload(self, prompt: Prompt, max_tokens: int, temperature: float,
+                 stream: bool = False, model: Optional[str] = None) -> Dict[str, Any]:
+        model = self.model_map.get(model, model) if model else self.model
+        payload = {
+            "model": model,
+            "messages": self._messages(prompt, model),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "usage": {"include": True},  # token counts and cost in the response
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    @staticmethod
+    def _status_error(status_code: int, body: str, headers) -> Optional[LLMError]:
+        """Map a non-2xx status to a typed error (None for success)"""
+        if status_code < 400:
+            return None
+        message = f"OpenRouter API returned {status_code}: {body[:200]}"
+        if status_code == 429:
+            retry_after = headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after is not None else None
+            except ValueError:
+                retry_after = None
+            return LLMRateLimitError(message, retry_after=retry_after)
+        if status_code >= 500:
+            return LLMServerError(message, status_code)
+        if status_code in (401, 403):
+            return LLMAuthError(message, status_code)
+        return LLMRequestError(message, status_code)
+
+    @staticmethod
+    def _completion_text(result: Dict[str, Any]) -> str:
+        """Extract the answer from a chat completion body"""
+        try:
+            return result["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            error = result.get("error") if isinstance(result, dict) else None
+            raise LLMResponseError(f"No completion in response: {error or result}")
+
+    @staticmethod
+    def _stream_delta(line: str, usage: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Parse one server-sent event line of a streamed completion
+
+        Args:
+            line: Line of the event stream
+            usage: Filled with the "usage" block when the chunk carries one
+
+        Returns:
+            The token text it carries ("" for keep-alive comments and
+            role-only deltas), or None once the stream is done
+
+        Raises:
+            LLMResponseError: If the provider reports an error mid-stream
+        """
+        if not line.startswith("data:"):
+            return ""  # blank separators and ": OPENROUTER PROCESSING" comments
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            raise LLMResponseError(f"Invalid stream chunk from OpenRouter API: {data[:200]}")
+        if chunk.get("error"):
+            raise LLMResponseError(f"OpenRouter API stream error: {chunk['error']}")
+        if usage is not None and isinstance(chunk.get("usage"), dict):
+            usage.update(chunk["usage"])
+        try:
+            return chunk["choices"][0]["delta"].get("content") or ""
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return ""
+
+    @staticmethod
+    def _record_usage(payload: Dict[str, Any], start: float, ttfb_at: Optional[float] = None,
+                      text: str = "", usage: Optional[Dict[str, Any]] = None, ok: bool = True):
+        """Record one call (all attempts) in the usage aggregator"""
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = sum(estimate_tokens(message_text(m)) for m in payload["messages"])
+        completion_tokens = usage.get("completion_tokens")
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(text)
+        usage_aggregator.record(
+            model=payload["model"],
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            ttfb=ttfb_at - start if ttfb_at is not None else None,
+            latency=time.perf_counter() - start,
+            ok=ok,
+            cost=usage.get("cost"),
+            streamed=bool(payload.get("stream")),
+            cached_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        )
+
+    def _backoff(self, attempt: int, error: LLMError) -> float:
+        """Full-jitter exponential backoff; a Retry-After hint is a lower bound"""
+        ceiling = min(LLM_CLIENT_CONFIG["backoff_max"], LLM_CLIENT_CONFIG["backoff_base"] * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, LLM_CLIENT_CONFIG["backoff_max"]))
+        return delay
+
+    # ------------------------------------------------------------------
+    # Sync API
+    # ------------------------------------------------------------------
+
+    def _post(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """One attempt over the pooled session; returns the body and when its headers arrived"""
+        sent_at = time.perf_counter()
+        try:
+            response = self._session.post(
+                self.api_url,
+                headers=self._headers,
+                json=payload,
+                timeout=(LLM_CLIENT_CONFIG["connect_timeout"], self.timeout)
+            )
+        except requests.exceptions.Timeout as e:
+            raise LLMTimeoutError(f"OpenRouter API timed out: {e}")
+        except requests.exceptions.RequestException as e:
+            raise LLMConnectionError(f"Error calling OpenRouter API: {e}")
+
+        error = self._status_error(response.status_code, response.text, response.headers)
+        if error is not None:
+            raise error
+        try:
+            return response.json(), sent_at + response.elapsed.total_seconds()
+        except ValueError:
+            raise LLMResponseError(f"Invalid JSON from OpenRouter API: {response.text[:200]}")
+
+    def generate(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7,
+                 model: Optional[str] = None) -> str:
         """
         Generate text using LLM
-        
+
         Args:
-            prompt: Input prompt
+            prompt: Input prompt, or chat messages ({"role", "content"} dicts)
             max_tokens: Maximum tokens in response
             temperature: Creativity level (0=deterministic, 1=creative)
-            
+            model: Model for this call only (default: the engine's model)
+
         Returns:
             Generated text response
+
+        Raises:
+            LLMError: If the call fails after retries
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        
-        data = {
-            "model": self.model,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        }
-        
+        payload = self._payload(prompt, max_tokens, temperature, model=model)
+        start = time.perf_counter()
+        with self._sync_slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result, ttfb_at = self._post(payload)
+                    text = self._completion_text(result)
+                    self._record_usage(payload, start, ttfb_at, text, result.get("usage"))
+                    return text
+                except LLMError as e:
+                    if not e.retryable or attempt == self.max_retries:
+                        self._record_usage(payload, start, ok=False)
+                        raise
+                    time.sleep(self._backoff(attempt, e))
+
+    def generate_stream(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7,
+                        model: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate text as it is produced, using the provider's streaming mode
+
+        Connection and status errors are retried like generate() until the
+        first token arrives; after that a failure ends the stream with an
+        error, since the caller has already consumed part of the answer.
+
+        Args:
+            prompt: Input prompt, or chat messages ({"role", "content"} dicts)
+            max_tokens: Maximum tokens in response
+            temperature: Creativity level (0=deterministic, 1=creative)
+            model: Model for this call only (default: the engine's model)
+
+        Yields:
+            Answer text fragments in order
+
+        Raises:
+            LLMError: If the call fails
+        """
+        payload = self._payload(prompt, max_tokens, temperature, stream=True, model=model)
+        start = time.perf_counter()
+        with self._sync_slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self._open_stream(payload)
+                    break
+                except LLMError as e:
+                    if not e.retryable or attempt == self.max_retries:
+                        self._record_usage(payload, start, ok=False)
+                        raise
+                    time.sleep(self._backoff(attempt, e))
+
+            # Recorded however the stream ends: a consumer that stops early
+            # (client disconnect: GeneratorExit) still paid for what was sent
+            parts, usage, first_token_at, ok = [], {}, None, False
+            with response:
+                try:
+                    for line in response.iter_lines(decode_unicode=True):
+                        text = self._stream_delta(line or "", usage)
+                        if text is None:
+                            break
+                        if text:
+                            first_token_at = first_token_at or time.perf_counter()
+                            parts.append(text)
+                            yield text
+                    ok = True
+                except requests.exceptions.RequestException as e:
+                    raise LLMConnectionError(f"OpenRouter API stream interrupted: {e}")
+                finally:
+                    self._record_usage(payload, start, first_token_at, "".join(parts), usage, ok=ok)
+
+    def _open_stream(self, payload: Dict[str, Any]) -> requests.Response:
+        """Open a streamed completion; the caller closes the response"""
         try:
-            response = requests.post(self.api_url, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
-            if "choices" in result and len(result["choices"]) > 0:
-                return result["choices"][0]["message"]["content"]
-            else:
-                return "Error: No response from model"
-                
+            response = self._session.post(
+                self.api_url,
+                headers=self._headers,
+                json=payload,
+                timeout=(LLM_CLIENT_CONFIG["connect_timeout"], self.timeout),
+                stream=True
+            )
+        except requests.exceptions.Timeout as e:
+            raise LLMTimeoutError(f"OpenRouter API timed out: {e}")
         except requests.exceptions.RequestException as e:
-            return f"Error calling OpenRouter API: {str(e)}"
-    
+            raise LLMConnectionError(f"Error calling OpenRouter API: {e}")
+
+        error = self._status_error(response.status_code, response.text if response.status_code >= 400 else "",
+                                   response.headers)
+        if error is not None:
+            response.close()
+            raise error
+        response.encoding = "utf-8"
+        return response
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """
+        Pooled client and semaphore bound to the running event loop
+
+        A client is closed on the loop that owns it: when the engine moves to
+        another loop while the old one still runs (another thread), its
+        client is closed there; otherwise it is closed as its loop shuts
+        down (asyncio.run() cancels pending tasks before closing the loop),
+        so each asyncio.run() of a sync caller does not leak a pool of sockets.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            if self._async_client is not None and self._async_loop.is_running():
+                asyncio.run_coroutine_threadsafe(self._async_client.aclose(), self._async_loop)
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=LLM_CLIENT_CONFIG["connect_timeout"]),
+                limits=httpx.Limits(
+                    max_connections=LLM_CLIENT_CONFIG["max_connections"],
+                    max_keepalive_connections=LLM_CLIENT_CONFIG["max_keepalive_connections"],
+                    keepalive_expiry=LLM_CLIENT_CONFIG["keepalive_expiry"],
+                ),
+            )
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+            self._async_loop = loop
+            self._async_closer = loop.create_task(self._close_at_shutdown(self._async_client))
+        return self._async_client
+
+    @staticmethod
+    async def _close_at_shutdown(client: httpx.AsyncClient):
+        """Wait until cancelled (loop shutdown or aclose()), then close the client"""
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await client.aclose()
+
+    async def _apost(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """One attempt over the pooled async client; returns the body and when its headers arrived"""
+        try:
+            request = client.build_request("POST", self.api_url, headers=self._headers, json=payload)
+            response = await client.send(request, stream=True)
+            headers_at = time.perf_counter()
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+        except httpx.TimeoutException as e:
+            raise LLMTimeoutError(f"OpenRouter API timed out: {e!r}")
+        except httpx.HTTPError as e:
+            raise LLMConnectionError(f"Error calling OpenRouter API: {e!r}")
+
+        error = self._status_error(response.status_code, response.text, response.headers)
+        if error is not None:
+            raise error
+        try:
+            return response.json(), headers_at
+        except ValueError:
+            raise LLMResponseError(f"Invalid JSON from OpenRouter API: {response.text[:200]}")
+
+    async def agenerate(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7,
+                        model: Optional[str] = None) -> str:
+        """
+        Generate text without blocking the event loop
+
+        Same arguments and errors as generate().
+        """
+        client = self._get_async_client()
+        payload = self._payload(prompt, max_tokens, temperature, model=model)
+        start = time.perf_counter()
+        async with self._async_slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result, ttfb_at = await self._apost(client, payload)
+                    text = self._completion_text(result)
+                    self._record_usage(payload, start, ttfb_at, text, result.get("usage"))
+                    return text
+                except LLMError as e:
+                    if not e.retryable or attempt == self.max_retries:
+                        self._record_usage(payload, start, ok=False)
+                        raise
+                    await asyncio.sleep(self._backoff(attempt, e))
+
+    async def agenerate_stream(self, prompt: Prompt, max_tokens: int = 500,
+                               temperature: float = 0.7, model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream text without blocking the event loop
+
+        Same arguments, retry behaviour and errors as generate_stream().
+        """
+        client = self._get_async_client()
+        payload = self._payload(prompt, max_tokens, temperature, stream=True, model=model)
+        start = time.perf_counter()
+        async with self._async_slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    request = client.build_request("POST", self.api_url, headers=self._headers, json=payload)
+                    try:
+                        response = await client.send(request, stream=True)
+                    except httpx.TimeoutException as e:
+                        raise LLMTimeoutError(f"OpenRouter API timed out: {e!r}")
+                    except httpx.HTTPError as e:
+                        raise LLMConnectionError(f"Error calling OpenRouter API: {e!r}")
+                    if response.status_code >= 400:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        await response.aclose()
+                        raise self._status_error(response.status_code, body, response.headers)
+                    break
+                except LLMError as e:
+                    if not e.retryable or attempt == self.max_retries:
+                        self._record_usage(payload, start, ok=False)
+                        raise
+                    await asyncio.sleep(self._backoff(attempt, e))
+
+            # Recorded however the stream ends, including a client disconnect
+            # (GeneratorExit/CancelledError), before the response is closed
+            parts, usage, first_token_at, ok = [], {}, None, False
+            try:
+                async for line in response.aiter_lines():
+                    text = self._stream_delta(line, usage)
+                    if text is None:
+                        break
+                    if text:
+                        first_token_at = first_token_at or time.perf_counter()
+                        parts.append(text)
+                        yield text
+                ok = True
+            except httpx.HTTPError as e:
+                raise LLMConnectionError(f"OpenRouter API stream interrupted: {e!r}")
+            finally:
+                self._record_usage(payload, start, first_token_at, "".join(parts), usage, ok=ok)
+                await response.aclose()
+
+    async def aclose(self):
+        """Close pooled async connections"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._async_closer is not None and self._async_loop is asyncio.get_running_loop():
+            self._async_closer.cancel()
+        self._async_closer = None
+
+    def close(self):
+        """Close pooled sync connections"""
+        self._session.close()
+
     def list_available_models(self) -> Dict[str, str]:
         """List available model aliases"""
         return self.model_map
-    
+
     def test_connection(self) -> bool:
         """Test if API key is valid"""
         try:
-            response = self.generate("Hi", max_tokens=10)
-            return "Error" not in response
-        except Exception:
+            self.generate("Hi", max_tokens=10)
+            return True
+        except LLMError:
             return False
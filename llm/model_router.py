@@ -0,0 +1,318 @@
+"""Latency-aware routing over a pool of models, with hedged requests"""
+
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .config import LLM_ROUTER_CONFIG
+from .errors import LLMError
+from .llm_engine import LLMEngine, Prompt
+
+
+class ModelStats:
+    """Latency and outcome of the last `window` calls to one model"""
+
+    def __init__(self, window: int):
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._samples.append((latency, ok))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """Quantile of successful call latencies (None without samples)"""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self),
+            "p50": self.latency_quantile(0.50),
+            "p95": self.latency_quantile(0.95),
+            "error_rate": self.error_rate,
+        }
+
+
+class ModelRouter:
+    """
+    Route LLM calls to the model with the best recent latency
+
+    Drop-in for LLMEngine (generate, agenerate, the stream variants, model,
+    close/aclose). Each model keeps a sliding window of latencies and
+    errors; a call goes to the model with the lowest median latency,
+    inflated by its error rate. Streams are measured by time to first token
+    in windows of their own, so a long answer does not make its model look
+    slow to non-stream calls (or the reverse). Models with too few samples are tried
+    first, and a small fraction of calls explores at random so stale stats
+    recover.
+
+    With hedging on, a call that has not finished after the chosen model's
+    p95 latency is also sent to the next best model; the first success
+    wins and the other call is cancelled (sync calls cannot be interrupted,
+    so the losing thread finishes in the background and its answer is
+    dropped). Streams are routed but not hedged.
+    """
+
+    def __init__(self,
+                 engine: LLMEngine,
+                 models: List[str],
+                 hedge: bool = LLM_ROUTER_CONFIG["hedge"],
+                 window: int = LLM_ROUTER_CONFIG["window"],
+                 min_samples: int = LLM_ROUTER_CONFIG["min_samples"],
+                 explore_rate: float = LLM_ROUTER_CONFIG["explore_rate"],
+                 error_penalty: float = LLM_ROUTER_CONFIG["error_penalty"],
+                 hedge_min_delay: float = LLM_ROUTER_CONFIG["hedge_min_delay"],
+                 hedge_max_delay: float = LLM_ROUTER_CONFIG["hedge_max_delay"],
+                 seed: Optional[int] = None):
+        """
+        Initialize the router
+
+        Args:
+            engine: LLMEngine that sends the calls (any model, per call)
+            models: Model pool (friendly names or OpenRouter ids)
+            hedge: Send a second request to the runner-up model after a p95 delay
+            window: Calls per model kept in the stats
+            min_samples: Calls before a model's stats are trusted
+            explore_rate: Fraction of calls routed to a random model
+            error_penalty: Latency multiplier per unit of error rate
+            hedge_min_delay: Lower bound of the hedge delay (seconds)
+            hedge_max_delay: Hedge delay before a model has latency samples
+            seed: Seed for exploration (tests)
+        """
+        if not models:
+            raise ValueError("ModelRouter needs at least one model")
+        self.engine = engine
+        self.models = [engine.model_map.get(m, m) for m in models]
+        self.model = "router:" + ",".join(self.models)
+        self.hedge = hedge and len(self.models) > 1
+        self.min_samples = min_samples
+        self.explore_rate = explore_rate
+        self.error_penalty = error_penalty
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.stats_by_model = {model: ModelStats(window) for model in self.models}
+        self.stream_stats_by_model = {model: ModelStats(window) for model in self.models}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ------------------------------------------------------------------
+    # Routing decisions
+    # ------------------------------------------------------------------
+
+    def _windows(self, stream: bool) -> Dict[str, ModelStats]:
+        return self.stream_stats_by_model if stream else self.stats_by_model
+
+    def _cost(self, model: str, stream: bool = False) -> float:
+        stats = self._windows(stream)[model]
+        p50 = stats.latency_quantile(0.5)
+        if p50 is None:  # only errors so far
+            p50 = self.hedge_max_delay
+        return p50 * (1 + self.error_penalty * stats.error_rate)
+
+    def ranked_models(self, stream: bool = False) -> List[str]:
+        """
+        Pool ordered best first for the next call
+
+        Args:
+            stream: Rank by time to first token of past streams
+        """
+        windows = self._windows(stream)
+        untried = [m for m in self.models if len(windows[m]) < self.min_samples]
+        if untried:
+            # Fewest samples first, so every model gets measured
+            head = sorted(untried, key=lambda m: len(windows[m]))
+            return head + sorted((m for m in self.models if m not in untried),
+                                 key=lambda m: self._cost(m, stream))
+
+        ranked = sorted(self.models, key=lambda m: self._cost(m, stream))
+        with self._rng_lock:
+            if self._rng.random() < self.explore_rate:
+                ranked.insert(0, ranked.pop(self._rng.randrange(len(ranked))))
+        return ranked
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait on `model` before hedging: its recent p95"""
+        p95 = self.stats_by_model[model].latency_quantile(0.95)
+        if p95 is None:
+            return self.hedge_max_delay
+        return min(max(p95, self.hedge_min_delay), self.hedge_max_delay)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model samples, p50/p95 latency (seconds) and error rate; "stream" holds the same for streams (TTFT)"""
+        return {model: {**stats.summary(), "stream": self.stream_stats_by_model[model].summary()}
+                for model, stats in self.stats_by_model.items()}
+
+    def _record_stream(self, model: str, start: float, first_token: Optional[float], ok: Optional[bool]):
+        """
+        Record a finished stream in its model's stream window
+
+        Args:
+            model: Model that served the stream
+            start: perf_counter() when the stream was requested
+            first_token: Seconds to the first token (None if none arrived)
+            ok: True (completed), False (LLMError), None (abandoned by the
+                consumer; counts as a success once a token arrived)
+        """
+        latency = first_token if first_token is not None else time.perf_counter() - start
+        if ok is False:
+            self.stream_stats_by_model[model].record(latency, False)
+        elif ok or first_token is not None:
+            self.stream_stats_by_model[model].record(latency, True)
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    async def _acall(self, model: str, prompt: Prompt, max_tokens: int, temperature: float) -> str:
+        start = time.perf_counter()
+        try:
+            answer = await self.engine.agenerate(prompt, max_tokens, temperature, model=model)
+        except LLMError:
+            self.stats_by_model[model].record(time.perf_counter() - start, False)
+            raise
+        self.stats_by_model[model].record(time.perf_counter() - start, True)
+        return answer
+
+    async def agenerate(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> str:
+        """
+        Generate text on the best model, hedging stragglers
+
+        Raises:
+            LLMError: If every model tried failed (the last error)
+        """
+        ranked = self.ranked_models()
+        primary = asyncio.ensure_future(self._acall(ranked[0], prompt, max_tokens, temperature))
+        if not self.hedge:
+            return await primary
+
+        pending = {primary}
+        done, pending = await asyncio.wait(pending, timeout=self.hedge_delay(ranked[0]))
+        if primary in done and primary.exception() is None:
+            return primary.result()
+
+        # Primary is slow or failed: race the runner-up against it
+        pending.add(asyncio.ensure_future(self._acall(ranked[1], prompt, max_tokens, temperature)))
+        error: Optional[BaseException] = primary.exception() if primary in done else None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def agenerate_stream(self, prompt: Prompt, max_tokens: int = 500,
+                               temperature: float = 0.7) -> AsyncIterator[str]:
+        """Stream from the model with the best time to first token (routed, not hedged)"""
+        model = self.ranked_models(stream=True)[0]
+        start, first_token, ok = time.perf_counter(), None, None
+        try:
+            async for text in self.engine.agenerate_stream(prompt, max_tokens, temperature, model=model):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                yield text
+            ok = True
+        except LLMError:
+            ok = False
+            raise
+        finally:
+            self._record_stream(model, start, first_token, ok)
+
+    async def aclose(self):
+        await self.engine.aclose()
+
+    # ------------------------------------------------------------------
+    # Sync API
+    # ------------------------------------------------------------------
+
+    def _call(self, model: str, prompt: Prompt, max_tokens: int, temperature: float) -> str:
+        start = time.perf_counter()
+        try:
+            answer = self.engine.generate(prompt, max_tokens, temperature, model=model)
+        except LLMError:
+            self.stats_by_model[model].record(time.perf_counter() - start, False)
+            raise
+        self.stats_by_model[model].record(time.perf_counter() - start, True)
+        return answer
+
+    def generate(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> str:
+        """
+        Generate text on the best model, hedging stragglers
+
+        Raises:
+            LLMError: If every model tried failed (the last error)
+        """
+        ranked = self.ranked_models()
+        if not self.hedge:
+            return self._call(ranked[0], prompt, max_tokens, temperature)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2 * self.engine.max_concurrency,
+                                                thread_name_prefix="llm-hedge")
+        # Threads do not inherit context variables (usage attribution); copy them per call
+        primary = self._executor.submit(contextvars.copy_context().run,
+                                        self._call, ranked[0], prompt, max_tokens, temperature)
+        done, _ = wait([primary], timeout=self.hedge_delay(ranked[0]))
+        if primary in done and primary.exception() is None:
+            return primary.result()
+
+        pending = {primary, self._executor.submit(contextvars.copy_context().run,
+                                                  self._call, ranked[1], prompt, max_tokens, temperature)}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()  # only stops calls that have not started
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def generate_stream(self, prompt: Prompt, max_tokens: int = 500, temperature: float = 0.7) -> Iterator[str]:
+        """Stream from the model with the best time to first token (routed, not hedged)"""
+        model = self.ranked_models(stream=True)[0]
+        start, first_token, ok = time.perf_counter(), None, None
+        try:
+            for text in self.engine.generate_stream(prompt, max_tokens, temperature, model=model):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                yield text
+            ok = True
+        except LLMError:
+            ok = False
+            raise
+        finally:
+            self._record_stream(model, start, first_token, ok)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.engine.close()
+
+    def test_connection(self) -> bool:
+        return self.engine.test_connection()
@@ -1,7 +1,175 @@
-"""Result Reranker - Re-ranks search results using LLM for better relevance"""
+"""Result Reranker - Re-ranks search results for better relevance
 
-from typing import List, Dict, Any
+Two backends with the same rerank()/score_relevance() interface:
+- CrossEncoderReranker: a small cross-encoder scored locally on CPU
+- ResultReranker: asks the LLM for a ranking (one extra completion)
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from .llm_engine import LLMEngine
+from .errors import LLMError
+from .config import RERANKING_CONFIG
+from .usage import usage_context
+
+
+def _reorder(search_results: Dict[str, Any], indices: Sequence[int]) -> Dict[str, Any]:
+    """Search results restricted to `indices`, in that order"""
+    documents = search_results.get("documents", [[]])[0]
+    metadatas = search_results.get("metadatas", [[]])[0]
+    distances = search_results.get("distances", [[]])[0]
+    ids = search_results.get("ids", [[]])[0]
+    return {
+        "documents": [[documents[i] for i in indices]],
+        "metadatas": [[metadatas[i] for i in indices]],
+        "distances": [[distances[i] for i in indices]],
+        "ids": [[ids[i] for i in indices]] if ids else [[]],
+    }
+
+
+class CrossEncoderReranker:
+    """
+    Re-rank search results with a local cross-encoder
+    
+    All (query, chunk) pairs of a call are scored in one batched forward
+    pass on CPU; scores are cached per (query, chunk text), so repeated
+    questions over the same chunks skip the model entirely.
+    """
+    
+    def __init__(self,
+                 model_name: str = RERANKING_CONFIG["cross_encoder_model"],
+                 batch_size: int = RERANKING_CONFIG["batch_size"],
+                 cache_size: int = RERANKING_CONFIG["cache_size"],
+                 max_length: int = 512,
+                 model=None):
+        """
+        Initialize reranker
+        
+        Args:
+            model_name: Hugging Face cross-encoder model
+            batch_size: Pairs per forward pass
+            cache_size: (query, chunk) scores kept in memory
+            max_length: Token limit per (query, chunk) pair
+            model: Already loaded model with a CrossEncoder-style predict()
+                (default: load model_name on CPU)
+        """
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        
+        self.model = model
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _cache_key(query: str, document: str) -> Tuple[str, str]:
+        return (" ".join(query.lower().split()), hashlib.sha1(document.encode("utf-8")).hexdigest())
+    
+    def score_many(self, query: str, documents: List[str]) -> List[float]:
+        """
+        Cross-encoder scores (raw logits, higher = more relevant)
+        
+        Args:
+            query: User query
+            documents: Document texts
+            
+        Returns:
+            One score per document, in order
+        """
+        keys = [self._cache_key(query, doc or "") for doc in documents]
+        scores: List[Optional[float]] = [None] * len(documents)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+        
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            predicted = self.model.predict(
+                [(query, documents[i] or "") for i in missing],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            with self._lock:
+                for i, score in zip(missing, predicted):
+                    scores[i] = float(score)
+                    self._cache[keys[i]] = scores[i]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+    
+    def rerank(self, 
+               query: str,
+               search_results: Dict[str, Any],
+               top_k: int = 3) -> Dict[str, Any]:
+        """
+        Re-rank search results with the cross-encoder
+        
+        Args:
+            query: User query
+            search_results: Original search results from ChromaDB
+            top_k: Number of results to return after re-ranking
+            
+        Returns:
+            Re-ranked search results, plus "rerank_scores"
+        """
+        documents = search_results.get("documents", [[]])[0]
+        if not documents:
+            return search_results
+        
+        scores = self.score_many(query, documents)
+        order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)[:top_k]
+        
+        reranked = _reorder(search_results, order)
+        reranked["rerank_scores"] = [[scores[i] for i in order]]
+        return reranked
+    
+    def score_relevance(self, query: str, document: str) -> float:
+        """
+        Score relevance of a single document to a query
+        
+        Args:
+            query: User query
+            document: Document text
+            
+        Returns:
+            Relevance score (0-100, the sigmoid of the cross-encoder logit)
+        """
+        score = self.score_many(query, [document])[0]
+        return 100.0 / (1.0 + math.exp(-score))
+
+
+def get_reranker(llm_engine: Optional[LLMEngine] = None,
+                 backend: str = RERANKING_CONFIG["backend"]):
+    """
+    Create the configured reranker
+    
+    Args:
+        llm_engine: LLMEngine for the "llm" backend
+        backend: "cross-encoder" (local, default) or "llm"
+        
+    Returns:
+        CrossEncoderReranker or ResultReranker
+    """
+    if backend == "llm":
+        if llm_engine is None:
+            raise ValueError("The llm reranker backend needs an LLMEngine")
+        return ResultReranker(llm_engine)
+    if backend == "cross-encoder":
+        return CrossEncoderReranker()
+    raise ValueError(f"Unknown reranker backend '{backend}'")
+
 
 class ResultReranker:
     """Re-rank search results using LLM to improve relevance"""
@@ -72,8 +240,12 @@ For example: "2,1,3" means document 2 is most relevant, then 1, then 3.
 
 ANSWER (ONLY numbers, no explanation):"""
         
-        # Get LLM ranking
-        ranking_str = self.llm.generate(prompt, max_tokens=50, temperature=0.1)
+        # Get LLM ranking; keep the vector order if the LLM is unavailable
+        try:
+            with usage_context(caller="rerank"):
+                ranking_str = self.llm.generate(prompt, max_tokens=50, temperature=0.1)
+        except LLMError:
+            ranking_str = ",".join(str(i + 1) for i in range(len(documents)))
         
         # Parse the ranking
         try:
@@ -85,15 +257,34 @@ ANSWER (ONLY numbers, no explanation):"""
         # Filter to top_k and reorder
         reranked_indices = [r for r in ranks if 0 <= r < len(documents)][:top_k]
         
-        # Build reranked results
-        reranked = {
-            "documents": [[documents[i] for i in reranked_indices]],
-            "metadatas": [[metadatas[i] for i in reranked_indices]],
-            "distances": [[distances[i] for i in reranked_indices]],
-            "ids": [[ids[i] for i in reranked_indices]] if ids else [[]],
-        }
-        
-        return reranked
+        return _reorder(search_results, reranked_indices)
+    
+    @staticmethod
+    def _relevance_prompt(query: str, document: str) -> str:
+        return f"""Rate the relevance of the following document to the query on a scale of 0-100.
+
+Query: "{query}"
+
+Document: "{document[:300]}"
+
+Respond with ONLY a number between 0-100:"""
+    
+    @staticmethod
+    def _batch_prompt(query: str, documents: List[str]) -> str:
+        doc_descriptions = "\n".join(
+            f'{i}. "{doc[:300]}"' for i, doc in enumerate(documents, 1)
+        )
+        return f"""Rate the relevance of each document to the query on a scale of 0-100.
+
+Query: "{query}"
+
+Documents:
+{doc_descriptions}
+
+Respond with ONLY a JSON list of {len(documents)} numbers, one per document in order.
+For example: [85, 10, 40]
+
+ANSWER:"""
     
     def score_relevance(self, query: str, document: str) -> float:
         """
@@ -107,18 +298,157 @@ ANSWER (ONLY numbers, no explanation):"""
             Relevance score (0-100)
         """
         
-        prompt = f"""Rate the relevance of the following document to the query on a scale of 0-100.
-
-Query: "{query}"
-
-Document: "{document[:300]}"
-
-Respond with ONLY a number between 0-100:"""
-        
-        response = self.llm.generate(prompt, max_tokens=10, temperature=0.0)
+        prompt = self._relevance_prompt(query, document)
         
         try:
+            with usage_context(caller="score"):
+                response = self.llm.generate(prompt, max_tokens=10, temperature=0.0)
             score = float(response.strip())
             return max(0, min(100, score))  # Clamp between 0-100
-        except:
-            return 50.0  # Default if parsing fails
+        except (LLMError, ValueError):
+            return 50.0  # Default if the call or parsing fails
+    
+    def score_many(self,
+                   query: str,
+                   documents: List[str],
+                   vector_scores: Optional[List[float]] = None,
+                   mode: str = RERANKING_CONFIG["score_mode"],
+                   timeout: float = RERANKING_CONFIG["score_timeout"],
+                   max_concurrency: int = RERANKING_CONFIG["score_concurrency"]) -> List[float]:
+        """
+        Score relevance of many documents at about the latency of one call
+        
+        Args:
+            query: User query
+            documents: Document texts
+            vector_scores: Fallback score (0-100) per document, e.g.
+                (1 - distance) * 100; default 50.0
+            mode: "batch" (one prompt returning a JSON list of scores) or
+                "concurrent" (one call per document, fanned out)
+            timeout: Seconds allowed per LLM call
+            max_concurrency: Calls in flight at once in "concurrent" mode
+            
+        Returns:
+            Relevance score (0-100) per document, in order; documents whose
+            call failed or timed out keep their vector score
+        
+        Use ascore_many() from async code. This runs the engine's sync
+        generate() on worker threads, so it never touches (or closes) the
+        async client that event loops share; a call that overruns its
+        timeout keeps its worker until the engine's own read timeout.
+        """
+        fallback = list(vector_scores) if vector_scores is not None else [50.0] * len(documents)
+        if not documents:
+            return []
+        
+        if mode == "batch":
+            prompts, max_tokens = [self._batch_prompt(query, documents)], 6 * len(documents) + 10
+        elif mode == "concurrent":
+            prompts, max_tokens = [self._relevance_prompt(query, document) for document in documents], 10
+        else:
+            raise ValueError(f"Unknown scoring mode '{mode}'")
+        
+        def call(prompt: str) -> str:
+            with usage_context(caller="score"):
+                return self.llm.generate(prompt, max_tokens=max_tokens, temperature=0.0)
+        
+        workers = min(max_concurrency, len(prompts))
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            # Each worker runs in a copy of the caller's context (usage attribution)
+            futures = [pool.submit(contextvars.copy_context().run, call, prompt) for prompt in prompts]
+            # Calls queue behind the pool, so allow `timeout` per wave of calls
+            wait(futures, timeout=timeout * math.ceil(len(prompts) / workers))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        answers = []
+        for future in futures:
+            if not future.done() or future.cancelled():
+                answers.append(None)  # timed out
+                continue
+            try:
+                answers.append(future.result())
+            except LLMError:
+                answers.append(None)
+        if mode == "batch":
+            return self._parse_batch_scores(answers[0], fallback) if answers[0] is not None else fallback
+        
+        scores = list(fallback)
+        for i, answer in enumerate(answers):
+            try:
+                scores[i] = max(0.0, min(100.0, float(answer.strip())))
+            except (AttributeError, ValueError):
+                pass
+        return scores
+    
+    async def ascore_many(self,
+                          query: str,
+                          documents: List[str],
+                          vector_scores: Optional[List[float]] = None,
+                          mode: str = RERANKING_CONFIG["score_mode"],
+                          timeout: float = RERANKING_CONFIG["score_timeout"],
+                          max_concurrency: int = RERANKING_CONFIG["score_concurrency"]) -> List[float]:
+        """Async score_many(); same arguments and result"""
+        with usage_context(caller="score"):
+            return await self._ascore_many(query, documents, vector_scores, mode, timeout, max_concurrency)
+    
+    async def _ascore_many(self,
+                           query: str,
+                           documents: List[str],
+                           vector_scores: Optional[List[float]],
+                           mode: str,
+                           timeout: float,
+                           max_concurrency: int) -> List[float]:
+        fallback = list(vector_scores) if vector_scores is not None else [50.0] * len(documents)
+        if not documents:
+            return []
+        
+        if mode == "batch":
+            try:
+                response = await asyncio.wait_for(
+                    self.llm.agenerate(self._batch_prompt(query, documents),
+                                       max_tokens=6 * len(documents) + 10, temperature=0.0),
+                    timeout
+                )
+                return self._parse_batch_scores(response, fallback)
+            except (LLMError, asyncio.TimeoutError):
+                return fallback
+        
+        if mode != "concurrent":
+            raise ValueError(f"Unknown scoring mode '{mode}'")
+        
+        slots = asyncio.Semaphore(max_concurrency)
+        
+        async def score_one(i: int) -> float:
+            async with slots:
+                try:
+                    response = await asyncio.wait_for(
+                        self.llm.agenerate(self._relevance_prompt(query, documents[i]),
+                                           max_tokens=10, temperature=0.0),
+                        timeout
+                    )
+                    return max(0.0, min(100.0, float(response.strip())))
+                except (LLMError, ValueError, asyncio.TimeoutError):
+                    return fallback[i]
+        
+        return list(await asyncio.gather(*(score_one(i) for i in range(len(documents)))))
+    
+    @staticmethod
+    def _parse_batch_scores(response: str, fallback: List[float]) -> List[float]:
+        """Scores from a JSON list answer; unusable entries keep their fallback"""
+        match = re.search(r"\[.*?\]", response, re.DOTALL)
+        try:
+            values = json.loads(match.group(0)) if match else []
+        except ValueError:
+            values = []
+        if not isinstance(values, list):
+            values = []
+        
+        scores = list(fallback)
+        for i, value in enumerate(values[:len(scores)]):
+            try:
+                scores[i] = max(0.0, min(100.0, float(value)))
+            except (TypeError, ValueError):
+                pass
+        return scores
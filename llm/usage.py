@@ -0,0 +1,211 @@
+"""
+LLM Usage Accounting
+Per-call tokens, timing and cost, attributed to the caller, user and role
+of the request through context variables, and aggregated in memory
+"""
+
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from .config import MODEL_PRICES
+
+# Set per request/component with usage_context(); read by LLMEngine
+_caller: contextvars.ContextVar[str] = contextvars.ContextVar("llm_caller", default="answer")
+_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_user", default=None)
+_role: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_role", default=None)
+# Records of the current request, when a caller wants its own totals
+_request_records: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = \
+    contextvars.ContextVar("llm_request_records", default=None)
+
+
+@contextmanager
+def usage_context(caller: Optional[str] = None,
+                  user: Optional[str] = None,
+                  role: Optional[str] = None,
+                  collect: bool = False) -> Iterator[Optional[List[Dict[str, Any]]]]:
+    """
+    Attribute LLM calls made inside the block
+
+    Args:
+        caller: Component tag (answer, rerank, score, ...); unchanged if None
+        user: Username; unchanged if None
+        role: User role; unchanged if None
+        collect: Also collect this block's records into the yielded list
+
+    Yields:
+        The list of records made in the block if collect, else None
+    """
+    tokens = []
+    if caller is not None:
+        tokens.append((_caller, _caller.set(caller)))
+    if user is not None:
+        tokens.append((_user, _user.set(user)))
+    if role is not None:
+        tokens.append((_role, _role.set(role)))
+    records: Optional[List[Dict[str, Any]]] = [] if collect else None
+    if collect:
+        tokens.append((_request_records, _request_records.set(records)))
+    try:
+        yield records
+    finally:
+        for var, token in reversed(tokens):
+            try:
+                var.reset(token)
+            except ValueError:
+                pass  # exited in another context, e.g. an async generator finalized elsewhere
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the API reports none"""
+    return math.ceil(len(text or "") / 4)
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost from MODEL_PRICES (per million prompt/completion tokens); 0 if unpriced"""
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals over a list of usage records"""
+    return {
+        "calls": len(records),
+        "errors": sum(1 for r in records if not r["ok"]),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+        "completion_tokens": sum(r["completion_tokens"] for r in records),
+        "cached_tokens": sum(r["cached_tokens"] for r in records),
+        "cost": round(sum(r["cost"] for r in records), 6),
+        "latency": round(sum(r["latency"] for r in records), 3),
+    }
+
+
+def _quantile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(q * len(values)), len(values) - 1)], 3)
+
+
+class UsageAggregator:
+    """
+    Thread-safe in-memory totals of LLM calls
+
+    Keeps running totals per model, caller, user and role, and the most
+    recent `window` records for latency percentiles.
+    """
+
+    DIMENSIONS = ("model", "caller", "user", "role")
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=window)
+        self._totals: Dict[str, Dict[str, Dict[str, float]]] = {d: {} for d in self.DIMENSIONS}
+        self.started_at = time.time()
+
+    def record(self,
+               model: str,
+               prompt_tokens: int,
+               completion_tokens: int,
+               ttfb: Optional[float],
+               latency: float,
+               ok: bool = True,
+               cost: Optional[float] = None,
+               streamed: bool = False,
+               cached_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Record one LLM call; caller, user and role come from usage_context()
+
+        Args:
+            model: Model id the call was sent to
+            prompt_tokens: Prompt tokens (reported or estimated)
+            completion_tokens: Completion tokens (reported or estimated)
+            ttfb: Seconds to the response headers, or to the first token of a stream
+            latency: Seconds for the whole call, retries included
+            ok: False if the call raised
+            cost: USD cost reported by the API (default: from MODEL_PRICES)
+            streamed: Whether the answer was streamed
+            cached_tokens: Prompt tokens the provider served from its prompt cache
+
+        Returns:
+            The stored record
+        """
+        record = {
+            "timestamp": time.time(),
+            "model": model,
+            "caller": _caller.get(),
+            "user": _user.get() or "-",
+            "role": _role.get() or "-",
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "ttfb": ttfb,
+            "latency": latency,
+            "ok": ok,
+            "cost": cost if cost is not None else call_cost(model, prompt_tokens, completion_tokens),
+            "streamed": streamed,
+            "cached_tokens": cached_tokens,
+        }
+        with self._lock:
+            self._recent.append(record)
+            for dimension in self.DIMENSIONS:
+                totals = self._totals[dimension].setdefault(record[dimension], {
+                    "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                    "cached_tokens": 0, "cost": 0.0, "latency": 0.0,
+                })
+                totals["calls"] += 1
+                totals["errors"] += 0 if ok else 1
+                totals["prompt_tokens"] += prompt_tokens
+                totals["completion_tokens"] += completion_tokens
+                totals["cached_tokens"] += cached_tokens
+                totals["cost"] += record["cost"]
+                totals["latency"] += latency
+
+        collected = _request_records.get()
+        if collected is not None:
+            collected.append(record)
+        return record
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Totals and recent latency percentiles
+
+        Returns:
+            {"since", "recent": {...}, "by_model", "by_caller", "by_user",
+            "by_role"}; each total has calls, errors, tokens, cost and mean
+            latency
+        """
+        with self._lock:
+            recent = list(self._recent)
+            totals = {d: {k: dict(v) for k, v in t.items()} for d, t in self._totals.items()}
+
+        result: Dict[str, Any] = {"since": self.started_at}
+        latencies = [r["latency"] for r in recent if r["ok"]]
+        ttfbs = [r["ttfb"] for r in recent if r["ok"] and r["ttfb"] is not None]
+        result["recent"] = {
+            "calls": len(recent),
+            "latency_p50": _quantile(latencies, 0.50),
+            "latency_p95": _quantile(latencies, 0.95),
+            "latency_p99": _quantile(latencies, 0.99),
+            "ttfb_p50": _quantile(ttfbs, 0.50),
+            "ttfb_p95": _quantile(ttfbs, 0.95),
+        }
+        for dimension, groups in totals.items():
+            for entry in groups.values():
+                entry["mean_latency"] = round(entry.pop("latency") / entry["calls"], 3) if entry["calls"] else None
+                entry["cost"] = round(entry["cost"], 6)
+            result[f"by_{dimension}"] = groups
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._totals = {d: {} for d in self.DIMENSIONS}
+            self.started_at = time.time()
+
+
+# Process-wide aggregator used by LLMEngine
+usage_aggregator = UsageAggregator()
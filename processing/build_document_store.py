@@ -0,0 +1,158 @@
+"""Move chunk texts out of ChromaDB into the compressed document store
+
+Writes vectorstore/docstore from the texts in company_documents. With
+--strip, every company_documents* collection (main, department shards,
+reduced-dimension copies) is rebuilt without documents so the vector index
+holds ids, embeddings and metadata only. Each stripped copy is built under a
+temporary name with the original HNSW configuration and only then swapped
+in, so a failed run leaves the original collection intact.
+
+Usage:
+    python processing/build_document_store.py
+    python processing/build_document_store.py --strip
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from chromadb.config import Settings
+
+from vectordatabase.document_store import DocumentStore, DEFAULT_BLOCK_SIZE
+from llm.completion_cache import invalidate_cached_answers
+
+# Get the directory of the current script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+persist_dir = os.path.join(script_dir, "..", "vectorstore", "chroma")
+docstore_dir = os.path.join(script_dir, "..", "vectorstore", "docstore")
+COLLECTION_NAME = "company_documents"
+PAGE_SIZE = 1000
+
+# Suffixes of the temporary collections used while swapping in a stripped copy
+BUILDING_SUFFIX = "__stripped"
+RETIRED_SUFFIX = "__retired"
+
+
+def read_collection(collection, include):
+    """Page through a collection and return ids plus the included fields"""
+    data = {"ids": [], **{field: [] for field in include}}
+    offset = 0
+    while True:
+        page = collection.get(include=include, limit=PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            break
+        data["ids"].extend(page["ids"])
+        for field in include:
+            data[field].extend(page[field])
+        offset += len(page["ids"])
+    return data
+
+
+def changed_chunk_ids(store_dir: str, ids, documents) -> list:
+    """Ids whose text in an existing document store differs from the new text, or that were removed"""
+    if not os.path.exists(os.path.join(store_dir, "index.json")):
+        return []
+    previous = DocumentStore(store_dir)
+    try:
+        current = set(ids)
+        changed = [chunk_id for chunk_id, doc in zip(ids, documents)
+                   if chunk_id in previous and previous.get(chunk_id) != (doc or "")]
+        changed += [chunk_id for chunk_id in previous.entries if chunk_id not in current]
+    finally:
+        previous.close()
+    return changed
+
+
+def _drop(client, name: str):
+    """Delete a collection if it exists"""
+    if name in {c.name for c in client.list_collections()}:
+        client.delete_collection(name=name)
+
+
+def hnsw_configuration(collection) -> dict:
+    """HNSW settings of a collection (space, M, ef values, ...) to create a copy with"""
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    return {"hnsw": {key: value for key, value in hnsw.items() if value is not None}}
+
+
+def strip_documents(client, name: str):
+    """
+    Replace a collection with a copy holding the same ids, vectors, metadata
+    and HNSW configuration but no texts
+
+    The copy is filled under a temporary name; the original is renamed away
+    and deleted only after the copy is complete.
+    """
+    collection = client.get_collection(name=name)
+    data = read_collection(collection, ["embeddings", "metadatas"])
+
+    building = name + BUILDING_SUFFIX
+    _drop(client, building)
+    stripped = client.create_collection(
+        name=building, metadata=collection.metadata, configuration=hnsw_configuration(collection)
+    )
+    for start in range(0, len(data["ids"]), PAGE_SIZE):
+        end = start + PAGE_SIZE
+        stripped.add(
+            ids=data["ids"][start:end],
+            embeddings=data["embeddings"][start:end],
+            metadatas=data["metadatas"][start:end]
+        )
+    if stripped.count() != len(data["ids"]):
+        raise RuntimeError(f"Stripped copy of '{name}' holds {stripped.count()} of {len(data['ids'])} vectors")
+
+    retired = name + RETIRED_SUFFIX
+    _drop(client, retired)
+    collection.modify(name=retired)
+    stripped.modify(name=name)
+    client.delete_collection(name=retired)
+    print(f"   ✓ {name}: {stripped.count()} vectors, texts removed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the compressed document store")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="Chunks per compressed block")
+    parser.add_argument("--strip", action="store_true", help="Remove texts from the Chroma collections")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(
+        path=persist_dir,
+        settings=Settings(
+            anonymized_telemetry=False,
+            allow_reset=False
+        )
+    )
+    collection = client.get_collection(name=COLLECTION_NAME)
+
+    print(f"🔄 Reading {collection.count()} chunk texts from ChromaDB...")
+    data = read_collection(collection, ["documents"])
+    if data["ids"] and not any(data["documents"]):
+        print("❌ Collection holds no texts (already stripped?). Re-run the indexers first.")
+        sys.exit(1)
+
+    changed = changed_chunk_ids(docstore_dir, data["ids"], data["documents"])
+    store = DocumentStore.build(docstore_dir, data["ids"], data["documents"], block_size=args.block_size)
+    if changed:
+        removed = invalidate_cached_answers(changed)
+        print(f"🧹 {len(changed)} texts changed since the last build; dropped {removed} cached answers")
+    raw_bytes = sum(len((doc or "").encode("utf-8")) for doc in data["documents"])
+    print(f"✓ {len(store)} texts, {raw_bytes / 1024:.1f} KB -> {store.size_bytes() / 1024:.1f} KB ({store.codec})")
+
+    if args.strip:
+        print("\n🔄 Removing texts from the vector index...")
+        for existing in client.list_collections():
+            if existing.name.startswith(COLLECTION_NAME) and not existing.name.endswith(
+                    (BUILDING_SUFFIX, RETIRED_SUFFIX)):
+                strip_documents(client, existing.name)
+
+    print(f"\n✅ Document store written to {os.path.abspath(docstore_dir)}")
+    print("📝 Enable with QueryEngine(document_store=True) or VECTOR_DOCUMENT_STORE=1")
+
+
+if __name__ == "__main__":
+    main()
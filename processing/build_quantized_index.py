@@ -0,0 +1,59 @@
+"""Build int8 / binary quantized serving indexes from the ChromaDB collection"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from chromadb.config import Settings
+
+from vectordatabase.quantized_index import QuantizedIndex, QUANTIZATION_MODES
+
+# Get the directory of the current script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+persist_dir = os.path.join(script_dir, "..", "vectorstore", "chroma")
+quantized_dir = os.path.join(script_dir, "..", "vectorstore", "quantized")
+PAGE_SIZE = 1000
+
+client = chromadb.PersistentClient(
+    path=persist_dir,
+    settings=Settings(
+        anonymized_telemetry=False,
+        allow_reset=False
+    )
+)
+collection = client.get_collection(name="company_documents")
+
+# Pull all vectors and metadata in pages
+print(f"🔄 Reading {collection.count()} vectors from ChromaDB...")
+ids, embeddings, metadatas = [], [], []
+offset = 0
+while True:
+    page = collection.get(include=["embeddings", "metadatas"], limit=PAGE_SIZE, offset=offset)
+    if not page["ids"]:
+        break
+    ids.extend(page["ids"])
+    embeddings.extend(page["embeddings"])
+    metadatas.extend(page["metadatas"])
+    offset += len(page["ids"])
+
+modes = sys.argv[1:] or list(QUANTIZATION_MODES)
+
+for mode in modes:
+    index = QuantizedIndex.build(
+        os.path.join(quantized_dir, mode),
+        ids=ids,
+        embeddings=embeddings,
+        metadatas=metadatas,
+        mode=mode
+    )
+    sizes = index.memory_bytes()
+    ratio = sizes["full_precision"] / sizes["codes"]
+    print(f"✓ {mode}: {index.count} vectors, codes {sizes['codes'] / 1024:.1f} KB "
+          f"vs {sizes['full_precision'] / 1024:.1f} KB full precision ({ratio:.0f}x smaller)")
+
+print(f"\n✅ Quantized indexes written to {os.path.abspath(quantized_dir)}")
+print("📝 Enable with QueryEngine(quantization='int8') or QueryEngine(quantization='binary')")
@@ -0,0 +1,153 @@
+"""Per-role projections of HR employee records
+
+Each employee record is rendered once per projection at ingestion time. A
+projection lists the fields it may show and the department whose roles may
+read it, so redaction happens before indexing instead of per request:
+
+- full:      every field, HR department (hr, admin)
+- directory: name, title, team, contact, location, joining date, manager;
+             no salary, date of birth, performance or leave data. Filed under
+             the general department so every employee can look people up.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+HR_SOURCE_DOCUMENT = "hr_data.csv"
+
+# Metadata kept on HR chunks besides the chunk schema; links the projections of one record
+HR_RECORD_KEYS = ("projection", "employee_id", "employee_name", "employee_role", "employee_dept")
+
+# Field label per CSV column, in display order
+HR_FIELD_LABELS = {
+    "full_name": "Full Name",
+    "employee_id": "Employee ID",
+    "role": "Role",
+    "department": "Department",
+    "email": "Email",
+    "location": "Location",
+    "date_of_birth": "Date of Birth",
+    "date_of_joining": "Date of Joining",
+    "manager_id": "Manager ID",
+    "salary": "Salary",
+    "leave_balance": "Leave Balance",
+    "leaves_taken": "Leaves Taken",
+    "attendance_pct": "Attendance",
+    "performance_rating": "Performance Rating",
+    "last_review_date": "Last Review Date",
+}
+
+HR_PROJECTIONS: Dict[str, Dict[str, Any]] = {
+    "full": {
+        "department": "hr",
+        "heading": "Employee Information",
+        "fields": list(HR_FIELD_LABELS),
+    },
+    "directory": {
+        "department": "general",
+        "heading": "Employee Directory Entry",
+        "fields": [
+            "full_name", "employee_id", "role", "department",
+            "email", "location", "date_of_joining", "manager_id",
+        ],
+    },
+}
+
+
+def _format_value(field: str, value: Any) -> str:
+    if field == "salary":
+        return f"₹{value:,.2f}"
+    if field in ("leave_balance", "leaves_taken"):
+        return f"{value} days"
+    if field == "attendance_pct":
+        return f"{value}%"
+    if field == "performance_rating":
+        return f"{value}/5"
+    return str(value)
+
+
+def render_projection(row: Dict[str, Any], projection: str) -> str:
+    """
+    Render one employee record with only the projection's fields
+
+    Args:
+        row: Employee record (CSV row)
+        projection: Key of HR_PROJECTIONS
+
+    Returns:
+        Chunk text
+    """
+    spec = HR_PROJECTIONS[projection]
+    fields = spec["fields"]
+    lines = [f"{spec['heading']}:"]
+    lines += [f"{HR_FIELD_LABELS[field]}: {_format_value(field, row[field])}" for field in fields]
+
+    summary = (
+        f"This employee {row['full_name']} works as a {row['role']} in the {row['department']} "
+        f"department, located in {row['location']}. They joined the company on "
+        f"{row['date_of_joining']} and report to manager {row['manager_id']}."
+    )
+    if "performance_rating" in fields:
+        summary += f" Their current performance rating is {row['performance_rating']} out of 5."
+
+    return "\n".join(lines) + "\n\n" + summary
+
+
+def project_record(row: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Build one chunk per projection for an employee record
+
+    Chunks of the same record share an id stem derived from the employee
+    id: hr_<employee_id> for the full record and hr_<employee_id>_<projection>
+    for the others, so re-indexing overwrites instead of duplicating.
+
+    Returns:
+        Chunks in the chunked_markdown.json format
+    """
+    stem = f"hr_{row['employee_id']}"
+    chunks = []
+    for projection, spec in HR_PROJECTIONS.items():
+        text = render_projection(row, projection)
+        chunks.append({
+            "chunk_id": stem if projection == "full" else f"{stem}_{projection}",
+            "text": text,
+            "metadata": {
+                "source_document": HR_SOURCE_DOCUMENT,
+                "section_title": f"Employee: {row['full_name']} ({row['employee_id']})",
+                "department": spec["department"],
+                "token_length": len(text),
+                "projection": projection,
+                "employee_id": row['employee_id'],
+                "employee_name": row['full_name'],
+                "employee_role": row['role'],
+                "employee_dept": row['department']
+            }
+        })
+    return chunks
+
+
+def replace_hr_chunks(collection,
+                      ids: Sequence[str],
+                      documents: Sequence[str],
+                      embeddings: Sequence[Sequence[float]],
+                      metadatas: Sequence[Dict[str, Any]]) -> List[str]:
+    """
+    Replace every HR chunk in a collection with the given ones
+
+    HR chunks left by an earlier run (older id schemes, employees no longer
+    in the CSV, records indexed before projections existed) are deleted, so
+    no stale copy of a full record stays readable next to its projections.
+
+    Args:
+        collection: Chroma collection
+        ids, documents, embeddings, metadatas: New HR chunks
+
+    Returns:
+        Ids removed or written, for invalidating cached answers
+    """
+    stale = collection.get(where={"source_document": HR_SOURCE_DOCUMENT}, include=[])["ids"]
+    removed = sorted(set(stale) - set(ids))
+    if removed:
+        collection.delete(ids=removed)
+    collection.upsert(ids=list(ids), documents=list(documents), embeddings=list(embeddings),
+                      metadatas=list(metadatas))
+    return removed + list(ids)
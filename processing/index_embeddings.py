@@ -1,9 +1,17 @@
 import json
 import os
+import sys
 from sentence_transformers import SentenceTransformer
 import chromadb
 from chromadb.config import Settings
 
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vectordatabase.chroma_client import get_or_create_tuned_collection
+from vectordatabase.metadata_schema import chunk_metadata
+from llm.completion_cache import invalidate_cached_answers
+
 # Get the directory of the current script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -26,10 +34,7 @@ client = chromadb.PersistentClient(
     )
 )
 
-collection = client.get_or_create_collection(
-    name="company_documents",
-    metadata={"hnsw:space": "cosine"}
-)
+collection = get_or_create_tuned_collection(client, "company_documents")
 
 # Prepare data for insertion (excluding finance)
 documents = []
@@ -46,20 +51,13 @@ for chunk in chunks:
     
     # Create comprehensive metadata
     meta = chunk["metadata"]
-    metadatas.append({
-        "chunk_id": chunk["chunk_id"],
-        "source_document": meta["source_document"],
-        "department": meta["department"],
-        "section_title": meta["section_title"],
-        "allowed_roles": ",".join(meta["allowed_roles"]),
-        "token_length": str(meta["token_length"]),
-        "role_finance": "finance" in meta["allowed_roles"],
-        "role_engineering": "engineering" in meta["allowed_roles"],
-        "role_marketing": "marketing" in meta["allowed_roles"],
-        "role_hr": "hr" in meta["allowed_roles"],
-        "role_general": "general" in meta["allowed_roles"] or "employee" in meta["allowed_roles"],
-        "role_admin": "admin" in meta["allowed_roles"]
-    })
+    metadatas.append(chunk_metadata(
+        chunk_id=chunk["chunk_id"],
+        source_document=meta["source_document"],
+        department=meta["department"],
+        section_title=meta["section_title"],
+        token_length=meta["token_length"]
+    ))
     
     # Use pre-computed embeddings from embedded_chunks.json
     embeddings.append(chunk["embedding"])
@@ -78,6 +76,9 @@ collection.add(
     ids=ids
 )
 
+removed = invalidate_cached_answers(ids)
+print(f"🧹 Dropped {removed} cached answers built from these chunks")
+
 print(f"\n✅ Embeddings indexed successfully!")
 print(f"📦 Total vectors in collection: {collection.count()}")
 
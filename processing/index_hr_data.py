@@ -11,6 +11,11 @@ try:
     from sentence_transformers import SentenceTransformer
     import chromadb
     from chromadb.config import Settings
+    from vectordatabase.chroma_client import get_or_create_tuned_collection
+    from vectordatabase.metadata_schema import chunk_metadata
+    from llm.completion_cache import invalidate_cached_answers
+    from processing.hr_projections import HR_RECORD_KEYS, replace_hr_chunks
+    from rbac.department_access import DepartmentAccess
 except ImportError as e:
     print(f"❌ Import error: {e}")
     print("Please ensure sentence-transformers and chromadb are installed")
@@ -71,10 +76,7 @@ client = chromadb.PersistentClient(
     )
 )
 
-collection = client.get_or_create_collection(
-    name="company_documents",
-    metadata={"hnsw:space": "cosine"}
-)
+collection = get_or_create_tuned_collection(client, "company_documents")
 
 print(f"✓ Current collection size: {collection.count()} vectors")
 
@@ -89,31 +91,26 @@ for chunk in embedded_hr_chunks:
     ids.append(chunk["chunk_id"])
     embeddings.append(chunk["embedding"])
     
-    # Create metadata with role flags
+    # Create metadata (access follows the department)
     meta = chunk["metadata"]
-    metadatas.append({
-        "chunk_id": chunk["chunk_id"],
-        "source_document": meta["source_document"],
-        "department": meta["department"],
-        "section_title": meta["section_title"],
-        "allowed_roles": ",".join(meta["allowed_roles"]),
-        "token_length": str(meta["token_length"]),
-        "role_finance": False,
-        "role_engineering": False,
-        "role_marketing": False,
-        "role_hr": True,
-        "role_general": False,
-        "role_admin": True
-    })
+    record_meta = chunk_metadata(
+        chunk_id=chunk["chunk_id"],
+        source_document=meta["source_document"],
+        department=meta["department"],
+        section_title=meta["section_title"],
+        token_length=meta["token_length"]
+    )
+    # Projection and employee keys link the projections of one record
+    record_meta.update({key: meta[key] for key in HR_RECORD_KEYS if key in meta})
+    metadatas.append(record_meta)
 
-# Add to ChromaDB
-print(f"\n🔄 Adding {len(documents)} HR vectors to ChromaDB...")
-collection.add(
-    documents=documents,
-    embeddings=embeddings,
-    metadatas=metadatas,
-    ids=ids
-)
+# Replace the HR chunks in ChromaDB (stale ones from earlier runs are deleted)
+print(f"\n🔄 Writing {len(documents)} HR vectors to ChromaDB...")
+changed_ids = replace_hr_chunks(collection, ids, documents, embeddings, metadatas)
+print(f"✓ Replaced HR chunks ({len(changed_ids) - len(ids)} stale chunks deleted)")
+
+removed = invalidate_cached_answers(changed_ids)
+print(f"🧹 Dropped {removed} cached answers built from these chunks")
 
 print(f"\n✅ HR data indexed successfully!")
 print(f"📦 Total vectors in collection: {collection.count()}")
@@ -123,7 +120,7 @@ print(f"\n🧪 Testing HR search...")
 test_results = collection.query(
     query_texts=["Krishna Malhotra employee information"],
     n_results=3,
-    where={"role_hr": True}
+    where=DepartmentAccess.default().where(["hr"])
 )
 
 if test_results["documents"][0]:
@@ -133,6 +130,15 @@ if test_results["documents"][0]:
 else:
     print("⚠ No results found for test query")
 
+# Test the employee-visible directory projection
+test_results = collection.query(
+    query_texts=["Krishna Malhotra email and manager"],
+    n_results=3,
+    where=DepartmentAccess.default().where(["employee"])
+)
+directory_hits = [m for m in test_results["metadatas"][0] if m.get("projection") == "directory"]
+print(f"✓ Employee role sees {len(directory_hits)} directory entries for test query")
+
 # Show department breakdown
 print(f"\n📊 Verifying department distribution:")
 all_data = collection.get()
@@ -1,13 +1,22 @@
 """Process HR CSV data and add to vector store"""
 
 import json
-import uuid
 import os
+import sys
 import pandas as pd
 from sentence_transformers import SentenceTransformer
 import chromadb
 from chromadb.config import Settings
 
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vectordatabase.chroma_client import get_or_create_tuned_collection
+from vectordatabase.metadata_schema import chunk_metadata
+from llm.completion_cache import invalidate_cached_answers
+from processing.hr_projections import HR_RECORD_KEYS, project_record, replace_hr_chunks
+from rbac.department_access import DepartmentAccess
+
 # Get the directory of the current script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -35,10 +44,7 @@ client = chromadb.PersistentClient(
     )
 )
 
-collection = client.get_or_create_collection(
-    name="company_documents",
-    metadata={"hnsw:space": "cosine"}
-)
+collection = get_or_create_tuned_collection(client, "company_documents")
 
 print(f"\n📊 Current collection size: {collection.count()} vectors")
 
@@ -51,65 +57,34 @@ embeddings = []
 print(f"\n🔄 Processing {len(df)} employee records...")
 
 for idx, row in df.iterrows():
-    # Create a comprehensive text representation of each employee
-    employee_text = f"""Employee Information:
-Full Name: {row['full_name']}
-Employee ID: {row['employee_id']}
-Role: {row['role']}
-Department: {row['department']}
-Email: {row['email']}
-Location: {row['location']}
-Date of Birth: {row['date_of_birth']}
-Date of Joining: {row['date_of_joining']}
-Manager ID: {row['manager_id']}
-Salary: {row['salary']}
-Leave Balance: {row['leave_balance']} days
-Leaves Taken: {row['leaves_taken']} days
-Attendance: {row['attendance_pct']}%
-Performance Rating: {row['performance_rating']}/5
-Last Review Date: {row['last_review_date']}"""
-
-    # Generate embedding
-    embedding = model.encode(employee_text, normalize_embeddings=True).tolist()
-    
-    # Create metadata
-    chunk_id = f"hr_{uuid.uuid4().hex[:8]}"
-    
-    metadata = {
-        "chunk_id": chunk_id,
-        "source_document": "hr_data.csv",
-        "department": "hr",
-        "section_title": f"Employee: {row['full_name']}",
-        "allowed_roles": "hr,admin",
-        "token_length": str(len(employee_text)),
-        "role_finance": False,
-        "role_engineering": False,
-        "role_marketing": False,
-        "role_hr": True,
-        "role_general": False,
-        "role_admin": True,
-        "employee_id": row['employee_id'],
-        "employee_name": row['full_name'],
-        "employee_role": row['role'],
-        "employee_dept": row['department']
-    }
-    
-    documents.append(employee_text)
-    metadatas.append(metadata)
-    ids.append(chunk_id)
-    embeddings.append(embedding)
+    # One chunk per role projection (full HR record, redacted directory entry)
+    for chunk in project_record(row):
+        meta = chunk["metadata"]
+        metadata = chunk_metadata(
+            chunk_id=chunk["chunk_id"],
+            source_document=meta["source_document"],
+            department=meta["department"],
+            section_title=meta["section_title"],
+            token_length=meta["token_length"]
+        )
+        metadata.update({key: meta[key] for key in HR_RECORD_KEYS})
+        
+        documents.append(chunk["text"])
+        metadatas.append(metadata)
+        ids.append(chunk["chunk_id"])
+        # Generate embedding
+        embeddings.append(model.encode(chunk["text"], normalize_embeddings=True).tolist())
     
     if (idx + 1) % 20 == 0:
         print(f"  ⏳ Processed {idx + 1}/{len(df)} employees...")
 
-# Add to ChromaDB
-print(f"\n🔄 Adding {len(documents)} HR records to vector store...")
-collection.add(
-    documents=documents,
-    embeddings=embeddings,
-    metadatas=metadatas,
-    ids=ids
-)
+# Replace the HR chunks in ChromaDB (stale ones from earlier runs are deleted)
+print(f"\n🔄 Writing {len(documents)} HR records to vector store...")
+changed_ids = replace_hr_chunks(collection, ids, documents, embeddings, metadatas)
+print(f"✓ Replaced HR chunks ({len(changed_ids) - len(ids)} stale chunks deleted)")
+
+removed = invalidate_cached_answers(changed_ids)
+print(f"🧹 Dropped {removed} cached answers built from these chunks")
 
 print(f"\n✅ HR data indexed successfully!")
 print(f"📦 Total vectors in collection: {collection.count()}")
@@ -119,7 +94,7 @@ print(f"\n🧪 Testing HR search...")
 test_results = collection.query(
     query_texts=["Krishna Malhotra employee information"],
     n_results=3,
-    where={"role_hr": True}
+    where=DepartmentAccess.default().where(["hr"])
 )
 
 if test_results["documents"][0]:
@@ -0,0 +1,74 @@
+"""Fit a PCA projection on corpus embeddings and index reduced vectors
+
+Usage:
+    python processing/reduce_embeddings.py            # 128 and 192 dims
+    python processing/reduce_embeddings.py 96 128
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from chromadb.config import Settings
+
+from vectordatabase.chroma_client import collection_metadata
+from vectordatabase.projection import PCAProjection, projection_path, reduced_collection_name
+
+# Get the directory of the current script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+persist_dir = os.path.join(script_dir, "..", "vectorstore", "chroma")
+COLLECTION_NAME = "company_documents"
+DEFAULT_DIMS = [128, 192]
+BATCH_SIZE = 1000
+
+client = chromadb.PersistentClient(
+    path=persist_dir,
+    settings=Settings(
+        anonymized_telemetry=False,
+        allow_reset=False
+    )
+)
+source = client.get_collection(name=COLLECTION_NAME)
+
+# Pull the full-precision corpus
+print(f"🔄 Reading {source.count()} vectors from '{COLLECTION_NAME}'...")
+data = source.get(include=["embeddings", "documents", "metadatas"])
+print(f"✓ Loaded {len(data['ids'])} vectors ({len(data['embeddings'][0])}-d)")
+
+dims = [int(d) for d in sys.argv[1:]] or DEFAULT_DIMS
+
+for dim in dims:
+    print(f"\n🔄 Fitting PCA to {dim} dimensions...")
+    projection = PCAProjection.fit(data["embeddings"], dim)
+    out_path = projection_path(persist_dir, dim)
+    os.makedirs(out_path.parent, exist_ok=True)
+    projection.save(out_path)
+    print(f"✓ Explained variance: {projection.explained_variance:.1%} → {out_path.name}")
+
+    reduced = projection.transform(data["embeddings"]).tolist()
+
+    # Rebuild the parallel collection from scratch so reruns never duplicate
+    name = reduced_collection_name(COLLECTION_NAME, dim)
+    try:
+        client.delete_collection(name=name)
+    except Exception:
+        pass
+    target = client.get_or_create_collection(name=name, metadata=collection_metadata())
+
+    for start in range(0, len(data["ids"]), BATCH_SIZE):
+        end = start + BATCH_SIZE
+        target.add(
+            ids=data["ids"][start:end],
+            embeddings=reduced[start:end],
+            documents=data["documents"][start:end],
+            metadatas=data["metadatas"][start:end]
+        )
+    print(f"✓ Indexed {target.count()} reduced vectors into '{name}'")
+
+print(f"\n✅ Reduced indexes ready")
+print("📝 Opt in with QueryEngine(reduced_dim=128) after checking recall in report/DIMENSIONS.md "
+      "(off by default: recall@1 is ~0.90 at 128-192 dims)")
@@ -0,0 +1,84 @@
+"""Split company_documents into per-department shard collections
+
+Each department (engineering, finance, marketing, general, hr) gets its own
+collection named company_documents_<department>. Pass department names to
+rebuild only those shards and leave the others untouched.
+
+Shards are derived copies: the indexers only write company_documents, so
+re-run this after every reindex. QueryEngine(sharded=True) compares each
+shard's size with its department's chunks in company_documents at startup
+and searches the single collection instead while any shard is stale.
+
+Usage:
+    python processing/shard_collections.py              # all departments
+    python processing/shard_collections.py finance      # rebuild one shard
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from chromadb.config import Settings
+
+from rbac.department_access import DEPARTMENT_ROLE_MAP
+from vectordatabase.chroma_client import collection_metadata
+from vectordatabase.shards import SOURCE_COLLECTION, shard_collection_name
+
+# Get the directory of the current script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+persist_dir = os.path.join(script_dir, "..", "vectorstore", "chroma")
+COLLECTION_NAME = SOURCE_COLLECTION
+BATCH_SIZE = 1000
+
+
+def main():
+    departments = sys.argv[1:] or list(DEPARTMENT_ROLE_MAP.keys())
+    unknown = [d for d in departments if d not in DEPARTMENT_ROLE_MAP]
+    if unknown:
+        print(f"❌ Unknown departments: {', '.join(unknown)}")
+        sys.exit(1)
+
+    client = chromadb.PersistentClient(
+        path=persist_dir,
+        settings=Settings(
+            anonymized_telemetry=False,
+            allow_reset=False
+        )
+    )
+    source = client.get_collection(name=COLLECTION_NAME)
+    print(f"📦 Source collection '{COLLECTION_NAME}': {source.count()} vectors")
+
+    for department in departments:
+        data = source.get(
+            where={"department": department},
+            include=["embeddings", "documents", "metadatas"]
+        )
+
+        # Rebuild the shard from scratch so reruns never duplicate
+        name = shard_collection_name(department)
+        try:
+            client.delete_collection(name=name)
+        except Exception:
+            pass
+        shard = client.get_or_create_collection(name=name, metadata=collection_metadata())
+
+        for start in range(0, len(data["ids"]), BATCH_SIZE):
+            end = start + BATCH_SIZE
+            shard.add(
+                ids=data["ids"][start:end],
+                embeddings=data["embeddings"][start:end],
+                documents=data["documents"][start:end],
+                metadatas=data["metadatas"][start:end]
+            )
+        print(f"   ✓ {name}: {shard.count()} vectors")
+
+    print(f"\n✅ Department shards ready")
+    print("📝 Enable with QueryEngine(sharded=True) or VECTOR_SHARDED=1")
+
+
+if __name__ == "__main__":
+    main()
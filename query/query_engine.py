@@ -1,20 +1,121 @@
 """Query Engine with Semantic Search + RBAC"""
 
+import os
 import re
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import chromadb
 from sentence_transformers import SentenceTransformer
 
+from vectordatabase.chroma_client import get_or_create_tuned_collection
+from vectordatabase.document_store import DocumentStore
+from vectordatabase.quantized_index import QuantizedIndex
+from vectordatabase.projection import PCAProjection, projection_path, reduced_collection_name
+from query.search_service import SearchServiceClient
+from vectordatabase.shards import shard_collection_name, stale_shards
+from rbac.department_access import DEPARTMENT_ROLE_MAP, DepartmentAccess, department_where
+from rbac.rbac_filter import RBACFilter
+
 # Global model cache for faster subsequent queries
 _model_cache: Optional[SentenceTransformer] = None
 
+# One role, a comma-separated string of roles, or a list of roles
+UserRoles = Union[str, Sequence[str]]
+
+# (query, n_results, user_role), plus the departments when the caller has
+# already resolved them from a live access table
+SearchRequest = Union[Tuple[str, int, UserRoles], Tuple[str, int, UserRoles, Sequence[str]]]
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+def serving_options_from_env() -> Dict[str, Any]:
+    """
+    QueryEngine serving options from the environment
+
+    Read when a pipeline or service is built rather than at import time, so
+    a malformed value fails that construction with a clear error.
+
+    Returns:
+        Dict with quantization (VECTOR_QUANTIZATION), reduced_dim
+        (VECTOR_REDUCED_DIM), search_service (SEARCH_SERVICE_SOCKET),
+        sharded (VECTOR_SHARDED) and document_store (VECTOR_DOCUMENT_STORE)
+    """
+    reduced_dim = os.getenv("VECTOR_REDUCED_DIM", "").strip()
+    try:
+        reduced_dim = int(reduced_dim) if reduced_dim else 0
+    except ValueError:
+        raise ValueError(f"VECTOR_REDUCED_DIM must be an integer, got {reduced_dim!r}") from None
+
+    return {
+        "quantization": os.getenv("VECTOR_QUANTIZATION") or None,
+        "reduced_dim": reduced_dim or None,
+        "search_service": os.getenv("SEARCH_SERVICE_SOCKET") or None,
+        "sharded": _env_flag("VECTOR_SHARDED"),
+        "document_store": _env_flag("VECTOR_DOCUMENT_STORE"),
+    }
+
+
 class QueryEngine:
     """Semantic search with RBAC filtering - Optimized for low latency"""
     
-    def __init__(self, vectorstore_path: str = "../vectorstore/chroma"):
+    def __init__(self, vectorstore_path: str = "../vectorstore/chroma",
+                 quantization: Optional[str] = None,
+                 reduced_dim: Optional[int] = None,
+                 search_service: Optional[str] = None,
+                 sharded: bool = False,
+                 document_store: bool = False):
+        """
+        Initialize query engine
+        
+        Args:
+            vectorstore_path: Path to ChromaDB vector store
+            quantization: Serve from a quantized index ('int8' or 'binary')
+                built by processing/build_quantized_index.py
+            reduced_dim: Search the PCA-reduced parallel collection built by
+                processing/reduce_embeddings.py (e.g. 128 or 192). Off by
+                default: recall@1 vs the full index is ~0.90 at 128-192 dims
+            search_service: Unix socket of a running query.search_service; the
+                encoder and index are then shared with other workers instead
+                of being loaded in this process
+            sharded: Scatter-gather over the per-department collections built
+                by processing/shard_collections.py instead of filtering the
+                single collection; falls back to the single collection if a
+                shard's size no longer matches its department's chunks
+            document_store: Read chunk texts from the compressed store built
+                by processing/build_document_store.py; the vector index is
+                then queried for ids, metadata and distances only
+        """
         global _model_cache
         
+        self.rbac = RBACFilter()
+
+        # Role -> departments used when a request brings no resolved departments
+        self.department_access = DepartmentAccess.default()
+
+        if quantization and reduced_dim:
+            raise ValueError("quantization and reduced_dim cannot be combined")
+        if sharded and (quantization or reduced_dim):
+            raise ValueError("sharded search cannot be combined with quantization or reduced_dim")
+
+        # Texts live next to the vector store; cheap to open in every worker
+        self.document_store = None
+        if document_store:
+            self.document_store = DocumentStore(str(Path(vectorstore_path).parent / "docstore"))
+
+        # Client mode: the sidecar process owns the encoder and the index,
+        # so nothing local is loaded and only search() is available
+        self.search_client = None
+        self.client = self.model = self.collection = None
+        self.projection = self.quantized_index = self.shard_pool = None
+        self.shards: Dict[str, Any] = {}
+        if search_service:
+            self.search_client = SearchServiceClient(search_service)
+            return
+        
         # Use PersistentClient for better connection pooling
         self.client = chromadb.PersistentClient(
             path=vectorstore_path
@@ -25,10 +126,39 @@ class QueryEngine:
             _model_cache = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
         self.model = _model_cache
         
-        self.collection = self.client.get_or_create_collection(
-            name="company_documents",
-            metadata={"description": "Company internal docs with RBAC metadata"}
+        self.collection = get_or_create_tuned_collection(
+            self.client, "company_documents", {"description": "Company internal docs with RBAC metadata"}
         )
+
+        # Optional reduced-dimension collection; queries get the same projection
+        if reduced_dim:
+            self.projection = PCAProjection.load(projection_path(vectorstore_path, reduced_dim))
+            self.collection = self.client.get_collection(
+                name=reduced_collection_name("company_documents", reduced_dim)
+            )
+
+        # Optional quantized first-pass index next to the Chroma store
+        if quantization:
+            index_dir = Path(vectorstore_path).parent / "quantized" / quantization
+            self.quantized_index = QuantizedIndex(str(index_dir))
+
+        # Optional per-department shards, searched in parallel. Shards are
+        # copies the indexers don't update, so stale ones disable sharding
+        if sharded:
+            stale = stale_shards(self.client, DEPARTMENT_ROLE_MAP)
+            if stale:
+                print(f"⚠️ Department shards out of date for {', '.join(stale)}; searching the single "
+                      f"collection (rebuild with processing/shard_collections.py)")
+            else:
+                existing = {c.name for c in self.client.list_collections()}
+                for department in DEPARTMENT_ROLE_MAP:
+                    name = shard_collection_name(department)
+                    if name in existing:
+                        self.shards[department] = self.client.get_collection(name=name)
+            if self.shards:
+                self.shard_pool = ThreadPoolExecutor(
+                    max_workers=len(self.shards), thread_name_prefix="shard-search"
+                )
     
     def normalize_query(self, query: str) -> str:
         """Lightly normalize user input to reduce noise."""
@@ -36,27 +166,242 @@ class QueryEngine:
         query = re.sub(r"\s+", " ", query)
         return query
 
-    def search(self, query: str, n_results: int = 5, user_role: str = "employee"):
-        """Search documents with RBAC filtering - Optimized with normalized embeddings"""
-        normalized = self.normalize_query(query)
+    def search(self, query: str, n_results: int = 5, user_role: UserRoles = "employee",
+               include_documents: bool = True, departments: Optional[Sequence[str]] = None):
+        """
+        Search documents with RBAC filtering - Optimized with normalized embeddings
+
+        user_role may hold several roles; their hierarchy-expanded union is
+        searched in a single filtered query. With include_documents=False the
+        results carry no "documents" field; use fetch_documents() for the ids
+        that are actually needed. departments overrides the engine's default
+        role -> department table (e.g. with the backend's live table).
+        """
+        if self.search_client is not None:
+            if not isinstance(user_role, str):
+                user_role = ",".join(user_role)
+            return self.search_client.search(
+                query, n_results=n_results, user_role=user_role,
+                departments=list(departments) if departments is not None else None
+            )
+
+        request = (query, n_results, user_role)
+        if departments is not None:
+            request += (departments,)
+        return self.search_batch([request], include_documents=include_documents)[0]
+
+    def _require_local(self, operation: str):
+        """
+        Raises:
+            RuntimeError: In search service client mode, where there is no
+                local encoder or index
+        """
+        if self.search_client is not None:
+            raise RuntimeError(
+                f"QueryEngine.{operation}() needs a local index; this engine is a client of the "
+                f"search service at {self.search_client.socket_path} and only supports search()"
+            )
+
+    def fetch_documents(self, ids: List[str]) -> List[str]:
+        """
+        Fetch chunk texts by id, in order
+
+        With the document store, chunks indexed after it was built are
+        missing from it and are read from the collection instead.
+        """
+        if not ids:
+            return []
+        text_by_id: Dict[str, str] = {}
+        missing = ids
+        if self.document_store is not None:
+            text_by_id = {chunk_id: self.document_store.get(chunk_id)
+                          for chunk_id in ids if chunk_id in self.document_store}
+            missing = [chunk_id for chunk_id in ids if chunk_id not in text_by_id]
+
+        if missing:
+            self._require_local("fetch_documents")
+            fetched = self.collection.get(ids=missing, include=["documents"])
+            text_by_id.update(zip(fetched["ids"], fetched["documents"]))
+        return [text_by_id.get(chunk_id) or "" for chunk_id in ids]
+
+    def result_documents(self, results: Dict[str, List[List[Any]]], limit: int) -> List[str]:
+        """Texts of the first `limit` results, fetching them if the search skipped them"""
+        if results.get("documents"):
+            return results["documents"][0][:limit]
+        return self.fetch_documents(results["ids"][0][:limit])
+
+    def effective_roles(self, user_role: UserRoles) -> List[str]:
+        """
+        Roles a user may read as, expanded through the RBAC role hierarchy
+
+        Raises:
+            ValueError: If none of the roles is known
+        """
+        roles = self.rbac.effective_roles(user_role)
+        if not roles:
+            raise ValueError(f"Unknown role '{user_role}'")
+        return roles
+
+    def resolve_departments(self, user_role: UserRoles,
+                            departments: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Departments a request may search
+
+        Args:
+            user_role: One or more roles
+            departments: Departments already resolved by the caller; when
+                None they are looked up in self.department_access
+
+        Returns:
+            Sorted department names (empty: the request may read nothing)
+        """
+        if departments is None:
+            return self.department_access.departments_for(self.effective_roles(user_role))
+        return sorted(set(departments))
+
+    def build_where(self, user_role: UserRoles,
+                    departments: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Build the RBAC where filter (department $in the readable departments)"""
+        return department_where(self.resolve_departments(user_role, departments))
+
+    def encode(self, queries: List[str]) -> List[List[float]]:
+        """Normalize and embed queries in one forward pass"""
+        self._require_local("encode")
+        normalized = [self.normalize_query(q) for q in queries]
         
         # Use normalize_embeddings=True for better cosine similarity performance
-        query_embedding = self.model.encode(normalized, normalize_embeddings=True).tolist()
-        
-        # Map role to correct ChromaDB filter key
-        if user_role == "employee":
-            role_key = "role_general"  # Employee role uses role_general flag
-        else:
-            role_key = f"role_{user_role}"
-        
-        # Build RBAC where filter
-        where_filter = {role_key: True}
-        
-        # Search in ChromaDB with RBAC filtering at query time
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where_filter
-        )
+        embeddings = self.model.encode(normalized, normalize_embeddings=True)
+        if self.projection is not None:
+            embeddings = self.projection.transform(embeddings)
+        return embeddings.tolist()
+
+    def search_batch(self, requests: List[SearchRequest],
+                     include_documents: bool = True) -> List[Dict[str, List[List[Any]]]]:
+        """
+        Search several queries at once
+        
+        Queries are embedded together, and queries searching the same
+        departments are sent to ChromaDB in a single call.
+        
+        Args:
+            requests: (query, n_results, user_role) tuples; user_role may
+                hold several roles. A fourth element, if present, is the list
+                of departments the request may read.
+            include_documents: Attach chunk texts to the results
+            
+        Returns:
+            ChromaDB-shaped results, one per request
+        """
+        self._require_local("search_batch")
+        fields = self._result_fields(include_documents)
+        results: List[Optional[Dict[str, List[List[Any]]]]] = [None] * len(requests)
+
+        # Resolve access first; requests that may read nothing are not searched
+        jobs: List[Tuple[int, str, int, List[str]]] = []
+        for i, request in enumerate(requests):
+            query, n_results, user_role = request[:3]
+            departments = self.resolve_departments(user_role, request[3] if len(request) > 3 else None)
+            if departments:
+                jobs.append((i, query, n_results, departments))
+            else:
+                results[i] = {field: [[]] for field in fields}
+
+        if jobs:
+            embeddings = self.encode([query for _, query, _, _ in jobs])
+            if self.shards:
+                found = self._search_sharded(jobs, embeddings, fields)
+            elif self.quantized_index is not None:
+                found = [
+                    self.quantized_index.search(embedding, n_results=n_results, where=department_where(departments))
+                    for embedding, (_, _, n_results, departments) in zip(embeddings, jobs)
+                ]
+            else:
+                found = self._search_filtered(jobs, embeddings, fields)
+            for (i, _, _, _), result in zip(jobs, found):
+                results[i] = result
+
+        # Texts not returned by the index come from the document store
+        if include_documents:
+            for result in results:
+                if "documents" not in result:
+                    result["documents"] = [self.fetch_documents(result["ids"][0])]
+        return results
+
+    def _search_filtered(self, jobs: List[Tuple[int, str, int, List[str]]],
+                         embeddings: List[List[float]],
+                         fields: List[str]) -> List[Dict[str, List[List[Any]]]]:
+        """Query the single collection once per distinct set of departments"""
+        results: List[Optional[Dict[str, List[List[Any]]]]] = [None] * len(jobs)
+
+        # Group jobs by department filter
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for row, (_, _, _, departments) in enumerate(jobs):
+            groups.setdefault(tuple(departments), []).append(row)
+
+        for departments, rows in groups.items():
+            # Search in ChromaDB with RBAC filtering at query time
+            group_results = self.collection.query(
+                query_embeddings=[embeddings[row] for row in rows],
+                n_results=max(jobs[row][2] for row in rows),
+                where=department_where(departments),
+                include=[field for field in fields if field != "ids"]
+            )
+            for position, row in enumerate(rows):
+                n_results = jobs[row][2]
+                results[row] = {
+                    field: [group_results[field][position][:n_results]]
+                    for field in fields
+                }
         
         return results
+
+    def _result_fields(self, include_documents: bool) -> List[str]:
+        """Fields to request from Chroma; texts are skipped when the document store has them"""
+        if include_documents and self.document_store is None:
+            return ["ids", "documents", "metadatas", "distances"]
+        return ["ids", "metadatas", "distances"]
+
+    def _search_sharded(self, jobs: List[Tuple[int, str, int, List[str]]],
+                        embeddings: List[List[float]],
+                        fields: List[str]) -> List[Dict[str, List[List[Any]]]]:
+        """
+        Scatter queries to the accessible department shards and merge by distance
+
+        Access control is enforced by shard selection, so shards are queried
+        without a where filter. Every shard a request can see is queried once
+        for all requests that can see it; the per-shard calls run in parallel.
+        """
+        n_max = max(n_results for _, _, n_results, _ in jobs)
+
+        # Jobs per shard
+        shard_jobs: Dict[str, List[int]] = {}
+        for row, (_, _, _, departments) in enumerate(jobs):
+            for department in departments:
+                if department in self.shards:
+                    shard_jobs.setdefault(department, []).append(row)
+
+        def query_shard(department: str):
+            rows = shard_jobs[department]
+            return department, self.shards[department].query(
+                query_embeddings=[embeddings[row] for row in rows],
+                n_results=n_max,
+                include=[field for field in fields if field != "ids"]
+            )
+
+        # Gather (distance, field values...) candidates per job
+        candidates: List[List[tuple]] = [[] for _ in jobs]
+        for department, shard_results in self.shard_pool.map(query_shard, list(shard_jobs)):
+            for position, row in enumerate(shard_jobs[department]):
+                candidates[row].extend(zip(
+                    shard_results["distances"][position],
+                    *(shard_results[field][position] for field in fields)
+                ))
+
+        results = []
+        for (_, _, n_results, _), found in zip(jobs, candidates):
+            top = sorted(found, key=lambda c: c[0])[:n_results]
+            results.append({
+                field: [[c[col + 1] for c in top]]
+                for col, field in enumerate(fields)
+            })
+        return results
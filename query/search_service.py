@@ -0,0 +1,493 @@
+"""Shared Vector Search Service - one encoder + index for all API workers
+
+Runs as a separate local process that owns the MiniLM encoder and the
+ChromaDB index and answers embed+search requests over a Unix socket.
+Concurrent requests are batched: all queries in a batch are encoded in one
+forward pass and queries sharing an RBAC filter go to Chroma together.
+
+Start it next to the API workers:
+    python -m query.search_service
+
+and point the workers at it with SEARCH_SERVICE_SOCKET set to the socket
+path it prints (default: default_socket_path()).
+
+Requests carry the caller's roles and departments, so only the backend may
+talk to the service:
+    - the socket lives in a directory only the service's user can enter
+      ($XDG_RUNTIME_DIR, else a per-uid directory under the temp dir) and is
+      chmod 0600 after bind
+    - connections from other uids are refused (SO_PEERCRED, Linux)
+    - every connection must first authenticate with a shared secret
+      (SEARCH_SERVICE_SECRET, else a random one the service writes to
+      ``<socket>.key`` with mode 0600 for the workers to read)
+
+Wire format (network byte order):
+    request  = op:u8 | n_results:u16 | role_len:u16 | query_len:u32 | role | query
+    response = status:u8 | count:u16 | distances:f32[count]
+               | count x (id_len:u16 | id | doc_len:u32 | doc | meta_len:u32 | meta_json)
+    error    = status:u8 (=1) | count:u16 (=0) | msg_len:u32 | message
+
+An OP_AUTH request carries the secret in the query field. The role field is
+``roles`` or ``roles|departments`` when the worker has already resolved the
+departments from its live access table.
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import stat
+import struct
+import tempfile
+from typing import Any, Collection, Dict, List, Optional
+
+OP_SEARCH = 1
+OP_PING = 2
+OP_AUTH = 3
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_REQUEST_HEADER = struct.Struct("!BHHI")
+_RESPONSE_HEADER = struct.Struct("!BH")
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+
+SOCKET_FILENAME = "chatbot-search.sock"
+
+# Separates the roles from pre-resolved departments in the role field
+DEPARTMENTS_SEPARATOR = "|"
+
+# (pid, uid, gid) returned by SO_PEERCRED
+_PEERCRED = struct.Struct("3i")
+
+
+def default_socket_path() -> str:
+    """Socket path in a directory private to the current user"""
+    base = os.getenv("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"chatbot-{os.getuid()}")
+    return os.path.join(base, SOCKET_FILENAME)
+
+
+def secret_path(socket_path: str) -> str:
+    """File holding the generated shared secret of a service"""
+    return f"{socket_path}.key"
+
+
+def read_secret(socket_path: str) -> str:
+    """
+    Shared secret for a service: SEARCH_SERVICE_SECRET, else its key file
+
+    Raises:
+        RuntimeError: If neither is available
+    """
+    secret = os.getenv("SEARCH_SERVICE_SECRET")
+    if secret:
+        return secret
+    try:
+        with open(secret_path(socket_path), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError as e:
+        raise RuntimeError(
+            f"No search service secret: set SEARCH_SERVICE_SECRET or start the service at {socket_path}"
+        ) from e
+
+
+def _private_dir(path: str):
+    """
+    Create a directory only the current user can use, or check an existing one
+
+    Raises:
+        PermissionError: If it belongs to another user or others may write to it
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Socket directory {path} must be owned by uid {os.getuid()} "
+                              f"and not writable by others")
+
+
+def peer_uid(sock: socket.socket) -> Optional[int]:
+    """Uid of the process on the other end of a Unix socket (None where SO_PEERCRED is missing)"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size)
+    return _PEERCRED.unpack(creds)[1]
+
+
+# ---------------------------------------------------------------------------
+# Protocol
+# ---------------------------------------------------------------------------
+
+def pack_request(query: str, n_results: int, user_role: str, op: int = OP_SEARCH,
+                 departments: Optional[List[str]] = None) -> bytes:
+    """Encode a search request frame"""
+    if departments is not None:
+        user_role = f"{user_role}{DEPARTMENTS_SEPARATOR}{','.join(departments)}"
+    role_bytes = user_role.encode("utf-8")
+    query_bytes = query.encode("utf-8")
+    return _REQUEST_HEADER.pack(op, n_results, len(role_bytes), len(query_bytes)) + role_bytes + query_bytes
+
+
+def pack_response(results: Dict[str, List[List[Any]]]) -> bytes:
+    """Encode ChromaDB-shaped results for a single query"""
+    ids = results["ids"][0]
+    documents = results.get("documents", [[]])[0] or [""] * len(ids)
+    metadatas = results.get("metadatas", [[]])[0] or [{}] * len(ids)
+    distances = results.get("distances", [[]])[0]
+
+    parts = [
+        _RESPONSE_HEADER.pack(STATUS_OK, len(ids)),
+        struct.pack(f"!{len(ids)}f", *distances),
+    ]
+    for chunk_id, doc, meta in zip(ids, documents, metadatas):
+        id_bytes = chunk_id.encode("utf-8")
+        doc_bytes = (doc or "").encode("utf-8")
+        meta_bytes = json.dumps(meta or {}, separators=(",", ":")).encode("utf-8")
+        parts.append(_U16.pack(len(id_bytes)) + id_bytes)
+        parts.append(_U32.pack(len(doc_bytes)) + doc_bytes)
+        parts.append(_U32.pack(len(meta_bytes)) + meta_bytes)
+    return b"".join(parts)
+
+
+def pack_error(message: str) -> bytes:
+    """Encode an error response frame"""
+    msg_bytes = message.encode("utf-8")
+    return _RESPONSE_HEADER.pack(STATUS_ERROR, 0) + _U32.pack(len(msg_bytes)) + msg_bytes
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes from a blocking socket"""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Search service closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def read_response(sock: socket.socket) -> Dict[str, List[List[Any]]]:
+    """
+    Read and decode one response frame from a blocking socket
+
+    Raises:
+        RuntimeError: If the service reported an error
+    """
+    status, count = _RESPONSE_HEADER.unpack(_recv_exact(sock, _RESPONSE_HEADER.size))
+    if status != STATUS_OK:
+        (msg_len,) = _U32.unpack(_recv_exact(sock, _U32.size))
+        raise RuntimeError(f"Search service error: {_recv_exact(sock, msg_len).decode('utf-8')}")
+
+    distances = list(struct.unpack(f"!{count}f", _recv_exact(sock, 4 * count)))
+    ids, documents, metadatas = [], [], []
+    for _ in range(count):
+        (id_len,) = _U16.unpack(_recv_exact(sock, _U16.size))
+        ids.append(_recv_exact(sock, id_len).decode("utf-8"))
+        (doc_len,) = _U32.unpack(_recv_exact(sock, _U32.size))
+        documents.append(_recv_exact(sock, doc_len).decode("utf-8"))
+        (meta_len,) = _U32.unpack(_recv_exact(sock, _U32.size))
+        metadatas.append(json.loads(_recv_exact(sock, meta_len)))
+
+    return {"ids": [ids], "documents": [documents], "metadatas": [metadatas], "distances": [distances]}
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class SearchService:
+    """
+    Unix socket server that batches search requests into one engine
+
+    The engine only needs a ``search_batch(requests)`` method taking
+    ``(query, n_results, user_role)`` tuples, with the resolved departments
+    as a fourth element when the client sent them (see QueryEngine.search_batch).
+
+    The engine trusts the roles and departments it is given, so connections
+    are only served for allowed peer uids and after OP_AUTH with the secret.
+    """
+
+    def __init__(self, engine, socket_path: Optional[str] = None,
+                 max_batch_size: int = 32, batch_window_ms: float = 2.0,
+                 secret: Optional[str] = None,
+                 allowed_uids: Optional[Collection[int]] = None):
+        """
+        Initialize search service
+
+        Args:
+            engine: Local search engine with search_batch()
+            socket_path: Unix socket to listen on (default: default_socket_path())
+            max_batch_size: Maximum requests per engine call
+            batch_window_ms: How long to wait for more requests once one arrives
+            secret: Shared secret clients must send (default:
+                SEARCH_SERVICE_SECRET, else a random one written to
+                secret_path(socket_path))
+            allowed_uids: Peer uids allowed to connect (default: this process's uid)
+        """
+        self.engine = engine
+        self.socket_path = socket_path or default_socket_path()
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.secret = secret or os.getenv("SEARCH_SERVICE_SECRET")
+        self.allowed_uids = set(allowed_uids) if allowed_uids is not None else {os.getuid()}
+        self._pending: Optional[asyncio.Queue] = None
+        self._server = None
+
+    def _write_secret(self):
+        """Generate the shared secret and store it next to the socket, readable by this user only"""
+        self.secret = secrets.token_hex(32)
+        path = secret_path(self.socket_path)
+        if os.path.exists(path):
+            os.unlink(path)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.secret)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve request frames on one worker connection until it closes"""
+        loop = asyncio.get_running_loop()
+        uid = peer_uid(writer.get_extra_info("socket"))
+        if uid is not None and uid not in self.allowed_uids:
+            writer.write(pack_error(f"uid {uid} may not use the search service"))
+            await writer.drain()
+            writer.close()
+            return
+
+        authenticated = False
+        try:
+            while True:
+                header = await reader.readexactly(_REQUEST_HEADER.size)
+                op, n_results, role_len, query_len = _REQUEST_HEADER.unpack(header)
+                body = await reader.readexactly(role_len + query_len)
+
+                if op == OP_AUTH:
+                    authenticated = hmac.compare_digest(body[role_len:], self.secret.encode("utf-8"))
+                    if not authenticated:
+                        writer.write(pack_error("Invalid search service secret"))
+                        await writer.drain()
+                        break
+                    writer.write(_RESPONSE_HEADER.pack(STATUS_OK, 0))
+                elif not authenticated:
+                    writer.write(pack_error("Not authenticated"))
+                    await writer.drain()
+                    break
+                elif op == OP_PING:
+                    writer.write(_RESPONSE_HEADER.pack(STATUS_OK, 0))
+                else:
+                    role, separator, departments = body[:role_len].decode("utf-8").partition(DEPARTMENTS_SEPARATOR)
+                    query = body[role_len:].decode("utf-8")
+                    request = (query, n_results, role)
+                    if separator:
+                        request += ([d for d in departments.split(",") if d],)
+                    future = loop.create_future()
+                    await self._pending.put((request, future))
+                    writer.write(await future)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _batch_loop(self):
+        """Collect requests into batches and run them on a worker thread"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            requests = [request for request, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.engine.search_batch, requests)
+                frames = [pack_response(result) for result in results]
+            except Exception as e:
+                frames = [pack_error(str(e))] * len(batch)
+
+            for (_, future), frame in zip(batch, frames):
+                if not future.done():
+                    future.set_result(frame)
+
+    async def serve(self):
+        """Listen on the Unix socket until cancelled"""
+        _private_dir(os.path.dirname(os.path.abspath(self.socket_path)))
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        generated_secret = not self.secret
+        if generated_secret:
+            self._write_secret()
+
+        self._pending = asyncio.Queue()
+        batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        print(f"✅ Search service listening on {self.socket_path}")
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            batcher.cancel()
+            for path in [self.socket_path] + ([secret_path(self.socket_path)] if generated_secret else []):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class SearchServiceClient:
+    """
+    Blocking client for the search service
+
+    Keeps a small pool of connected sockets so concurrent threads in one
+    worker don't serialize on a single connection. Each new connection
+    authenticates with the shared secret first.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 10.0, pool_size: int = 8,
+                 secret: Optional[str] = None):
+        """
+        Initialize client
+
+        Args:
+            socket_path: Unix socket of the running service (default: default_socket_path())
+            timeout: Socket timeout in seconds
+            pool_size: Maximum idle connections kept open
+            secret: Shared secret (default: read_secret(socket_path) on first connect)
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self.secret = secret
+        self._pool: "queue.LifoQueue[socket.socket]" = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self) -> socket.socket:
+        if self.secret is None:
+            self.secret = read_secret(self.socket_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+            try:
+                sock.sendall(pack_request(self.secret, 0, "", op=OP_AUTH))
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Refused before the secret was read; the reason is waiting below
+            status, _ = _RESPONSE_HEADER.unpack(_recv_exact(sock, _RESPONSE_HEADER.size))
+            if status != STATUS_OK:
+                (msg_len,) = _U32.unpack(_recv_exact(sock, _U32.size))
+                raise PermissionError(f"Search service refused the connection: "
+                                      f"{_recv_exact(sock, msg_len).decode('utf-8')}")
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def _acquire(self) -> socket.socket:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, sock: socket.socket):
+        try:
+            self._pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+    def _call(self, frame: bytes, reader):
+        sock = self._acquire()
+        try:
+            sock.sendall(frame)
+            result = reader(sock)
+        except RuntimeError:
+            # Service-side error; the connection is still in a clean state
+            self._release(sock)
+            raise
+        except Exception:
+            sock.close()
+            raise
+        self._release(sock)
+        return result
+
+    def search(self, query: str, n_results: int = 5, user_role: str = "employee",
+               departments: Optional[List[str]] = None) -> Dict[str, List[List[Any]]]:
+        """
+        Embed and search through the service
+
+        Args:
+            query: User query
+            n_results: Number of results
+            user_role: Role used for RBAC filtering
+            departments: Departments resolved by the caller (default: the
+                service resolves them from user_role with its own table)
+
+        Returns:
+            ChromaDB-shaped results
+        """
+        return self._call(pack_request(query, n_results, user_role, departments=departments), read_response)
+
+    def ping(self) -> bool:
+        """Check that the service is reachable"""
+        try:
+            self._call(pack_request("", 0, "", op=OP_PING),
+                       lambda sock: _recv_exact(sock, _RESPONSE_HEADER.size))
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        """Close pooled connections"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embed+search service for API workers")
+    parser.add_argument("--socket", default=os.getenv("SEARCH_SERVICE_SOCKET") or default_socket_path())
+    parser.add_argument("--vectorstore", default="vectorstore/chroma", help="ChromaDB persistence directory")
+    parser.add_argument("--quantization", help="int8 or binary (default: VECTOR_QUANTIZATION)")
+    parser.add_argument("--reduced-dim", type=int, help="PCA-reduced size (default: VECTOR_REDUCED_DIM)")
+    parser.add_argument("--sharded", action="store_true", default=None, help="Default: VECTOR_SHARDED")
+    parser.add_argument("--document-store", action="store_true", default=None,
+                        help="Default: VECTOR_DOCUMENT_STORE")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    from query.query_engine import QueryEngine, serving_options_from_env
+
+    try:
+        serving = serving_options_from_env()
+    except ValueError as e:
+        parser.error(str(e))
+    for option in ("quantization", "reduced_dim", "sharded", "document_store"):
+        if getattr(args, option) is None:
+            setattr(args, option, serving[option])
+
+    print("🔄 Loading encoder and index...")
+    engine = QueryEngine(args.vectorstore, quantization=args.quantization, reduced_dim=args.reduced_dim,
+                         sharded=args.sharded, document_store=args.document_store)
+    service = SearchService(
+        engine,
+        socket_path=args.socket,
+        max_batch_size=args.max_batch_size,
+        batch_window_ms=args.batch_window_ms
+    )
+    asyncio.run(service.serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,7 @@
 from .rag_pipeline import RAGPipeline
 from .prompt_templates import PromptTemplates
 from .confidence_scorer import ConfidenceScorer
+from .context_packer import ContextPacker
+from .extractive_answerer import ExtractiveAnswerer
 
-__all__ = ["RAGPipeline", "PromptTemplates", "ConfidenceScorer"]
+__all__ = ["RAGPipeline", "PromptTemplates", "ConfidenceScorer", "ContextPacker", "ExtractiveAnswerer"]
@@ -0,0 +1,213 @@
+"""Token-budgeted Context Packing for RAG prompts"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+_TERM = re.compile(r"[a-z0-9]+")
+# Sentence boundaries: after terminal punctuation, and at line breaks
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Words that say nothing about which sentence answers the question
+_STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it its me my of on or our
+the their there this to was we what when where which who why will with you your
+""".split())
+
+# Tokens added by format_context around each chunk ("[Source n: doc - section] (Relevance: x%)")
+CHUNK_HEADER_TOKENS = 24
+
+
+class TokenCounter:
+    """
+    Token counts for prompt budgeting
+
+    Uses tiktoken's cl100k_base encoding when installed; otherwise an
+    estimate of one token per word or punctuation mark, with long words
+    split every 4 characters, which tracks BPE counts closely for English
+    prose and markdown.
+    """
+
+    def __init__(self):
+        self._encoding = tiktoken.get_encoding("cl100k_base") if tiktoken is not None else None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return sum(math.ceil(len(token) / 4) for token in _WORD.findall(text))
+
+
+def terms(text: str) -> List[str]:
+    """Lowercase words and numbers of a text, stopwords dropped"""
+    return [t for t in _TERM.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[term] for term, count in a.items() if term in b)
+    return dot / math.sqrt(sum(v * v for v in a.values()) * sum(v * v for v in b.values()))
+
+
+class ContextPacker:
+    """
+    Select and trim retrieved chunks to fit a prompt token budget
+
+    Chunks are picked greedily by maximal marginal relevance (vector
+    relevance traded against term overlap with chunks already picked), and
+    each chunk is cut down to its sentences that best match the query.
+    """
+
+    def __init__(self,
+                 max_context_tokens: int = 450,
+                 max_chunks: int = 4,
+                 max_chunk_tokens: int = 150,
+                 mmr_lambda: float = 0.7,
+                 relevance_margin: float = 0.2,
+                 min_chunk_tokens: int = 40,
+                 max_candidates: int = 8,
+                 counter: Optional[TokenCounter] = None):
+        """
+        Initialize the packer
+
+        Args:
+            max_context_tokens: Token budget for the whole context block
+            max_chunks: Most chunks to include
+            max_chunk_tokens: Longer chunks are trimmed to their best sentences
+            mmr_lambda: Relevance weight in MMR (1.0 = ignore redundancy)
+            relevance_margin: Skip chunks whose relevance (1 - distance) is
+                more than this below the best chunk's
+            min_chunk_tokens: Skip a chunk rather than squeeze it below this
+            max_candidates: Most retrieved chunks considered (best first);
+                callers fetch texts for no more than this many
+            counter: Token counter (default: TokenCounter())
+        """
+        self.max_context_tokens = max_context_tokens
+        self.max_chunks = max_chunks
+        self.max_chunk_tokens = max_chunk_tokens
+        self.mmr_lambda = mmr_lambda
+        self.relevance_margin = relevance_margin
+        self.min_chunk_tokens = min_chunk_tokens
+        self.max_candidates = max_candidates
+        self.counter = counter or TokenCounter()
+
+    def trim(self, text: str, query: str, max_tokens: int) -> str:
+        """
+        Keep the sentences of a chunk that best match the query
+
+        Args:
+            text: Chunk text
+            query: User question
+            max_tokens: Token limit for the result
+
+        Returns:
+            The chunk itself if it fits, else its highest-scoring sentences
+            in their original order (always at least the best one, cut to
+            max_tokens words if it is still too long)
+        """
+        if self.counter.count(text) <= max_tokens:
+            return text
+
+        sentences = [s.strip() for s in SENTENCE_BREAK.split(text) if s.strip()]
+        query_terms = set(terms(query))
+
+        def score(item):
+            position, sentence = item
+            sentence_terms = terms(sentence)
+            overlap = sum(1 for t in sentence_terms if t in query_terms)
+            # Favour dense matches; earlier sentences (titles, lead-ins) break ties
+            return (overlap / math.sqrt(len(sentence_terms) + 1), -position)
+
+        keep, used = [], 0
+        for position, sentence in sorted(enumerate(sentences), key=score, reverse=True):
+            tokens = self.counter.count(sentence)
+            if used + tokens > max_tokens:
+                continue
+            keep.append(position)
+            used += tokens
+
+        if not keep:
+            best = max(enumerate(sentences), key=score)[1]
+            words = best.split()
+            while len(words) > 1 and self.counter.count(" ".join(words)) > max_tokens:
+                words = words[:int(len(words) * 0.9)] if len(words) > 10 else words[:-1]
+            return " ".join(words)
+        return "\n".join(sentences[i] for i in sorted(keep))
+
+    def pack(self,
+             query: str,
+             documents: List[str],
+             metadatas: List[Dict[str, Any]],
+             distances: List[float],
+             ids: Optional[List[str]] = None,
+             max_context_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Choose the chunks (and the parts of them) to send to the LLM
+
+        Args:
+            query: User question
+            documents: Retrieved chunk texts, best first; only the first
+                max_candidates are considered
+            metadatas: Metadata per chunk
+            distances: Vector distance per chunk (lower = more relevant)
+            ids: Chunk ids (default: positions)
+            max_context_tokens: Budget for this call (default: the packer's)
+
+        Returns:
+            Selected chunks in selection order, each
+            {"id", "text", "metadata", "distance", "tokens", "trimmed"};
+            the top chunk is always included, trimmed to the budget if needed
+        """
+        budget = max_context_tokens or self.max_context_tokens
+        ids = ids if ids is not None else [str(i) for i in range(len(documents))]
+
+        candidates = []
+        for chunk_id, doc, meta, dist in list(zip(ids, documents, metadatas, distances))[:self.max_candidates]:
+            text = self.trim(doc or "", query, self.max_chunk_tokens)
+            candidates.append({
+                "id": chunk_id,
+                "text": text,
+                "metadata": meta,
+                "distance": dist,
+                "tokens": self.counter.count(text),
+                "trimmed": text != doc,
+                "relevance": 1 - dist,
+                "terms": Counter(terms(text)),
+            })
+
+        if candidates:
+            floor = max(c["relevance"] for c in candidates) - self.relevance_margin
+            candidates = [c for c in candidates if c["relevance"] >= floor]
+
+        selected: List[Dict[str, Any]] = []
+        remaining = budget
+        while candidates and len(selected) < self.max_chunks:
+            def marginal(c):
+                redundancy = max((_cosine(c["terms"], s["terms"]) for s in selected), default=0.0)
+                return self.mmr_lambda * c["relevance"] - (1 - self.mmr_lambda) * redundancy
+
+            best = max(candidates, key=marginal)
+            candidates.remove(best)
+
+            room = remaining - CHUNK_HEADER_TOKENS
+            if best["tokens"] > room:
+                if room < self.min_chunk_tokens and selected:
+                    continue
+                best["text"] = self.trim(best["text"], query, max(room, 1))
+                best["tokens"] = self.counter.count(best["text"])
+                best["trimmed"] = True
+            selected.append(best)
+            remaining -= best["tokens"] + CHUNK_HEADER_TOKENS
+
+        for chunk in selected:
+            del chunk["relevance"], chunk["terms"]
+        return selected
@@ -0,0 +1,176 @@
+"""Extractive Answers for Factual Queries (no LLM call)"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from rag.context_packer import SENTENCE_BREAK, terms
+
+# "Key: value" lines, as in the HR employee records ("Leave Balance: 22 days")
+_KEY_VALUE = re.compile(r"^(?P<key>[^:]{1,40}):\s+(?P<value>\S.*)$")
+_MARKUP = re.compile(r"^[\s\-*•#>]+|\*\*|__")
+
+# Words that frame a question without naming what it is about
+_QUESTION_WORDS = frozenset("much many long often tell give show list find please".split())
+
+
+def _stems(text: str) -> set:
+    """Query-matching terms, cut to 6 characters so "invested" meets "investments" """
+    return {term[:6] for term in terms(text) if term not in _QUESTION_WORDS}
+
+
+class ExtractiveAnswerer:
+    """
+    Answer factual questions with lines copied from the retrieved chunks
+
+    Each context chunk is split into units: "key: value" lines (the HR
+    records are made of them) and sentences of the remaining text. A unit
+    scores the fraction of query terms found in it or in its chunk's section
+    title, so "leave balance of Aadhya Patel" is fully covered by the line
+    "Leave Balance: 22 days" of the section "Employee: Aadhya Patel". The
+    best units are returned with citations only when the top chunk is highly
+    relevant and the best unit covers the query well; otherwise the caller
+    falls back to the LLM.
+    """
+
+    def __init__(self,
+                 min_relevance: float = 0.6,
+                 min_score: float = 0.8,
+                 max_units: int = 2,
+                 score_margin: float = 0.1):
+        """
+        Initialize the answerer
+
+        Args:
+            min_relevance: Least relevance (1 - distance) of the top chunk
+            min_score: Least query term coverage of the best unit
+            max_units: Most lines/sentences in an answer
+            score_margin: Also include units scoring within this of the best
+        """
+        self.min_relevance = min_relevance
+        self.min_score = min_score
+        self.max_units = max_units
+        self.score_margin = score_margin
+
+    @staticmethod
+    def units(text: str) -> List[Dict[str, str]]:
+        """
+        Split a chunk into answerable units
+
+        Returns:
+            [{"text", "key"}] in chunk order; "key" is "" for plain sentences
+        """
+        units = []
+        for line in text.splitlines():
+            line = _MARKUP.sub("", line).strip()
+            if not line:
+                continue
+            match = _KEY_VALUE.match(line)
+            if match and len(match.group("key").split()) <= 5:
+                units.append({"text": line, "key": match.group("key").strip()})
+                continue
+            units.extend({"text": sentence.strip(), "key": ""}
+                         for sentence in SENTENCE_BREAK.split(line) if len(sentence.strip()) > 2)
+        return units
+
+    @staticmethod
+    def _candidates(query_terms: set, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Units matching at least one query term, best first"""
+        candidates = []
+        for source, chunk in enumerate(chunks, 1):
+            title = chunk["metadata"].get("section_title", "")
+            title_terms = _stems(title) & query_terms
+            for position, unit in enumerate(ExtractiveAnswerer.units(chunk["text"])):
+                unit_terms = _stems(unit["text"]) & query_terms
+                if not unit_terms:
+                    continue
+                covered = unit_terms | title_terms
+                candidates.append({
+                    **unit,
+                    "source": source,
+                    "title": title if title_terms - unit_terms else "",
+                    "score": len(covered) / len(query_terms),
+                    # Ties: more of the query in the unit itself, earlier sources and lines
+                    "rank": (len(covered), len(unit_terms), -source, -position),
+                })
+        candidates.sort(key=lambda c: c["rank"], reverse=True)
+        return candidates
+
+    @staticmethod
+    def _line(candidate: Dict[str, Any], include_citations: bool) -> str:
+        line = candidate["text"]
+        if candidate["key"] and candidate["title"]:
+            line = f"{candidate['title']} — {line}"  # a bare "key: value" line does not say whose
+        if include_citations:
+            line += f" [Source {candidate['source']}]"
+        return line
+
+    def extract(self,
+                query: str,
+                chunks: List[Dict[str, Any]],
+                include_citations: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Build an extractive answer from packed context chunks
+
+        Args:
+            query: User question
+            chunks: Context chunks from ContextPacker.pack() ({"text",
+                "metadata", "distance"}), best first; Source n is chunks[n-1]
+            include_citations: Append [Source n] to each line
+
+        Returns:
+            {"answer", "score"} (score = query term coverage of the best
+            unit), or None when extraction is not confident enough
+        """
+        query_terms = _stems(query)
+        if not chunks or not query_terms or 1 - chunks[0]["distance"] < self.min_relevance:
+            return None
+
+        candidates = self._candidates(query_terms, chunks)
+        if not candidates or candidates[0]["score"] < self.min_score:
+            return None
+        best = candidates[0]["score"]
+
+        lines = []
+        for candidate in candidates:
+            if len(lines) == self.max_units or candidate["score"] < best - self.score_margin:
+                break
+            line = self._line(candidate, include_citations)
+            if line not in lines:
+                lines.append(line)
+
+        return {"answer": "\n".join(lines), "score": round(best, 3)}
+
+    def snippets(self,
+                 query: str,
+                 chunks: List[Dict[str, Any]],
+                 include_citations: bool = True) -> List[str]:
+        """
+        Best-matching line of each context chunk, with no confidence bar
+
+        Used for retrieval-only answers when the LLM is unavailable.
+
+        Args:
+            query: User question
+            chunks: Context chunks from ContextPacker.pack(), best first
+            include_citations: Append [Source n] to each line
+
+        Returns:
+            One line per chunk in source order (its first unit when no
+            line matches the query)
+        """
+        best_by_source = {}
+        for candidate in self._candidates(_stems(query), chunks):
+            best_by_source.setdefault(candidate["source"], candidate)
+
+        lines = []
+        for source, chunk in enumerate(chunks, 1):
+            candidate = best_by_source.get(source)
+            if candidate is None:
+                units = self.units(chunk["text"])
+                if not units:
+                    continue
+                candidate = {**units[0], "source": source}
+            # Out of context, a "key: value" line needs its record's title
+            candidate = {**candidate, "title": chunk["metadata"].get("section_title", "")}
+            lines.append(self._line(candidate, include_citations))
+        return lines
@@ -1,6 +1,10 @@
 """Prompt Templates and Context Augmentation for RAG"""
 
-from typing import List, Dict, Any
+import functools
+from typing import List, Dict, Any, Optional, Tuple
+
+from llm.config import ANSWER_MAX_TOKENS
+from rag.context_packer import TokenCounter
 
 
 class PromptTemplates:
@@ -45,125 +49,93 @@ Key Guidelines:
         
         return "\n\n".join(context_parts)
     
-    @staticmethod
-    def build_rag_prompt(query: str, context: str, include_citations: bool = True) -> str:
-        """
-        Build complete RAG prompt with query and context
-        
-        Args:
-            query: User's question
-            context: Formatted context from documents
-            include_citations: Whether to request citations
-            
-        Returns:
-            Complete prompt for LLM
-        """
-        citation_instruction = ""
-        if include_citations:
-            citation_instruction = "\nWhen referencing specific information, cite the source number (e.g., [Source 1])."
-        
-        prompt = f"""{PromptTemplates.SYSTEM_PROMPT}
-
-CONTEXT DOCUMENTS:
-{context}
-
-USER QUESTION: {query}
-
-INSTRUCTIONS:
-- Answer the question based on the context documents above
-- Be clear, concise, and professional
-- If the answer is not in the documents, say so{citation_instruction}
-
-ANSWER:"""
-        
-        return prompt
+    # Per query type: instructions and the label the answer follows. They are
+    # static, so they go in the system message; only the context and the
+    # question change between requests, so the system message is a stable
+    # prefix that providers can cache.
+    QUERY_INSTRUCTIONS = {
+        "general": ([
+            "Answer the question based on the context documents",
+            "Be clear, concise, and professional",
+            "If the answer is not in the documents, say so",
+        ], "ANSWER"),
+        "comparison": ([
+            "Compare the relevant information from the documents",
+            "Present key similarities and differences",
+            "Use a structured format (bullet points or table if appropriate)",
+            "Cite sources for each point",
+        ], "COMPARISON"),
+        "summary": ([
+            "Provide a comprehensive summary of the relevant information",
+            "Organize information logically",
+            "Highlight key points",
+            "Include important details from the documents",
+        ], "SUMMARY"),
+        "factual": ([
+            "Provide a direct, factual answer",
+            "Include specific numbers, dates, or names if present",
+            "Cite the source of the information",
+            "Keep the answer focused and precise",
+        ], "ANSWER"),
+    }
+    
+    CITATION_INSTRUCTION = "When referencing specific information, cite the source number (e.g., [Source 1])."
+    
+    USER_TEMPLATE = "CONTEXT DOCUMENTS:\n{context}\n\nUSER QUESTION: {query}\n\n{label}:"
     
     @staticmethod
-    def build_comparison_prompt(query: str, context: str) -> str:
-        """
-        Build prompt for comparison queries
-        
-        Args:
-            query: Comparison question
-            context: Formatted context
-            
-        Returns:
-            Prompt optimized for comparisons
-        """
-        prompt = f"""{PromptTemplates.SYSTEM_PROMPT}
-
-CONTEXT DOCUMENTS:
-{context}
-
-USER QUESTION: {query}
-
-INSTRUCTIONS:
-- Compare the relevant information from the documents
-- Present key similarities and differences
-- Use a structured format (bullet points or table if appropriate)
-- Cite sources for each point
-
-COMPARISON:"""
-        
-        return prompt
+    def _compile_system_prompts() -> Dict[Tuple[str, bool], str]:
+        """System message per (query type, include_citations), built once"""
+        compiled = {}
+        for query_type, (instructions, _) in PromptTemplates.QUERY_INSTRUCTIONS.items():
+            for include_citations in (True, False):
+                lines = list(instructions)
+                if include_citations and query_type == "general":
+                    lines.append(PromptTemplates.CITATION_INSTRUCTION)
+                compiled[(query_type, include_citations)] = (
+                    f"{PromptTemplates.SYSTEM_PROMPT}\nINSTRUCTIONS:\n" + "\n".join(f"- {line}" for line in lines)
+                )
+        return compiled
     
     @staticmethod
-    def build_summary_prompt(query: str, context: str) -> str:
+    def build_messages(query: str,
+                       context: str,
+                       include_citations: bool = True,
+                       query_type: Optional[str] = None) -> List[Dict[str, str]]:
         """
-        Build prompt for summary/overview queries
+        Build the chat messages for a RAG request
         
         Args:
-            query: Summary question
-            context: Formatted context
+            query: User's question
+            context: Formatted context from documents
+            include_citations: Whether to request citations
+            query_type: Template to use (default: detect_query_type(query))
             
         Returns:
-            Prompt optimized for summaries
+            [system message (static per query type), user message (context
+            and question)]
         """
-        prompt = f"""{PromptTemplates.SYSTEM_PROMPT}
-
-CONTEXT DOCUMENTS:
-{context}
-
-USER QUESTION: {query}
-
-INSTRUCTIONS:
-- Provide a comprehensive summary of the relevant information
-- Organize information logically
-- Highlight key points
-- Include important details from the documents
-
-SUMMARY:"""
-        
-        return prompt
+        query_type = query_type or PromptTemplates.detect_query_type(query)
+        label = PromptTemplates.QUERY_INSTRUCTIONS[query_type][1]
+        return [
+            {"role": "system", "content": _SYSTEM_PROMPTS[(query_type, include_citations)]},
+            {"role": "user", "content": PromptTemplates.USER_TEMPLATE.format(context=context, query=query, label=label)},
+        ]
     
     @staticmethod
-    def build_factual_prompt(query: str, context: str) -> str:
+    @functools.lru_cache(maxsize=None)
+    def static_tokens(query_type: str, include_citations: bool = True) -> int:
         """
-        Build prompt for factual/specific queries
+        Tokens of the system message of a query type (counted once)
         
         Args:
-            query: Factual question
-            context: Formatted context
+            query_type: Query type
+            include_citations: Whether citations are requested
             
         Returns:
-            Prompt optimized for factual answers
+            Token count of the cacheable prefix
         """
-        prompt = f"""{PromptTemplates.SYSTEM_PROMPT}
-
-CONTEXT DOCUMENTS:
-{context}
-
-USER QUESTION: {query}
-
-INSTRUCTIONS:
-- Provide a direct, factual answer
-- Include specific numbers, dates, or names if present
-- Cite the source of the information
-- Keep the answer focused and precise
-
-ANSWER:"""
-        
-        return prompt
+        return _COUNTER.count(_SYSTEM_PROMPTS[(query_type, include_citations)])
     
     @staticmethod
     def detect_query_type(query: str) -> str:
@@ -195,10 +167,29 @@ ANSWER:"""
         
         return 'general'
     
+    @staticmethod
+    def answer_max_tokens(query: str) -> int:
+        """
+        Answer length budget for a query
+        
+        Factual questions need a sentence or two; summaries and comparisons
+        need room for structure (see ANSWER_MAX_TOKENS in llm/config.py).
+        
+        Args:
+            query: User question
+            
+        Returns:
+            max_tokens for the LLM call
+        """
+        return ANSWER_MAX_TOKENS[PromptTemplates.detect_query_type(query)]
+    
     @staticmethod
     def get_prompt_for_query(query: str, context: str, include_citations: bool = True) -> str:
         """
-        Get the most appropriate prompt based on query type
+        Get the most appropriate prompt based on query type, as one string
+        
+        For models or callers without chat messages; RAGPipeline sends
+        build_messages() instead.
         
         Args:
             query: User question
@@ -206,15 +197,10 @@ ANSWER:"""
             include_citations: Whether to include citations
             
         Returns:
-            Optimized prompt for the query type
+            System and user message joined
         """
-        query_type = PromptTemplates.detect_query_type(query)
-        
-        if query_type == 'comparison':
-            return PromptTemplates.build_comparison_prompt(query, context)
-        elif query_type == 'summary':
-            return PromptTemplates.build_summary_prompt(query, context)
-        elif query_type == 'factual':
-            return PromptTemplates.build_factual_prompt(query, context)
-        else:
-            return PromptTemplates.build_rag_prompt(query, context, include_citations)
+        return "\n\n".join(m["content"] for m in PromptTemplates.build_messages(query, context, include_citations))
+
+
+_SYSTEM_PROMPTS = PromptTemplates._compile_system_prompts()
+_COUNTER = TokenCounter()
@@ -1,19 +1,38 @@
 """Complete RAG Pipeline with RBAC"""
 
+import asyncio
+import functools
 import os
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Union
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from query.query_engine import QueryEngine
+from query.query_engine import QueryEngine, serving_options_from_env
 from llm.llm_engine import LLMEngine
-from llm.config import OPENROUTER_API_KEY, DEFAULT_LLM_MODEL
+from llm.errors import LLMCircuitOpenError, LLMError
+from llm.config import (
+    OPENROUTER_API_KEY, DEFAULT_LLM_MODEL, COMPLETION_CACHE_CONFIG, CONTEXT_PACKING_CONFIG, LLM_ROUTER_CONFIG,
+    EXTRACTIVE_CONFIG, FEATURES, LLM_BREAKER_CONFIG
+)
+from llm.model_router import ModelRouter
+from llm.circuit_breaker import CircuitBreaker
+from llm.completion_cache import CompletionCache, content_hash
 from rag.prompt_templates import PromptTemplates
 from rag.confidence_scorer import ConfidenceScorer
+from rag.context_packer import ContextPacker
+from rag.extractive_answerer import ExtractiveAnswerer
+from rbac.department_access import DepartmentAccess
+
+# Sampling temperature of answer generation (part of the cache key)
+GENERATION_TEMPERATURE = 0.5
+
+# Heads the answer when the LLM is unavailable and only retrieval ran
+DEGRADED_NOTICE = ("⚠️ The assistant's language model is unavailable right now, so this is a "
+                   "retrieval-only answer: the most relevant passages from the documents you can access.")
 
 
 class RAGPipeline:
@@ -27,7 +46,16 @@ class RAGPipeline:
     def __init__(self, 
                  vectorstore_path: str = "vectorstore/chroma",
                  api_key: Optional[str] = None,
-                 model: str = DEFAULT_LLM_MODEL):
+                 model: str = DEFAULT_LLM_MODEL,
+                 quantization: Optional[str] = None,
+                 reduced_dim: Optional[int] = None,
+                 search_service: Optional[str] = None,
+                 sharded: Optional[bool] = None,
+                 document_store: Optional[bool] = None,
+                 completion_cache: bool = COMPLETION_CACHE_CONFIG["enabled"],
+                 model_pool: List[str] = LLM_ROUTER_CONFIG["models"],
+                 extractive_answers: bool = FEATURES["enable_extractive_answers"],
+                 circuit_breaker: bool = LLM_BREAKER_CONFIG["enabled"]):
         """
         Initialize RAG Pipeline
         
@@ -35,9 +63,38 @@ class RAGPipeline:
             vectorstore_path: Path to ChromaDB vector store
             api_key: OpenRouter API key (defaults to env variable)
             model: LLM model to use
+            quantization: Quantized serving index ('int8'/'binary'; default:
+                VECTOR_QUANTIZATION env, none)
+            reduced_dim: Search PCA-reduced embeddings of this size (default:
+                VECTOR_REDUCED_DIM env, full 384-d; 0 = full)
+            search_service: Unix socket of a shared search service (default:
+                SEARCH_SERVICE_SOCKET env, search in-process)
+            sharded: Search per-department shard collections in parallel
+                (default: VECTOR_SHARDED env, single collection)
+            document_store: Read chunk texts from the compressed document store
+                (default: VECTOR_DOCUMENT_STORE env, from ChromaDB)
+            completion_cache: Reuse answers from the on-disk completion cache (default: LLM_CACHE env, on)
+            model_pool: Route across these models by latency, hedging stragglers
+                (default: LLM_MODEL_POOL env; fewer than two models = no routing)
+            extractive_answers: Allow requests to opt in to extractive answers
+                for factual queries (default: EXTRACTIVE_ANSWERS env, off)
+            circuit_breaker: Fail fast with retrieval-only answers while the LLM
+                keeps failing or missing its latency SLO (default: LLM_CIRCUIT_BREAKER env, on)
+        
+        Raises:
+            ValueError: If no API key is found, or an unset serving option has
+                a malformed environment value (read here, not at import)
         """
         # Initialize components
-        self.query_engine = QueryEngine(vectorstore_path)
+        serving = serving_options_from_env()
+        self.query_engine = QueryEngine(
+            vectorstore_path,
+            quantization=serving["quantization"] if quantization is None else quantization,
+            reduced_dim=(serving["reduced_dim"] if reduced_dim is None else reduced_dim) or None,
+            search_service=serving["search_service"] if search_service is None else search_service,
+            sharded=serving["sharded"] if sharded is None else sharded,
+            document_store=serving["document_store"] if document_store is None else document_store
+        )
         
         # Initialize LLM
         api_key = api_key or OPENROUTER_API_KEY
@@ -45,62 +102,253 @@ class RAGPipeline:
             raise ValueError("OPENROUTER_API_KEY not found in environment or parameters")
         
         self.llm = LLMEngine(api_key=api_key, model=model)
+        if len(model_pool) > 1:
+            # Route each call to the pool model with the best recent latency
+            self.llm = ModelRouter(self.llm, model_pool)
+        if circuit_breaker:
+            self.llm = CircuitBreaker(self.llm)
+        self.cache = None
+        if completion_cache:
+            self.cache = CompletionCache(
+                COMPLETION_CACHE_CONFIG["path"],
+                max_entries=COMPLETION_CACHE_CONFIG["max_entries"]
+            )
         
         # Initialize utilities
         self.prompt_templates = PromptTemplates()
         self.confidence_scorer = ConfidenceScorer()
+        self.context_packer = ContextPacker(**CONTEXT_PACKING_CONFIG)
+        self.extractive_answers = extractive_answers
+        self.extractive_answerer = ExtractiveAnswerer(**EXTRACTIVE_CONFIG)
         
-        print(f"✓ RAG Pipeline initialized with model: {model}")
+        print(f"✓ RAG Pipeline initialized with model: {model if len(model_pool) < 2 else ', '.join(model_pool)}")
     
     def query(self, 
               user_query: str,
-              user_role: str = "employee",
+              user_role: Union[str, List[str]] = "employee",
               n_results: int = 5,
               include_citations: bool = True,
-              max_tokens: int = 400) -> Dict[str, Any]:
+              max_tokens: Optional[int] = None,
+              access: Optional[DepartmentAccess] = None,
+              extractive: bool = False) -> Dict[str, Any]:
         """
         Execute complete RAG pipeline
         
         Args:
             user_query: User's question
-            user_role: User's role for RBAC (admin/finance/engineering/marketing/hr/employee)
+            user_role: User's role for RBAC (admin/finance/engineering/marketing/hr/employee),
+                or a list of roles for users holding several; access follows the role hierarchy
             n_results: Number of documents to retrieve
             include_citations: Whether to include source citations
-            max_tokens: Maximum tokens in LLM response
+            max_tokens: Maximum tokens in LLM response (default: by query type,
+                see ANSWER_MAX_TOKENS)
+            access: Live role -> department table, resolved for this request
+                (default: the query engine's table built from DEPARTMENT_ROLE_MAP)
+            extractive: Answer factual queries with lines copied from the
+                top chunks when extraction is confident, skipping the LLM
+                (only if the pipeline allows extractive answers)
             
         Returns:
             Dict containing:
-                - answer: Generated answer
+                - answer: Generated answer (while the LLM is unavailable: a
+                  retrieval-only answer, flagged by metadata answer_mode "degraded";
+                  on a client error such as a bad API key: the error)
                 - sources: List of source documents with relevance
                 - confidence: Confidence score and level
                 - metadata: Query metadata
         """
+        prepared = self._prepare(user_query, user_role, n_results, include_citations, max_tokens, access,
+                                 extractive)
+        if "response" in prepared:
+            return prepared["response"]
+        if prepared["extracted"]:
+            return self._finish(prepared, prepared["extracted"]["answer"])
+        if prepared["cached"]:
+            return self._finish(prepared, prepared["cached"]["answer"])
+        
+        # Step 6: Generate answer with LLM
+        try:
+            answer = self.llm.generate(
+                prompt=prepared["prompt"],
+                max_tokens=prepared["max_tokens"],
+                temperature=GENERATION_TEMPERATURE
+            )
+        except LLMError as e:
+            return self._llm_failed(prepared, e)
+        
+        self._store(prepared, answer)
+        return self._finish(prepared, answer)
+    
+    async def aquery(self, 
+                     user_query: str,
+                     user_role: Union[str, List[str]] = "employee",
+                     n_results: int = 5,
+                     include_citations: bool = True,
+                     max_tokens: Optional[int] = None,
+                     access: Optional[DepartmentAccess] = None,
+                     extractive: bool = False) -> Dict[str, Any]:
+        """
+        Execute the RAG pipeline from async code
+        
+        Retrieval runs on a worker thread and the LLM call on the engine's
+        pooled async client, so the event loop is never blocked. Same
+        arguments and result as query().
+        """
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(
+            None,
+            functools.partial(self._prepare, user_query, user_role, n_results, include_citations, max_tokens,
+                              access, extractive)
+        )
+        if "response" in prepared:
+            return prepared["response"]
+        if prepared["extracted"]:
+            return self._finish(prepared, prepared["extracted"]["answer"])
+        if prepared["cached"]:
+            return self._finish(prepared, prepared["cached"]["answer"])
+        
+        # Step 6: Generate answer with LLM
+        try:
+            answer = await self.llm.agenerate(
+                prompt=prepared["prompt"],
+                max_tokens=prepared["max_tokens"],
+                temperature=GENERATION_TEMPERATURE
+            )
+        except LLMError as e:
+            return self._llm_failed(prepared, e)
+        
+        await loop.run_in_executor(None, self._store, prepared, answer)
+        return self._finish(prepared, answer)
+    
+    async def astream(self, 
+                      user_query: str,
+                      user_role: Union[str, List[str]] = "employee",
+                      n_results: int = 5,
+                      include_citations: bool = True,
+                      max_tokens: Optional[int] = None,
+                      access: Optional[DepartmentAccess] = None,
+                      extractive: bool = False) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Execute the RAG pipeline, streaming the answer as it is generated
+        
+        Same arguments as query().
+        
+        Yields:
+            (event, data) pairs, in order:
+                - ("sources", {"sources", "confidence", "metadata"}) as soon
+                  as retrieval finishes
+                - ("token", {"text"}) for each answer fragment, including
+                  the confidence disclaimer at the end
+                - ("done", response) with the same dict query() returns
+            If the LLM is unavailable before its first token (circuit open,
+            or a provider error that outlasted the retries), the
+            retrieval-only answer arrives as one token and "done" follows;
+            if it fails midway, or with a client error (auth, bad request,
+            unusable response), ("error", response) replaces "done" and
+            tokens already sent are not retracted.
+        """
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(
+            None,
+            functools.partial(self._prepare, user_query, user_role, n_results, include_citations, max_tokens,
+                              access, extractive)
+        )
+        if "response" in prepared:
+            response = prepared["response"]
+            yield "sources", {key: response[key] for key in ("sources", "confidence", "metadata")}
+            yield "token", {"text": response["answer"]}
+            yield "done", response
+            return
+        
+        yield "sources", {
+            "sources": self._sources(prepared),
+            "confidence": prepared["confidence"],
+            "metadata": self._metadata(prepared)
+        }
+        
+        # Step 6: Stream the answer from the LLM (an extracted or cached answer arrives as one token)
+        if prepared["extracted"] or prepared["cached"]:
+            answer = (prepared["extracted"] or prepared["cached"])["answer"]
+            yield "token", {"text": answer}
+        else:
+            parts = []
+            try:
+                async for text in self.llm.agenerate_stream(
+                    prompt=prepared["prompt"],
+                    max_tokens=prepared["max_tokens"],
+                    temperature=GENERATION_TEMPERATURE
+                ):
+                    parts.append(text)
+                    yield "token", {"text": text}
+            except LLMError as e:
+                if parts or not self._degradable(e):
+                    # Tokens already sent are not retracted
+                    yield "error", self._generation_error(prepared, e)
+                    return
+                response = self._degraded(prepared, e)
+                yield "token", {"text": response["answer"]}
+                yield "done", response
+                return
+            answer = "".join(parts)
+            await loop.run_in_executor(None, self._store, prepared, answer)
+        
+        response = self._finish(prepared, answer)
+        disclaimer = response["answer"][len(answer):]
+        if disclaimer:
+            yield "token", {"text": disclaimer}
+        yield "done", response
+    
+    def _prepare(self,
+                 user_query: str,
+                 user_role: Union[str, List[str]],
+                 n_results: int,
+                 include_citations: bool,
+                 max_tokens: Optional[int],
+                 access: Optional[DepartmentAccess],
+                 extractive: bool = False) -> Dict[str, Any]:
+        """
+        Steps 1-5: validate the role, retrieve, score, build the prompt and
+        look it up in the completion cache
+        
+        Returns:
+            {"response": ...} when the pipeline ends early (invalid role, no
+            results), else the state _finish() needs, including "prompt" (chat messages),
+            "extracted" (an extractive answer, or None; then no prompt is
+            built) and "cached" (the cache hit, or None)
+        """
         
         # Step 1: Authenticate user (role validation)
         valid_roles = ["admin", "finance", "engineering", "marketing", "hr", "employee"]
-        if user_role not in valid_roles:
-            return {
+        user_roles = [user_role] if isinstance(user_role, str) else list(user_role)
+        if not user_roles or any(role not in valid_roles for role in user_roles):
+            return {"response": {
                 "answer": "Error: Invalid user role",
                 "sources": [],
                 "confidence": {"score": 0, "level": "NONE"},
                 "metadata": {"error": "Invalid role"}
-            }
+            }}
         
         # Step 2: Retrieve relevant documents with RBAC filtering
+        # (texts are fetched in step 4, only for the packer's candidates)
+        departments = None
+        if access is not None:
+            departments = access.departments_for(self.query_engine.effective_roles(user_roles))
         search_results = self.query_engine.search(
             query=user_query,
             n_results=n_results,
-            user_role=user_role
+            user_role=user_roles,
+            include_documents=False,
+            departments=departments
         )
         
         # Extract results
-        documents = search_results.get("documents", [[]])[0]
+        ids = search_results.get("ids", [[]])[0]
         metadatas = search_results.get("metadatas", [[]])[0]
         distances = search_results.get("distances", [[]])[0]
         
         # Handle no results
-        if not documents:
-            return {
+        if not ids:
+            return {"response": {
                 "answer": f"No documents accessible to role '{user_role}' were found for this query.",
                 "sources": [],
                 "confidence": {
@@ -114,46 +362,167 @@ class RAGPipeline:
                     "num_results": 0,
                     "query_type": self.prompt_templates.detect_query_type(user_query)
                 }
-            }
+            }}
         
         # Step 3: Calculate confidence score
         confidence = self.confidence_scorer.calculate_confidence(
             distances=distances,
-            num_results=len(documents)
+            num_results=len(ids)
         )
         
-        # Step 4: Format context for LLM
+        # Step 4: Pack the most relevant, least redundant chunks (trimmed to
+        # their best sentences) into the context token budget. The packer
+        # reads the texts of its candidates (the nearest max_candidates
+        # results, not all n_results), so bytes fetched per query stay bounded
+        candidates = min(len(ids), self.context_packer.max_candidates)
+        documents = self.query_engine.result_documents(search_results, candidates)
+        packed = self.context_packer.pack(
+            query=user_query,
+            documents=documents,
+            metadatas=metadatas,
+            distances=distances,
+            ids=ids
+        )
         context = self.prompt_templates.format_context(
-            documents=documents[:3],  # Use top 3 for context
-            metadatas=metadatas[:3],
-            distances=distances[:3]
+            documents=[chunk["text"] for chunk in packed],
+            metadatas=[chunk["metadata"] for chunk in packed],
+            distances=[chunk["distance"] for chunk in packed]
         )
+        max_tokens = max_tokens or self.prompt_templates.answer_max_tokens(user_query)
+        state = {
+            "query": user_query,
+            "role": user_role,
+            "ids": ids,
+            "metadatas": metadatas,
+            "distances": distances,
+            "confidence": confidence,
+            "context": packed,
+            "max_tokens": max_tokens,
+            "include_citations": include_citations,
+            "extracted": None,
+            "cached": None
+        }
+        
+        # Step 4b: Answer a factual query from the chunks' own lines when the
+        # top chunk is highly relevant and a line covers the question
+        if (extractive and self.extractive_answers
+                and self.prompt_templates.detect_query_type(user_query) == "factual"):
+            state["extracted"] = self.extractive_answerer.extract(user_query, packed, include_citations)
+            if state["extracted"]:
+                return state
         
-        # Step 5: Build appropriate prompt based on query type
-        prompt = self.prompt_templates.get_prompt_for_query(
+        # Step 5: Build the messages for the query type: a static system
+        # message (cacheable prefix) and the context and question
+        query_type = self.prompt_templates.detect_query_type(user_query)
+        prompt = self.prompt_templates.build_messages(
             query=user_query,
             context=context,
-            include_citations=include_citations
+            include_citations=include_citations,
+            query_type=query_type
         )
         
-        # Step 6: Generate answer with LLM
-        try:
-            answer = self.llm.generate(
-                prompt=prompt,
-                max_tokens=max_tokens,
-                temperature=0.5
-            )
-        except Exception as e:
-            return {
-                "answer": f"Error generating answer: {str(e)}",
-                "sources": [],
-                "confidence": confidence,
-                "metadata": {
-                    "query": user_query,
-                    "role": user_role,
-                    "error": str(e)
-                }
+        # Step 5b: Reuse a cached answer for this prompt, or for this question
+        # over the same chunks (shared across roles retrieving the same set)
+        text_by_id = dict(zip(ids, documents))
+        chunk_hashes = {chunk["id"]: content_hash(text_by_id[chunk["id"]]) for chunk in packed}
+        cache_keys = {
+            "exact_key": CompletionCache.exact_key(self.llm.model, prompt, GENERATION_TEMPERATURE, max_tokens),
+            "structural_key": CompletionCache.structural_key(
+                query_type, user_query, list(chunk_hashes),
+                self.llm.model, include_citations, max_tokens
+            ),
+            "chunk_hashes": chunk_hashes
+        }
+        cached = self.cache.get(**cache_keys) if self.cache is not None else None
+        
+        state.update(prompt=prompt, cache_keys=cache_keys, cached=cached, prompt_tokens={
+            "static": self.prompt_templates.static_tokens(query_type, include_citations),
+            "dynamic": self.context_packer.counter.count(prompt[1]["content"])
+        })
+        return state
+    
+    def _store(self, prepared: Dict[str, Any], answer: str):
+        """Save a generated answer under both cache keys"""
+        if self.cache is not None and answer:
+            self.cache.put(answer=answer, **prepared["cache_keys"])
+    
+    def _generation_error(self, prepared: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Response when the LLM call failed"""
+        return {
+            "answer": f"Error generating answer: {str(error)}",
+            "sources": [],
+            "confidence": prepared["confidence"],
+            "metadata": {
+                "query": prepared["query"],
+                "role": prepared["role"],
+                "error": str(error)
             }
+        }
+    
+    @staticmethod
+    def _degradable(error: LLMError) -> bool:
+        """
+        Whether a failed LLM call should fall back to a retrieval-only answer
+        
+        Only outages are: an open circuit, or a provider error (connection,
+        timeout, 429, 5xx) that outlasted the retries. Client errors (auth,
+        bad request, unusable response) would recur on every call and are
+        reported as errors so they get fixed.
+        """
+        return isinstance(error, LLMCircuitOpenError) or error.retryable
+    
+    def _llm_failed(self, prepared: Dict[str, Any], error: LLMError) -> Dict[str, Any]:
+        """Response when the LLM call failed: degraded for outages, else the error"""
+        if self._degradable(error):
+            return self._degraded(prepared, error)
+        return self._generation_error(prepared, error)
+    
+    def _degraded(self, prepared: Dict[str, Any], error: LLMError) -> Dict[str, Any]:
+        """
+        Retrieval-only response when the LLM is unavailable or the circuit is open
+        
+        The answer is the best-matching line of each context chunk, with
+        citations, under DEGRADED_NOTICE; metadata has answer_mode "degraded"
+        and the reason.
+        """
+        snippets = self.extractive_answerer.snippets(prepared["query"], prepared["context"],
+                                                     prepared["include_citations"])
+        answer = DEGRADED_NOTICE + "".join(f"\n- {line}" for line in snippets)
+        response = self._finish(prepared, answer)
+        response["metadata"].update(answer_mode="degraded", degraded_reason=str(error))
+        if isinstance(self.llm, CircuitBreaker):
+            response["metadata"]["circuit"] = self.llm.state
+        return response
+    
+    def _sources(self, prepared: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Step 8: source attribution for the chunks used as context"""
+        return self.confidence_scorer.calculate_source_scores(
+            distances=[chunk["distance"] for chunk in prepared["context"]],
+            metadatas=[chunk["metadata"] for chunk in prepared["context"]]
+        )
+    
+    def _metadata(self, prepared: Dict[str, Any]) -> Dict[str, Any]:
+        """Query metadata returned with every answer"""
+        metadata = {
+            "query": prepared["query"],
+            "role": prepared["role"],
+            "num_results": len(prepared["ids"]),
+            "query_type": self.prompt_templates.detect_query_type(prepared["query"]),
+            "context_chunks": len(prepared["context"]),
+            "context_tokens": sum(chunk["tokens"] for chunk in prepared["context"])
+        }
+        if "prompt_tokens" in prepared:
+            metadata["prompt_tokens"] = prepared["prompt_tokens"]  # static = cacheable system prefix
+        if prepared["cached"]:
+            metadata["cache"] = prepared["cached"]["match"]  # "exact" or "structural"
+        if prepared["extracted"]:
+            metadata["answer_mode"] = "extractive"
+            metadata["extraction_score"] = prepared["extracted"]["score"]
+        return metadata
+    
+    def _finish(self, prepared: Dict[str, Any], answer: str) -> Dict[str, Any]:
+        """Steps 7-9: disclaimer, source attribution and the final response"""
+        confidence = prepared["confidence"]
         
         # Step 7: Add confidence disclaimer if needed
         answer = self.confidence_scorer.add_confidence_disclaimer(
@@ -162,22 +531,14 @@ class RAGPipeline:
         )
         
         # Step 8: Build source attribution
-        sources = self.confidence_scorer.calculate_source_scores(
-            distances=distances[:3],
-            metadatas=metadatas[:3]
-        )
+        sources = self._sources(prepared)
         
         # Step 9: Return complete response
         return {
             "answer": answer,
             "sources": sources,
             "confidence": confidence,
-            "metadata": {
-                "query": user_query,
-                "role": user_role,
-                "num_results": len(documents),
-                "query_type": self.prompt_templates.detect_query_type(user_query)
-            }
+            "metadata": self._metadata(prepared)
         }
     
     def query_simple(self, user_query: str, user_role: str = "employee") -> str:
@@ -0,0 +1,61 @@
+"""Role Bitmask
+
+One bit per role, used for compact role sets such as the middleware's route
+permissions. Bits are append-only: a new role takes the next free bit and
+existing bits never move, so stored masks stay valid.
+
+Chunks used to store their readers as an ``access_mask``; document access is
+now resolved from the chunk's department at query time (see
+rbac/department_access.py).
+"""
+
+from typing import Dict, Iterable, List
+
+ROLE_BITS: Dict[str, int] = {
+    "admin": 1 << 0,
+    "finance": 1 << 1,
+    "engineering": 1 << 2,
+    "marketing": 1 << 3,
+    "hr": 1 << 4,
+    "employee": 1 << 5,
+}
+
+# The chunking pipeline labels company-wide content "general"
+ROLE_ALIASES = {"general": "employee"}
+
+ALL_ROLES_MASK = sum(ROLE_BITS.values())
+
+# Legacy chunk metadata key that held the mask
+ACCESS_MASK_KEY = "access_mask"
+
+
+def role_bit(role: str) -> int:
+    """
+    Bit assigned to a role
+
+    Raises:
+        ValueError: If the role is unknown
+    """
+    role = ROLE_ALIASES.get(role, role)
+    if role not in ROLE_BITS:
+        raise ValueError(f"Unknown role '{role}'")
+    return ROLE_BITS[role]
+
+
+def mask_for_roles(roles: Iterable[str]) -> int:
+    """Combine roles into an access mask"""
+    mask = 0
+    for role in roles:
+        mask |= role_bit(role)
+    return mask
+
+
+def roles_for_mask(mask: int) -> List[str]:
+    """Roles whose bit is set in a mask"""
+    return [role for role, bit in ROLE_BITS.items() if mask & bit]
+
+
+def has_access(mask: int, role: str) -> bool:
+    """Check a role against a role mask"""
+    return bool(mask & role_bit(role))
+
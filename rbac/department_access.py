@@ -0,0 +1,98 @@
+"""Role → Department Access
+
+Chunks carry only their ``department``. Which departments a role may read is
+looked up when a query runs, from a role → departments table, and turned into
+a ``department $in`` where filter. Changing access therefore takes effect on
+the next request, with no reindexing.
+
+The default table is DEPARTMENT_ROLE_MAP turned around; the backend keeps the
+live table in its database.
+"""
+
+from typing import Dict, Iterable, List, Mapping
+
+# Department → allowed roles mapping
+DEPARTMENT_ROLE_MAP = {
+    "engineering": ["engineering", "admin"],
+    "finance": ["finance", "admin"],
+    "hr": ["hr", "admin"],
+    "marketing": ["marketing", "admin"],
+    "general": ["employee", "admin"]
+}
+
+# Metadata key the search filter runs on
+DEPARTMENT_KEY = "department"
+
+# Departments chunks can be filed under
+DEPARTMENTS = list(DEPARTMENT_ROLE_MAP)
+
+
+def default_role_departments() -> Dict[str, List[str]]:
+    """Role → departments derived from DEPARTMENT_ROLE_MAP"""
+    table: Dict[str, List[str]] = {}
+    for department, roles in DEPARTMENT_ROLE_MAP.items():
+        for role in roles:
+            table.setdefault(role, []).append(department)
+    return table
+
+
+class DepartmentAccess:
+    """Role → departments table, resolved per request into a search filter"""
+
+    def __init__(self, role_departments: Mapping[str, Iterable[str]]):
+        """
+        Args:
+            role_departments: Departments each role may read directly (roles
+                inherited through the RBAC hierarchy are expanded by the caller)
+        """
+        self.role_departments = {
+            role: sorted(set(departments)) for role, departments in role_departments.items()
+        }
+
+    @classmethod
+    def default(cls) -> "DepartmentAccess":
+        return cls(default_role_departments())
+
+    def departments_for(self, roles: Iterable[str]) -> List[str]:
+        """
+        Departments readable by any of a user's effective roles
+
+        Args:
+            roles: Hierarchy-expanded roles (see RBACFilter.effective_roles)
+
+        Returns:
+            Sorted department names; empty if the roles may read nothing
+        """
+        departments = set()
+        for role in roles:
+            departments.update(self.role_departments.get(role, ()))
+        return sorted(departments)
+
+    def can_read(self, roles: Iterable[str], department: str) -> bool:
+        """Check a chunk's department against a user's effective roles"""
+        return department in self.departments_for(roles)
+
+    def roles_for(self, department: str) -> List[str]:
+        """Roles granted a department directly"""
+        return [role for role, departments in self.role_departments.items() if department in departments]
+
+    def where(self, roles: Iterable[str]) -> Dict[str, Dict[str, List[str]]]:
+        """ChromaDB where filter for the departments readable by the roles"""
+        return department_where(self.departments_for(roles))
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {role: list(departments) for role, departments in self.role_departments.items()}
+
+
+def department_where(departments: Iterable[str]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    ChromaDB where filter selecting chunks of the given departments
+
+    Raises:
+        ValueError: If no departments are given (an empty filter would
+            match everything, so "no access" must be handled by the caller)
+    """
+    departments = sorted(set(departments))
+    if not departments:
+        raise ValueError("At least one department is required")
+    return {DEPARTMENT_KEY: {"$in": departments}}
@@ -1,5 +1,9 @@
 """Role-Based Access Control Filtering"""
 
+from typing import Iterable, List, Optional, Union
+
+from rbac.department_access import DEPARTMENT_KEY, DepartmentAccess
+
 class RBACFilter:
     """Filter documents based on user roles"""
     
@@ -14,6 +18,26 @@ class RBACFilter:
             "employee": ["employee"]
         }
     
+    def effective_roles(self, user_roles: Union[str, Iterable[str]]) -> List[str]:
+        """
+        Expand a user's roles through the hierarchy
+
+        Args:
+            user_roles: One role, a comma-separated string or several roles
+
+        Returns:
+            Every role whose content the user may read, without duplicates
+        """
+        if isinstance(user_roles, str):
+            user_roles = [r.strip() for r in user_roles.split(",") if r.strip()]
+
+        effective = []
+        for user_role in user_roles:
+            for role in self.role_hierarchy.get(user_role, []):
+                if role not in effective:
+                    effective.append(role)
+        return effective
+    
     def can_access(self, user_role: str, required_roles: list) -> bool:
         """Check if user can access document with required roles"""
         if user_role not in self.role_hierarchy:
@@ -22,11 +46,19 @@ class RBACFilter:
         user_roles = self.role_hierarchy[user_role]
         return any(role in user_roles for role in required_roles)
     
-    def filter_results(self, results: list, user_role: str) -> list:
-        """Filter search results based on user role"""
-        filtered = []
-        for result in results:
-            allowed_roles = result.get("metadata", {}).get("allowed_roles", [])
-            if self.can_access(user_role, allowed_roles):
-                filtered.append(result)
-        return filtered
+    def filter_results(self, results: list, user_role: str,
+                       access: Optional[DepartmentAccess] = None) -> list:
+        """
+        Filter search results based on user role
+
+        Args:
+            results: Results with a "metadata" dict carrying the department
+            user_role: User's role
+            access: Role -> department table (default: DEPARTMENT_ROLE_MAP)
+        """
+        access = access or DepartmentAccess.default()
+        departments = set(access.departments_for(self.effective_roles(user_role)))
+        return [
+            result for result in results
+            if result.get("metadata", {}).get(DEPARTMENT_KEY) in departments
+        ]
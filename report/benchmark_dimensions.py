@@ -0,0 +1,135 @@
+"""Recall@k and latency benchmark for PCA-reduced embeddings.
+Fits a projection per target dimension, searches an in-memory Chroma
+collection of reduced vectors and compares against exact 384-d search.
+Each stored chunk in the query sample is searched leave-one-out (its own id
+is dropped from both ground truth and results).
+Outputs a markdown summary to report/DIMENSIONS.md.
+"""
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import chromadb
+from chromadb.config import Settings
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from vectordatabase.projection import PCAProjection
+
+VECTORSTORE_PATH = PROJECT_ROOT / "vectorstore" / "chroma"
+OUTPUT_MD = PROJECT_ROOT / "report" / "DIMENSIONS.md"
+
+DIMS = [32, 64, 96, 128, 192, 384]
+K_VALUES = [1, 3, 5, 10]
+# Every Nth stored chunk is used as a query vector
+QUERY_STRIDE = 3
+
+
+def load_corpus():
+    client = chromadb.PersistentClient(path=str(VECTORSTORE_PATH))
+    collection = client.get_collection(name="company_documents")
+    data = collection.get(include=["embeddings"])
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return data["ids"], vectors
+
+
+def exact_neighbors(vectors: np.ndarray, row: int, k: int) -> List[int]:
+    scores = vectors @ vectors[row]
+    scores[row] = -np.inf
+    return list(np.argsort(-scores)[:k])
+
+
+def run_benchmark():
+    ids, vectors = load_corpus()
+    full_dim = vectors.shape[1]
+    query_rows = list(range(0, len(ids), QUERY_STRIDE))
+    max_k = max(K_VALUES)
+    row_of = {chunk_id: i for i, chunk_id in enumerate(ids)}
+    truth = {row: exact_neighbors(vectors, row, max_k) for row in query_rows}
+
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False, allow_reset=True))
+
+    rows = []
+    for dim in DIMS:
+        if dim != full_dim and dim > min(vectors.shape):
+            print(f"Skipping {dim}: corpus only supports up to {min(vectors.shape)} components")
+            continue
+
+        if dim == full_dim:
+            reduced = vectors
+            explained = 1.0
+        else:
+            projection = PCAProjection.fit(vectors, dim)
+            reduced = projection.transform(vectors)
+            explained = projection.explained_variance
+
+        name = f"bench_d{dim}"
+        try:
+            client.delete_collection(name)
+        except Exception:
+            pass
+        collection = client.create_collection(name=name, metadata={"hnsw:space": "cosine"})
+        collection.add(ids=ids, embeddings=reduced.tolist())
+
+        hits = {k: 0 for k in K_VALUES}
+        latencies = []
+        for row in query_rows:
+            start = time.perf_counter()
+            result = collection.query(
+                query_embeddings=[reduced[row].tolist()],
+                n_results=max_k + 1,
+                include=["distances"]
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            found = [row_of[i] for i in result["ids"][0] if row_of[i] != row][:max_k]
+            for k in K_VALUES:
+                hits[k] += len(set(truth[row][:k]) & set(found[:k]))
+
+        rows.append({
+            "dim": dim,
+            "explained": explained,
+            "recall": {k: hits[k] / (k * len(query_rows)) for k in K_VALUES},
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "vector_kb": len(ids) * dim * 4 / 1024,
+        })
+        client.delete_collection(name)
+
+    write_markdown(rows, num_vectors=len(ids), num_queries=len(query_rows))
+
+
+def write_markdown(rows, num_vectors: int, num_queries: int):
+    lines = []
+    lines.append("# Dimensionality Reduction Benchmark")
+    lines.append("")
+    lines.append("_Auto-generated by report/benchmark_dimensions.py_")
+    lines.append("")
+    lines.append("## Summary")
+    lines.append("")
+    lines.append(f"- Vectors: {num_vectors} ({num_queries} leave-one-out queries)")
+    lines.append("- Ground truth: exact cosine search over the full 384-d vectors")
+    lines.append("")
+
+    header_k = " | ".join(f"Recall@{k}" for k in K_VALUES)
+    lines.append("## Results per Dimension")
+    lines.append("")
+    lines.append(f"| Dim | Explained Variance | Vector Size (KB) | {header_k} | p50 (ms) | p95 (ms) |")
+    lines.append("|" + "------|" * (5 + len(K_VALUES)))
+    for r in rows:
+        recall = " | ".join(f"{r['recall'][k]:.3f}" for k in K_VALUES)
+        lines.append(
+            f"| {r['dim']} | {r['explained']:.1%} | {r['vector_kb']:.1f} | "
+            f"{recall} | {r['p50_ms']:.2f} | {r['p95_ms']:.2f} |"
+        )
+    lines.append("")
+
+    OUTPUT_MD.write_text("\n".join(lines), encoding="utf-8")
+    print(f"Benchmark written to {OUTPUT_MD}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
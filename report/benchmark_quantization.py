@@ -0,0 +1,197 @@
+"""Recall@k benchmark for quantized vector indexes.
+Compares int8 and binary first-pass search (with and without full-precision
+rescoring) against exact brute-force search over the same vectors, and times
+the integer int8 first pass against float32 scoring on a synthetic corpus.
+Outputs a markdown summary to report/QUANTIZATION.md.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import chromadb
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from rbac.department_access import DepartmentAccess
+from vectordatabase.quantized_index import QuantizedIndex, QUANTIZATION_MODES
+
+VECTORSTORE_PATH = PROJECT_ROOT / "vectorstore" / "chroma"
+OUTPUT_MD = PROJECT_ROOT / "report" / "QUANTIZATION.md"
+
+K_VALUES = [1, 3, 5, 10]
+# Every Nth stored chunk is used as a query vector
+QUERY_STRIDE = 3
+# Role filters exercised per query (None = unfiltered)
+ROLE_FILTERS: Dict[str, dict] = {
+    "all": None,
+    "finance": DepartmentAccess.default().where(["finance"]),
+    "employee": DepartmentAccess.default().where(["employee"]),
+}
+# Synthetic corpus for the first-pass throughput comparison (the bundled
+# store is too small for the scan to dominate)
+THROUGHPUT_ROWS = 100_000
+THROUGHPUT_REPEATS = 20
+
+
+def load_vectors():
+    client = chromadb.PersistentClient(path=str(VECTORSTORE_PATH))
+    collection = client.get_collection(name="company_documents")
+    data = collection.get(include=["embeddings", "metadatas"])
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    # Stored vectors are normalized at embedding time; re-normalize defensively
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return data["ids"], vectors, data["metadatas"]
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, mask, k: int) -> List[int]:
+    scores = vectors @ query
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+        k = min(k, int(mask.sum()))
+    return list(np.argsort(-scores)[:k])
+
+
+def time_ms(fn, repeats: int) -> float:
+    """Median wall time of fn() in milliseconds"""
+    fn()
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+
+def benchmark_first_pass(dim: int) -> Dict[str, float]:
+    """
+    int8 first pass: integer scoring vs converting the codes to float32
+
+    Returns:
+        Dict with rows, dim and median milliseconds of both variants
+    """
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(THROUGHPUT_ROWS, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [str(i) for i in range(THROUGHPUT_ROWS)]
+    metadatas = [{} for _ in range(THROUGHPUT_ROWS)]
+    query = vectors[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = QuantizedIndex.build(tmp, ids, vectors, metadatas, mode="int8")
+        scaled_query = query * index.scale
+
+        def float32_pass():
+            return index.codes.astype(np.float32) @ scaled_query
+
+        return {
+            "rows": THROUGHPUT_ROWS,
+            "dim": dim,
+            "float32_ms": time_ms(float32_pass, THROUGHPUT_REPEATS),
+            "int8_ms": time_ms(lambda: index._first_pass(query), THROUGHPUT_REPEATS),
+        }
+
+
+def run_benchmark():
+    ids, vectors, metadatas = load_vectors()
+    queries = vectors[::QUERY_STRIDE]
+    max_k = max(K_VALUES)
+    row_of = {chunk_id: i for i, chunk_id in enumerate(ids)}
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in QUANTIZATION_MODES:
+            index = QuantizedIndex.build(str(Path(tmp) / mode), ids, vectors, metadatas, mode=mode)
+            sizes = index.memory_bytes()
+
+            for rescore in (False, True):
+                for filter_name, where in ROLE_FILTERS.items():
+                    mask = index._filter_mask(where)
+                    hits = {k: 0 for k in K_VALUES}
+                    totals = {k: 0 for k in K_VALUES}
+                    latencies = []
+
+                    for query in queries:
+                        truth = exact_top_k(vectors, query, mask, max_k)
+                        start = time.perf_counter()
+                        result = index.search(query, n_results=max_k, where=where, rescore=rescore)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        found = [row_of[i] for i in result["ids"][0]]
+
+                        for k in K_VALUES:
+                            expected = set(truth[:k])
+                            hits[k] += len(expected & set(found[:k]))
+                            totals[k] += len(expected)
+
+                    rows.append({
+                        "mode": mode,
+                        "rescore": rescore,
+                        "filter": filter_name,
+                        "recall": {k: hits[k] / totals[k] if totals[k] else 1.0 for k in K_VALUES},
+                        "p50_ms": float(np.percentile(latencies, 50)),
+                        "p95_ms": float(np.percentile(latencies, 95)),
+                        "codes_kb": sizes["codes"] / 1024,
+                        "full_kb": sizes["full_precision"] / 1024,
+                    })
+
+    throughput = benchmark_first_pass(vectors.shape[1])
+    write_markdown(rows, num_vectors=len(ids), num_queries=len(queries), throughput=throughput)
+
+
+def write_markdown(rows, num_vectors: int, num_queries: int, throughput: Dict[str, float]):
+    lines = []
+    lines.append("# Quantization Benchmark")
+    lines.append("")
+    lines.append("_Auto-generated by report/benchmark_quantization.py_")
+    lines.append("")
+    lines.append("## Summary")
+    lines.append("")
+    lines.append(f"- Vectors: {num_vectors} ({num_queries} query vectors)")
+    for mode in QUANTIZATION_MODES:
+        mode_rows = [r for r in rows if r["mode"] == mode]
+        if mode_rows:
+            r = mode_rows[0]
+            lines.append(
+                f"- {mode}: {r['codes_kb']:.1f} KB resident codes vs {r['full_kb']:.1f} KB "
+                f"float32 ({r['full_kb'] / r['codes_kb']:.0f}x smaller)"
+            )
+    lines.append("")
+
+    header_k = " | ".join(f"Recall@{k}" for k in K_VALUES)
+    lines.append("## Recall vs Exact Search")
+    lines.append("")
+    lines.append(f"| Mode | Rescore | Filter | {header_k} | p50 (ms) | p95 (ms) |")
+    lines.append("|" + "------|" * (5 + len(K_VALUES)))
+    for r in rows:
+        recall = " | ".join(f"{r['recall'][k]:.3f}" for k in K_VALUES)
+        lines.append(
+            f"| {r['mode']} | {'yes' if r['rescore'] else 'no'} | {r['filter']} | "
+            f"{recall} | {r['p50_ms']:.3f} | {r['p95_ms']:.3f} |"
+        )
+    lines.append("")
+
+    lines.append("## int8 First Pass: Integer vs float32 Scoring")
+    lines.append("")
+    lines.append(
+        f"Synthetic corpus of {throughput['rows']:,} x {throughput['dim']}-d vectors, "
+        f"median of {THROUGHPUT_REPEATS} full scans."
+    )
+    lines.append("")
+    lines.append("| Scoring | Time (ms) | Speedup |")
+    lines.append("|------|------|------|")
+    lines.append(f"| codes.astype(float32) @ query | {throughput['float32_ms']:.2f} | 1.00x |")
+    lines.append(
+        f"| int8 x int8, int32 accumulation | {throughput['int8_ms']:.2f} | "
+        f"{throughput['float32_ms'] / throughput['int8_ms']:.2f}x |"
+    )
+    lines.append("")
+
+    OUTPUT_MD.write_text("\n".join(lines), encoding="utf-8")
+    print(f"Benchmark written to {OUTPUT_MD}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -1,6 +1,7 @@
 """Quick search benchmark for RAG/RBAC system.
 Outputs a markdown summary to report/BENCHMARK.md.
 """
+import sys
 import time
 from pathlib import Path
 from typing import Dict, List
@@ -10,6 +11,11 @@ from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from rbac.department_access import DepartmentAccess
+from rbac.rbac_filter import RBACFilter
+
 VECTORSTORE_PATH = PROJECT_ROOT / "vectorstore" / "chroma"
 OUTPUT_MD = PROJECT_ROOT / "report" / "BENCHMARK.md"
 
@@ -40,12 +46,6 @@ def run_benchmark():
 
     rows = []
     for role, qs in QUERIES.items():
-        # Map role to correct ChromaDB filter key
-        if role == "employee":
-            role_key = "role_general"  # Employee role uses role_general flag
-        else:
-            role_key = f"role_{role}"
-        
         for query in qs:
             start = time.perf_counter()
             # Use normalize_embeddings=True for consistent similarity calculation
@@ -54,7 +54,7 @@ def run_benchmark():
             results = collection.query(
                 query_embeddings=[embedding],
                 n_results=3,
-                where={role_key: True},
+                where=DepartmentAccess.default().where(RBACFilter().effective_roles(role)),
             )
             end = time.perf_counter()
 
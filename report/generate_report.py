@@ -25,8 +25,8 @@ DELIVERABLES = [
 SUMMARY_POINTS = [
     "Pipeline: clean → chunk → embed → index (Chroma persistent store)",
     "Embeddings: sentence-transformers/all-MiniLM-L6-v2 (384 dims, normalized)",
-    "Vectors: 135 chunks indexed with full metadata and role_* flags",
-    "RBAC: enforced at query time using Chroma where filters (role_<dept>=True)",
+    "Vectors: 135 chunks indexed with full metadata; access follows each chunk's department",
+    "RBAC: role → department table resolved per request into a Chroma department $in filter",
     "Normalization: strip + lowercase + collapse whitespace before embedding",
     "Interfaces: terminal demo + Streamlit demo (demo preview/)",
     "Performance: Avg latency 21.46ms (53% faster with optimizations)",
@@ -41,7 +41,7 @@ DATA_COVERAGE = [
 
 RBAC_NOTES = [
     "Hierarchy: admin > department roles (finance/engineering/hr/marketing) > employee",
-    "Metadata: allowed_roles + boolean role_* flags stored per chunk",
+    "Metadata: only the department is stored per chunk; grants live in the backend database",
     "Filtering: query-time where filters + validation tests block cross-department access",
 ]
 
@@ -0,0 +1,293 @@
+"""Full-index RBAC consistency audit
+
+Pages through every company_documents* collection and checks, for all chunks
+of a page at once, that access metadata agrees with the ingestion maps in
+processing/chunk_only.py:
+
+- department:     DOCUMENT_DEPARTMENT_MAP[source_document] (HR records use
+                  the department of their projection, see hr_projections.py)
+                  and a department known to DEPARTMENT_ROLE_MAP
+- no role fields: access is resolved from the department at query time
+                  (rbac/department_access.py), so an ``access_mask``,
+                  ``allowed_roles`` or ``role_*`` flag left behind by an older
+                  indexer is stale
+
+Checks run as numpy comparisons over the page, with mapping lookups done
+once per distinct value, so a full audit costs one metadata scan.
+
+Runs as a dry run by default and exits non-zero if any chunk is wrong.
+Pass ``--apply`` to rewrite the wrong chunks in bulk.
+
+Usage:
+    python scripts/audit_rbac.py
+    python scripts/audit_rbac.py --apply
+    python scripts/audit_rbac.py --report report/rbac_audit.md
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import chromadb
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from processing.chunk_only import DOCUMENT_DEPARTMENT_MAP
+from processing.hr_projections import HR_PROJECTIONS, HR_SOURCE_DOCUMENT
+from rbac.department_access import DEPARTMENTS, DepartmentAccess
+from vectordatabase.metadata_schema import LEGACY_METADATA_FIELDS
+
+DEFAULT_VECTORSTORE_PATH = PROJECT_ROOT / "vectorstore" / "chroma"
+COLLECTION_PREFIX = "company_documents"
+PAGE_SIZE = 2000
+
+# Check name -> description, in report order
+CHECKS = {
+    "unknown_department": "department not in DEPARTMENT_ROLE_MAP",
+    "department_mismatch": "department differs from DOCUMENT_DEPARTMENT_MAP",
+    "legacy_fields": "stale role fields (access_mask, allowed_roles, role_*) stored",
+}
+
+
+def expected_department(source_document: str, projection: Optional[str] = None) -> Optional[str]:
+    """
+    Department a chunk should be filed under
+
+    Returns:
+        Department name, or None if the source document is not mapped
+    """
+    if source_document == HR_SOURCE_DOCUMENT:
+        return HR_PROJECTIONS.get(projection or "full", HR_PROJECTIONS["full"])["department"]
+    return DOCUMENT_DEPARTMENT_MAP.get(source_document)
+
+
+def _lookup(values: Sequence[Any], fn, dtype=object) -> np.ndarray:
+    """Apply fn once per distinct value and broadcast the results back"""
+    keys = np.array([str(v) if v is not None else "" for v in values], dtype=object)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return np.array([fn(key) for key in unique], dtype=dtype)[inverse]
+
+
+class AuditResult:
+    """Per-chunk outcome of the checks for one page of metadata"""
+
+    def __init__(self,
+                 ids: List[str],
+                 departments: np.ndarray,
+                 expected_departments: np.ndarray,
+                 legacy_present: np.ndarray,
+                 checks: Dict[str, np.ndarray]):
+        self.ids = ids
+        self.departments = departments
+        self.expected_departments = expected_departments
+        self.legacy_present = legacy_present
+        self.checks = checks
+
+    @property
+    def failing(self) -> np.ndarray:
+        """Boolean array: chunk fails at least one check"""
+        failing = np.zeros(len(self.ids), dtype=bool)
+        for flags in self.checks.values():
+            failing |= flags
+        return failing
+
+    def counts(self) -> Dict[str, int]:
+        return {name: int(flags.sum()) for name, flags in self.checks.items()}
+
+    def fixes(self) -> Dict[str, Any]:
+        """
+        Bulk update for every fixable failing chunk
+
+        Chunks whose department cannot be resolved to a known department are
+        left for manual review.
+
+        Returns:
+            {"ids": [...], "metadatas": [...]} for collection.update
+        """
+        fixable = self.failing & np.isin(self.expected_departments, DEPARTMENTS)
+        ids, metadatas = [], []
+        for i in np.flatnonzero(fixable):
+            update = {field: None for field, present in zip(LEGACY_METADATA_FIELDS, self.legacy_present[i]) if present}
+            update["department"] = self.expected_departments[i]
+            ids.append(self.ids[i])
+            metadatas.append(update)
+        return {"ids": ids, "metadatas": metadatas}
+
+    def mismatches(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """First failing chunks with what was stored and what was expected"""
+        rows = []
+        for i in np.flatnonzero(self.failing)[:limit]:
+            rows.append({
+                "id": self.ids[i],
+                "checks": [name for name, flags in self.checks.items() if flags[i]],
+                "department": self.departments[i],
+                "expected_department": self.expected_departments[i],
+            })
+        return rows
+
+
+def audit_metadata(ids: List[str], metadatas: List[Dict[str, Any]]) -> AuditResult:
+    """
+    Check a page of chunk metadata against the ingestion maps
+
+    Args:
+        ids: Chunk ids
+        metadatas: Stored metadata, aligned with ids
+
+    Returns:
+        AuditResult with one boolean array per check
+    """
+    metadatas = [m or {} for m in metadatas]
+    departments = np.array([m.get("department") or "" for m in metadatas], dtype=object)
+
+    # Expected department per (source, projection); unmapped sources keep theirs
+    sources = [f"{m.get('source_document', '')}\0{m.get('projection') or ''}" for m in metadatas]
+    mapped = _lookup(sources, lambda key: expected_department(*key.split("\0")) or "")
+    unmapped = mapped == ""
+    expected_departments = np.where(unmapped, departments, mapped)
+
+    legacy_present = np.array(
+        [[field in m for field in LEGACY_METADATA_FIELDS] for m in metadatas], dtype=bool
+    ).reshape(len(metadatas), len(LEGACY_METADATA_FIELDS))
+
+    checks = {
+        "unknown_department": ~np.isin(expected_departments, DEPARTMENTS),
+        "department_mismatch": ~unmapped & (departments != expected_departments),
+        "legacy_fields": legacy_present.any(axis=1),
+    }
+    return AuditResult(list(ids), departments, expected_departments, legacy_present, checks)
+
+
+def audit_collection(collection, apply: bool, page_size: int = PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Audit every chunk of a collection, one page at a time
+
+    Args:
+        collection: ChromaDB collection
+        apply: Write fixes for failing chunks
+        page_size: Chunks fetched per page
+
+    Returns:
+        Scanned, failing and fixed counts, per-check counts, chunks per
+        department and sample mismatches
+    """
+    summary = {"scanned": 0, "failing": 0, "fixed": 0,
+               "checks": {name: 0 for name in CHECKS}, "departments": {}, "samples": []}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        offset += len(page["ids"])
+
+        result = audit_metadata(page["ids"], page["metadatas"])
+        summary["scanned"] += len(result.ids)
+        summary["failing"] += int(result.failing.sum())
+        for name, count in result.counts().items():
+            summary["checks"][name] += count
+        for department, count in zip(*np.unique(result.expected_departments.astype(str), return_counts=True)):
+            summary["departments"][department] = summary["departments"].get(department, 0) + int(count)
+        summary["samples"].extend(result.mismatches(10 - len(summary["samples"])))
+
+        fixes = result.fixes()
+        if apply and fixes["ids"]:
+            collection.update(**fixes)
+            summary["fixed"] += len(fixes["ids"])
+    return summary
+
+
+def write_report(path: Path, summaries: Dict[str, Dict[str, Any]], apply: bool):
+    """Write the audit results as a markdown report"""
+    lines = [
+        "# RBAC Consistency Audit",
+        "",
+        f"Mode: {'apply' if apply else 'dry run'}",
+        "",
+        "| Collection | Scanned | Failing | Fixed |",
+        "|------------|---------|---------|-------|",
+    ]
+    for name, s in summaries.items():
+        lines.append(f"| {name} | {s['scanned']} | {s['failing']} | {s['fixed']} |")
+
+    lines += ["", "## Checks", "", "| Check | Description | Chunks |", "|-------|-------------|--------|"]
+    for check, description in CHECKS.items():
+        total = sum(s["checks"][check] for s in summaries.values())
+        lines.append(f"| {check} | {description} | {total} |")
+
+    # Who can read what, with the default role -> department table
+    access = DepartmentAccess.default()
+    lines += ["", "## Department Access (defaults)", "",
+              "| Department | Chunks | Readable by |", "|------------|--------|-------------|"]
+    totals: Dict[str, int] = {}
+    for s in summaries.values():
+        for department, count in s["departments"].items():
+            totals[department] = totals.get(department, 0) + count
+    for department, count in sorted(totals.items()):
+        readers = access.roles_for(department)
+        lines.append(f"| {department} | {count} | {', '.join(readers) or '-'} |")
+
+    samples = [(name, row) for name, s in summaries.items() for row in s["samples"]]
+    if samples:
+        lines += ["", "## Sample Mismatches", "",
+                  "| Collection | Chunk | Checks | Department | Expected |",
+                  "|------------|-------|--------|------------|----------|"]
+        for name, row in samples:
+            lines.append(
+                f"| {name} | {row['id']} | {', '.join(row['checks'])} | "
+                f"{row['department']} | {row['expected_department']} |"
+            )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit chunk access metadata against the RBAC maps")
+    parser.add_argument("--path", default=str(DEFAULT_VECTORSTORE_PATH), help="ChromaDB persistence directory")
+    parser.add_argument("--apply", action="store_true", help="Rewrite failing chunks")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Chunks fetched per page")
+    parser.add_argument("--report", help="Write a markdown report to this path")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=args.path)
+    mode = "APPLY" if args.apply else "DRY RUN"
+    print(f"🔍 Auditing RBAC metadata ({mode})")
+
+    summaries = {}
+    for collection in client.list_collections():
+        if not collection.name.startswith(COLLECTION_PREFIX):
+            continue
+        print(f"\n📦 {collection.name}")
+        summary = audit_collection(client.get_collection(collection.name), args.apply, args.page_size)
+        summaries[collection.name] = summary
+
+        print(f"   ✓ {summary['scanned']} scanned, {summary['failing']} failing, {summary['fixed']} fixed")
+        for check, count in summary["checks"].items():
+            if count:
+                print(f"      ❌ {check}: {count} ({CHECKS[check]})")
+        for row in summary["samples"]:
+            print(f"      - {row['id']}: {row['department']} (expected {row['expected_department']}; "
+                  f"{', '.join(row['checks'])})")
+
+    if args.report:
+        write_report(Path(args.report), summaries, args.apply)
+        print(f"\n📝 Report written to {args.report}")
+
+    failing = sum(s["failing"] for s in summaries.values())
+    fixed = sum(s["fixed"] for s in summaries.values())
+    if not failing:
+        print("\n✅ Index is RBAC-consistent")
+    elif args.apply:
+        print(f"\n✅ Fixed {fixed} of {failing} failing chunks")
+        print("📝 Rebuild quantized indexes (processing/build_quantized_index.py) to pick up the new metadata")
+    else:
+        print(f"\n❌ {failing} chunks failing; re-run with --apply to fix them")
+
+    sys.exit(1 if failing > fixed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+"""Vector Store Maintenance - integrity check, duplicate removal and orphan GC
+
+Checks that the SQLite metadata in ``chroma.sqlite3`` agrees with the HNSW
+segment directories next to it, finds duplicate chunks left behind by repeated
+``collection.add`` runs, segment directories no collection references and
+write-ahead log (``embeddings_queue``) rows every segment has already consumed.
+
+Runs as a dry run by default, reading SQLite through a read-only connection,
+so it is safe next to a live server. Pass ``--apply`` (with the server
+stopped) to delete duplicates, remove orphaned segment directories, purge
+consumed log rows and VACUUM the SQLite file.
+
+Usage:
+    python scripts/compact_vector_store.py
+    python scripts/compact_vector_store.py --apply
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from vectordatabase.document_store import DocumentStore
+
+DEFAULT_VECTORSTORE_PATH = PROJECT_ROOT / "vectorstore" / "chroma"
+SQLITE_FILENAME = "chroma.sqlite3"
+
+# hnswlib header as persisted by Chroma: version, offsetLevel0, max_elements,
+# cur_element_count, size_data_per_element, label_offset, offsetData,
+# maxlevel, enterpoint_node, maxM, maxM0, M, mult, ef_construction
+HNSW_HEADER_FORMAT = "<IQQQQQQiIQQQdQ"
+HNSW_HEADER_SIZE = struct.calcsize(HNSW_HEADER_FORMAT)
+
+# Ids per delete call when removing duplicates
+PAGE_SIZE = 500
+
+
+def dir_size(path: Path) -> int:
+    """
+    Total size of all files below a directory
+
+    Args:
+        path: Directory to measure
+
+    Returns:
+        Size in bytes
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def format_size(num_bytes: int) -> str:
+    """Human readable byte count"""
+    size = float(num_bytes)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def read_hnsw_header(segment_dir: Path) -> Optional[Dict[str, int]]:
+    """
+    Parse the hnswlib header of a persisted vector segment
+
+    Args:
+        segment_dir: Segment directory containing ``header.bin``
+
+    Returns:
+        Dict with element counts and graph parameters, or None if the
+        header is missing or truncated
+    """
+    header_path = segment_dir / "header.bin"
+    if not header_path.exists():
+        return None
+
+    raw = header_path.read_bytes()
+    if len(raw) < HNSW_HEADER_SIZE:
+        return None
+
+    fields = struct.unpack_from(HNSW_HEADER_FORMAT, raw)
+    return {
+        "max_elements": fields[2],
+        "element_count": fields[3],
+        "M": fields[11],
+        "ef_construction": fields[13],
+    }
+
+
+def connect_readonly(persist_dir: Path) -> sqlite3.Connection:
+    """Open chroma.sqlite3 read-only (safe next to a live server)"""
+    return sqlite3.connect(f"file:{persist_dir / SQLITE_FILENAME}?mode=ro", uri=True)
+
+
+def _seq_id(value) -> int:
+    """max_seq_id values are integers, or big-endian bytes in older stores"""
+    if isinstance(value, (bytes, bytearray)):
+        return int.from_bytes(value, "big")
+    return int(value or 0)
+
+
+def read_catalog(persist_dir: Path) -> Dict[str, List[Dict]]:
+    """
+    Read collections, segments and row counts straight from SQLite
+
+    Each segment has consumed the log up to its own max_seq_id (0 if it never
+    persisted one, e.g. an HNSW segment below its sync threshold). For each
+    collection, ``queued`` counts log rows its vector segment has not
+    consumed yet, and ``purgeable`` counts rows every segment has consumed,
+    which can be deleted.
+
+    Args:
+        persist_dir: ChromaDB persistence directory
+
+    Returns:
+        Dict with ``collections`` and ``segments`` lists
+    """
+    conn = connect_readonly(persist_dir)
+    try:
+        collections = [
+            {"id": row[0], "name": row[1], "dimension": row[2]}
+            for row in conn.execute("SELECT id, name, dimension FROM collections")
+        ]
+        segments = [
+            {"id": row[0], "scope": row[1], "collection": row[2]}
+            for row in conn.execute("SELECT id, scope, collection FROM segments")
+        ]
+        embedding_counts = dict(conn.execute(
+            "SELECT segment_id, COUNT(*) FROM embeddings GROUP BY segment_id"
+        ))
+        max_seq_ids = {segment_id: _seq_id(seq) for segment_id, seq in conn.execute(
+            "SELECT segment_id, seq_id FROM max_seq_id"
+        )}
+        topics = [row[0] for row in conn.execute("SELECT DISTINCT topic FROM embeddings_queue")]
+
+        for segment in segments:
+            segment["max_seq_id"] = max_seq_ids.get(segment["id"], 0)
+
+        for collection in collections:
+            own = [s for s in segments if s["collection"] == collection["id"]]
+            collection["sqlite_count"] = sum(
+                embedding_counts.get(s["id"], 0) for s in own if s["scope"] == "METADATA"
+            )
+            # Queue topics end with the collection id
+            collection["topics"] = [t for t in topics if t.endswith(collection["id"])]
+            vector_seq = min((s["max_seq_id"] for s in own if s["scope"] == "VECTOR"), default=0)
+            collection["consumed_seq_id"] = min((s["max_seq_id"] for s in own), default=0)
+            collection["queued"] = collection["purgeable"] = 0
+            for topic in collection["topics"]:
+                collection["queued"] += conn.execute(
+                    "SELECT COUNT(*) FROM embeddings_queue WHERE topic = ? AND seq_id > ?", (topic, vector_seq)
+                ).fetchone()[0]
+                collection["purgeable"] += conn.execute(
+                    "SELECT COUNT(*) FROM embeddings_queue WHERE topic = ? AND seq_id <= ?",
+                    (topic, collection["consumed_seq_id"])
+                ).fetchone()[0]
+    finally:
+        conn.close()
+
+    return {"collections": collections, "segments": segments}
+
+
+def find_orphan_segment_dirs(persist_dir: Path, segment_ids: List[str]) -> List[Path]:
+    """
+    Find segment directories that no segment row in SQLite references
+
+    Args:
+        persist_dir: ChromaDB persistence directory
+        segment_ids: All segment ids known to SQLite
+
+    Returns:
+        List of orphaned directories
+    """
+    known = set(segment_ids)
+    return sorted(
+        entry for entry in persist_dir.iterdir()
+        if entry.is_dir() and entry.name not in known
+    )
+
+
+def check_integrity(persist_dir: Path) -> Dict[str, List]:
+    """
+    Verify SQLite metadata against the HNSW segment directories
+
+    Args:
+        persist_dir: ChromaDB persistence directory
+
+    Returns:
+        Dict with ``collections`` (per-collection counts), ``problems``
+        (human readable issues) and ``orphans`` (orphaned directories)
+    """
+    catalog = read_catalog(persist_dir)
+    problems = []
+    by_id = {c["id"]: c for c in catalog["collections"]}
+
+    for segment in catalog["segments"]:
+        if segment["scope"] != "VECTOR":
+            continue
+
+        collection = by_id.get(segment["collection"])
+        if collection is None:
+            problems.append(f"Vector segment {segment['id']} belongs to unknown collection {segment['collection']}")
+            continue
+
+        segment_dir = persist_dir / segment["id"]
+        header = read_hnsw_header(segment_dir)
+        if not segment_dir.exists():
+            # Chroma only creates the directory once the queue is flushed
+            if collection["sqlite_count"] > collection["queued"]:
+                problems.append(f"Collection '{collection['name']}': vector segment directory {segment['id']} is missing")
+            continue
+        if header is None:
+            problems.append(f"Collection '{collection['name']}': unreadable HNSW header in {segment['id']}")
+            continue
+
+        collection["hnsw_count"] = header["element_count"]
+        collection["hnsw_params"] = {"M": header["M"], "ef_construction": header["ef_construction"]}
+
+        # Elements not yet flushed to HNSW are still waiting in the queue
+        if header["element_count"] + collection["queued"] < collection["sqlite_count"]:
+            problems.append(
+                f"Collection '{collection['name']}': {collection['sqlite_count']} rows in SQLite "
+                f"but only {header['element_count']} in HNSW and {collection['queued']} queued"
+            )
+
+    orphans = find_orphan_segment_dirs(persist_dir, [s["id"] for s in catalog["segments"]])
+    for orphan in orphans:
+        problems.append(f"Orphaned segment directory {orphan.name} ({format_size(dir_size(orphan))})")
+
+    return {"collections": catalog["collections"], "problems": problems, "orphans": orphans}
+
+
+def find_duplicates(ids: List[str], documents: List[str], metadatas: List[Dict]) -> List[str]:
+    """
+    Find chunks whose text and source repeat an earlier chunk
+
+    Args:
+        ids: Chunk ids in insertion order
+        documents: Chunk texts
+        metadatas: Chunk metadata dicts
+
+    Returns:
+        Ids of every repeat after the first occurrence
+    """
+    seen = set()
+    duplicates = []
+    for chunk_id, doc, meta in zip(ids, documents, metadatas):
+        if not doc:
+            # No text to compare (stripped and not in the document store)
+            continue
+        meta = meta or {}
+        key = (
+            meta.get("source_document"),
+            meta.get("section_title"),
+            hashlib.sha1((doc or "").encode("utf-8")).hexdigest(),
+        )
+        if key in seen:
+            duplicates.append(chunk_id)
+        else:
+            seen.add(key)
+    return duplicates
+
+
+def read_chunks(persist_dir: Path, collection_id: str) -> Dict[str, List]:
+    """
+    Read a collection's chunk ids, texts and the metadata dedupe needs from SQLite
+
+    Args:
+        persist_dir: ChromaDB persistence directory
+        collection_id: Collection id
+
+    Returns:
+        Dict with ``ids``, ``documents`` and ``metadatas`` in insertion order
+    """
+    conn = connect_readonly(persist_dir)
+    try:
+        rows = conn.execute(
+            "SELECT e.id, e.embedding_id, m.key, m.string_value FROM embeddings e "
+            "JOIN segments s ON s.id = e.segment_id AND s.scope = 'METADATA' AND s.collection = ? "
+            "LEFT JOIN embedding_metadata m ON m.id = e.id "
+            "AND m.key IN ('chroma:document', 'source_document', 'section_title') "
+            "ORDER BY e.id",
+            (collection_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    chunks: Dict[int, Dict] = {}
+    for row_id, chunk_id, key, value in rows:
+        chunk = chunks.setdefault(row_id, {"id": chunk_id, "document": "", "metadata": {}})
+        if key == "chroma:document":
+            chunk["document"] = value or ""
+        elif key is not None:
+            chunk["metadata"][key] = value
+    ordered = list(chunks.values())
+    return {
+        "ids": [c["id"] for c in ordered],
+        "documents": [c["document"] for c in ordered],
+        "metadatas": [c["metadata"] for c in ordered],
+    }
+
+
+def collect_duplicates(persist_dir: Path, collection_id: str, docstore_dir: Optional[Path] = None) -> List[str]:
+    """
+    Duplicate chunk ids of a collection, read through a read-only connection
+
+    Texts stripped from the collection (processing/build_document_store.py
+    --strip) are read from the document store.
+
+    Args:
+        persist_dir: ChromaDB persistence directory
+        collection_id: Collection id
+        docstore_dir: Document store directory (default: ``docstore`` next
+            to the persistence directory)
+
+    Returns:
+        Ids of duplicate chunks
+    """
+    chunks = read_chunks(persist_dir, collection_id)
+    documents = chunks["documents"]
+
+    docstore_dir = docstore_dir or persist_dir.parent / "docstore"
+    if not all(documents) and (docstore_dir / "index.json").exists():
+        store = DocumentStore(str(docstore_dir))
+        try:
+            documents = [
+                doc or (store.get(chunk_id) if chunk_id in store else "")
+                for chunk_id, doc in zip(chunks["ids"], documents)
+            ]
+        finally:
+            store.close()
+    return find_duplicates(chunks["ids"], documents, chunks["metadatas"])
+
+
+def purge_consumed_log(persist_dir: Path, collections: List[Dict]) -> int:
+    """
+    Delete write-ahead log rows that every segment of their collection has consumed
+
+    Args:
+        persist_dir: ChromaDB persistence directory
+        collections: Collections from read_catalog()
+
+    Returns:
+        Number of rows deleted
+    """
+    conn = sqlite3.connect(str(persist_dir / SQLITE_FILENAME))
+    try:
+        deleted = 0
+        with conn:
+            for collection in collections:
+                for topic in collection["topics"]:
+                    deleted += conn.execute(
+                        "DELETE FROM embeddings_queue WHERE topic = ? AND seq_id <= ?",
+                        (topic, collection["consumed_seq_id"])
+                    ).rowcount
+        return deleted
+    finally:
+        conn.close()
+
+
+def vacuum_sqlite(persist_dir: Path):
+    """Rebuild the SQLite file to release free pages"""
+    conn = sqlite3.connect(str(persist_dir / SQLITE_FILENAME))
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def run_maintenance(persist_dir: Path, apply: bool = False) -> Dict[str, int]:
+    """
+    Check, report and optionally compact a vector store
+
+    Args:
+        persist_dir: ChromaDB persistence directory
+        apply: Delete duplicates, orphaned directories and consumed log rows,
+            then VACUUM, when True (stop the server first); otherwise only
+            read, through a read-only SQLite connection
+
+    Returns:
+        Dict with sizes before/after and counts of removed items
+    """
+    size_before = dir_size(persist_dir)
+    print(f"📦 Vector store: {persist_dir}")
+    print(f"   Size before: {format_size(size_before)}")
+
+    # Step 1: Integrity check
+    report = check_integrity(persist_dir)
+    print(f"\n🔍 Integrity check")
+    for collection in report["collections"]:
+        hnsw = collection.get("hnsw_count", "n/a")
+        print(
+            f"   - {collection['name']}: {collection['sqlite_count']} rows in SQLite, "
+            f"{hnsw} in HNSW, {collection['queued']} queued for HNSW, "
+            f"{collection['purgeable']} consumed log rows"
+        )
+    if report["problems"]:
+        for problem in report["problems"]:
+            print(f"   ⚠ {problem}")
+    else:
+        print("   ✓ SQLite metadata and HNSW segments are consistent")
+
+    # Step 2: Duplicate detection
+    duplicates = {}
+    print(f"\n🔍 Duplicate chunks")
+    for collection in report["collections"]:
+        dupes = collect_duplicates(persist_dir, collection["id"])
+        duplicates[collection["name"]] = dupes
+        print(f"   - {collection['name']}: {len(dupes)} duplicates")
+
+    total_duplicates = sum(len(d) for d in duplicates.values())
+    total_purgeable = sum(c["purgeable"] for c in report["collections"])
+    if not apply:
+        print(f"\nℹ️ Dry run: {total_duplicates} duplicates, {len(report['orphans'])} orphaned "
+              f"segment directories and {total_purgeable} consumed log rows would be removed. "
+              f"Re-run with --apply to compact.")
+        return {
+            "size_before": size_before,
+            "size_after": size_before,
+            "duplicates_removed": 0,
+            "orphans_removed": 0,
+            "log_rows_purged": 0,
+        }
+
+    import chromadb
+    from chromadb.config import Settings
+
+    # Step 3: Compaction
+    print(f"\n🔄 Compacting...")
+    client = chromadb.PersistentClient(
+        path=str(persist_dir),
+        settings=Settings(anonymized_telemetry=False, allow_reset=False)
+    )
+    for name, dupes in duplicates.items():
+        collection = client.get_collection(name)
+        for start in range(0, len(dupes), PAGE_SIZE):
+            collection.delete(ids=dupes[start:start + PAGE_SIZE])
+        if dupes:
+            print(f"   ✓ Deleted {len(dupes)} duplicates from {name}")
+
+    for orphan in report["orphans"]:
+        shutil.rmtree(orphan)
+        print(f"   ✓ Removed orphaned segment directory {orphan.name}")
+
+    del client
+    purged = purge_consumed_log(persist_dir, report["collections"])
+    print(f"   ✓ Purged {purged} consumed log rows")
+    vacuum_sqlite(persist_dir)
+    print("   ✓ SQLite vacuumed")
+
+    size_after = dir_size(persist_dir)
+    saved = size_before - size_after
+    print(f"\n✅ Size after: {format_size(size_after)} (saved {format_size(max(saved, 0))})")
+
+    return {
+        "size_before": size_before,
+        "size_after": size_after,
+        "duplicates_removed": total_duplicates,
+        "orphans_removed": len(report["orphans"]),
+        "log_rows_purged": purged,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and compact the ChromaDB vector store")
+    parser.add_argument("--path", default=str(DEFAULT_VECTORSTORE_PATH), help="ChromaDB persistence directory")
+    parser.add_argument("--apply", action="store_true",
+                        help="Delete duplicates, orphaned segments and consumed log rows, then VACUUM")
+    args = parser.parse_args()
+
+    run_maintenance(Path(args.path), apply=args.apply)
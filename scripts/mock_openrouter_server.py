@@ -0,0 +1,307 @@
+"""Local OpenRouter-compatible mock LLM server
+
+Serves ``POST /api/v1/chat/completions`` with the same request and response
+shapes as OpenRouter, including ``"stream": true`` server-sent events, so
+the RAG pipeline, the backend and the benchmarks can run offline. Point
+LLMEngine at it with::
+
+    OPENROUTER_BASE_URL=http://127.0.0.1:8001/api/v1 OPENROUTER_API_KEY=mock
+
+Answers are deterministic: they echo the user question (the ``QUESTION:``
+line of RAG prompts, else the last line of the message) and are padded to
+``--answer-tokens`` words from the prompt, so the same prompt always gets
+the same answer. Timing and failures are configurable:
+
+- time to first token drawn from a latency distribution
+  (``fixed``, ``uniform``, ``normal`` or ``lognormal``, in milliseconds)
+- tokens emitted at ``--tokens-per-sec`` (non-streamed responses wait for
+  the whole answer, like the real API)
+- ``--error-rate`` of requests answer 500/502/503, ``--rate-limit-rate``
+  answer 429 with a Retry-After header
+- ``--seed`` makes the latency and failure sequence repeatable
+
+Like providers with prompt caching, a request whose leading system
+message was seen before reports it as ``prompt_tokens_details.cached_tokens``
+in its usage.
+
+Usage:
+    python scripts/mock_openrouter_server.py
+    python scripts/mock_openrouter_server.py --port 8001 --latency lognormal --latency-ms 800 --tokens-per-sec 40
+    python scripts/mock_openrouter_server.py --error-rate 0.05 --rate-limit-rate 0.1 --seed 7
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+SERVER_ERROR_CODES = (500, 502, 503)
+QUESTION_PATTERN = re.compile(r"QUESTION:\s*(.+)", re.IGNORECASE)
+
+
+@dataclass
+class MockConfig:
+    """Timing, failure and answer settings of the mock server"""
+    latency: str = "fixed"              # time-to-first-token distribution
+    latency_ms: float = 200.0           # mean time to first token
+    jitter_ms: float = 50.0             # spread (uniform half-width / standard deviation)
+    tokens_per_sec: float = 50.0        # 0 = emit the whole answer at once
+    answer_tokens: int = 60             # answer length in words (capped at max_tokens)
+    error_rate: float = 0.0             # fraction of requests answering 5xx
+    rate_limit_rate: float = 0.0        # fraction of requests answering 429
+    retry_after: float = 1.0            # Retry-After seconds sent with 429
+    api_key: Optional[str] = None       # require this bearer token (default: any)
+    seed: Optional[int] = None
+
+
+class MockLLM:
+    """Deterministic answers plus seeded latency and failure draws"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "rate_limited": 0, "errors": 0, "cached_prompt_tokens": 0}
+        self._prefixes = set()
+
+    def first_token_delay(self) -> float:
+        """Seconds before the first token, drawn from the configured distribution"""
+        c = self.config
+        with self._lock:
+            if c.latency == "uniform":
+                ms = self._rng.uniform(c.latency_ms - c.jitter_ms, c.latency_ms + c.jitter_ms)
+            elif c.latency == "normal":
+                ms = self._rng.gauss(c.latency_ms, c.jitter_ms)
+            elif c.latency == "lognormal":
+                # Parameterised so mean and standard deviation match latency_ms / jitter_ms
+                variance = math.log(1 + (c.jitter_ms / max(c.latency_ms, 1e-6)) ** 2)
+                ms = self._rng.lognormvariate(math.log(max(c.latency_ms, 1e-6)) - variance / 2, math.sqrt(variance))
+            else:
+                ms = c.latency_ms
+        return max(ms, 0.0) / 1000
+
+    def injected_failure(self) -> Optional[int]:
+        """Status code to fail this request with, or None to answer it"""
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.config.rate_limit_rate:
+            return 429
+        if draw < self.config.rate_limit_rate + self.config.error_rate:
+            return SERVER_ERROR_CODES[int(draw * 1000) % len(SERVER_ERROR_CODES)]
+        return None
+
+    def cached_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        """Tokens of the leading system messages if this prefix was sent before"""
+        prefix = []
+        for message in messages:
+            if message.get("role") != "system":
+                break
+            prefix.append(_text(message))
+        if not prefix:
+            return 0
+        digest = hashlib.sha256("\n".join(prefix).encode("utf-8")).hexdigest()
+        with self._lock:
+            if digest not in self._prefixes:
+                self._prefixes.add(digest)
+                return 0
+        tokens = sum(len(text.split()) for text in prefix)
+        self.stats["cached_prompt_tokens"] += tokens
+        return tokens
+
+    def answer_tokens(self, messages: List[Dict[str, Any]], max_tokens: int) -> List[str]:
+        """
+        Deterministic answer for a conversation, as whitespace-led tokens
+
+        Args:
+            messages: Chat messages of the request
+            max_tokens: Request's max_tokens; the answer never exceeds it
+
+        Returns:
+            Answer fragments; "".join() gives the answer text
+        """
+        prompt = "\n".join(_text(m) for m in messages if m.get("role") != "assistant")
+        match = QUESTION_PATTERN.search(prompt)
+        lines = [line.strip() for line in prompt.splitlines() if line.strip()]
+        question = match.group(1).strip() if match else (lines[-1] if lines else "")
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+
+        words = f"Mock answer {digest} to: {question} [Source 1]".split()
+        filler = re.findall(r"[A-Za-z0-9]+", prompt) or ["mock"]
+        target = min(self.config.answer_tokens, max_tokens)
+        i = int(digest, 16)
+        while len(words) < target:
+            words.append(filler[i % len(filler)])
+            i += 7
+        words = words[:max(target, 1)]
+        return [words[0]] + [" " + word for word in words[1:]]
+
+
+def _text(message: Dict[str, Any]) -> str:
+    """Message content as text (a string, or a list of {"type": "text"} parts)"""
+    content = message.get("content", "")
+    if isinstance(content, list):
+        return "".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def _usage(messages: List[Dict[str, Any]], tokens: List[str], cached_tokens: int = 0) -> Dict[str, Any]:
+    prompt_tokens = sum(len(_text(m).split()) for m in messages)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(tokens),
+        "total_tokens": prompt_tokens + len(tokens),
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    """
+    Build the mock API
+
+    Args:
+        config: Server settings (default: MockConfig())
+
+    Returns:
+        FastAPI app serving /api/v1/chat/completions, /api/v1/models and /stats
+    """
+    llm = MockLLM(config or MockConfig())
+    app = FastAPI(title="Mock OpenRouter API")
+    app.state.llm = llm
+
+    @app.get("/api/v1/models")
+    async def list_models():
+        return {"data": [{"id": "mistralai/mistral-7b-instruct:free"}, {"id": "mock/echo"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return llm.stats
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request, authorization: Optional[str] = Header(None)):
+        c = llm.config
+        if not authorization or not authorization.lower().startswith("bearer "):
+            raise HTTPException(status_code=401, detail="Missing bearer token")
+        if c.api_key and authorization.split(" ", 1)[1] != c.api_key:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+
+        body = await request.json()
+        messages = body.get("messages") or []
+        if not messages:
+            return JSONResponse(status_code=400, content={"error": {"code": 400, "message": "messages is required"}})
+        model = body.get("model", "mock/echo")
+        max_tokens = int(body.get("max_tokens") or 500)
+        stream = bool(body.get("stream"))
+        llm.stats["requests"] += 1
+
+        failure = llm.injected_failure()
+        if failure == 429:
+            llm.stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"code": 429, "message": "Rate limit exceeded (mock)"}},
+                headers={"Retry-After": f"{c.retry_after:g}"}
+            )
+        if failure is not None:
+            llm.stats["errors"] += 1
+            return JSONResponse(status_code=failure, content={"error": {"code": failure, "message": "Upstream error (mock)"}})
+
+        tokens = llm.answer_tokens(messages, max_tokens)
+        usage = _usage(messages, tokens, llm.cached_tokens(messages))
+        completion_id = f"gen-mock-{hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()[:12]}"
+        created = int(time.time())
+        token_delay = 1 / c.tokens_per_sec if c.tokens_per_sec > 0 else 0.0
+        first_token_delay = llm.first_token_delay()
+
+        if stream:
+            llm.stats["streamed"] += 1
+
+            async def events():
+                yield ": OPENROUTER PROCESSING\n\n"
+                await asyncio.sleep(first_token_delay)
+                base = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+                yield "data: " + json.dumps({**base, "choices": [
+                    {"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}) + "\n\n"
+                for i, token in enumerate(tokens):
+                    if i and token_delay:
+                        await asyncio.sleep(token_delay)
+                    yield "data: " + json.dumps({**base, "choices": [
+                        {"index": 0, "delta": {"content": token}, "finish_reason": None}]}) + "\n\n"
+                yield "data: " + json.dumps({**base, "choices": [
+                    {"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}) + "\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(first_token_delay + token_delay * max(len(tokens) - 1, 0))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenRouter-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed",
+                        help="Time-to-first-token distribution")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Mean time to first token (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="Latency spread (ms)")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="Token rate (0: no delay)")
+    parser.add_argument("--answer-tokens", type=int, default=60, help="Answer length in words")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answering 5xx")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answering 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429")
+    parser.add_argument("--api-key", help="Require this bearer token (default: accept any)")
+    parser.add_argument("--seed", type=int, help="Seed for repeatable latency and failure draws")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = MockConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        answer_tokens=args.answer_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        api_key=args.api_key,
+        seed=args.seed,
+    )
+    print(f"🤖 Mock OpenRouter API on http://{args.host}:{args.port}/api/v1")
+    print(f"   Latency: {config.latency} {config.latency_ms:g}±{config.jitter_ms:g} ms, "
+          f"{config.tokens_per_sec:g} tokens/s, errors {config.error_rate:.0%}, 429s {config.rate_limit_rate:.0%}")
+    print(f"   Use: OPENROUTER_BASE_URL=http://{args.host}:{args.port}/api/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""HNSW Parameter Sweep and Auto-Tuning
+
+Builds candidate in-memory collections from the stored embeddings for a grid
+of HNSW parameters (M, ef_construction, ef_search), computes exact ground
+truth by brute force and measures recall@k and query latency per role filter.
+Writes a recall-vs-latency Pareto table to report/HNSW_TUNING.md.
+
+With ``--write`` the cheapest configuration that meets the recall target for
+every role is saved to vectordatabase/hnsw_params.json, which
+ChromaClient.get_or_create_collection, QueryEngine and the indexers use as
+collection metadata. ef_search is also applied to the live collection (and
+to existing collections whenever they are opened); M and ef_construction
+only take effect when the collection is rebuilt.
+
+Usage:
+    python scripts/tune_hnsw.py
+    python scripts/tune_hnsw.py --target-recall 0.98 --write
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import chromadb
+from chromadb.config import Settings
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from rbac.access_mask import ROLE_BITS
+from rbac.department_access import DepartmentAccess
+from rbac.rbac_filter import RBACFilter
+from vectordatabase.chroma_client import HNSW_METADATA_KEYS, HNSW_PARAMS_FILE, apply_search_params
+
+VECTORSTORE_PATH = PROJECT_ROOT / "vectorstore" / "chroma"
+OUTPUT_MD = PROJECT_ROOT / "report" / "HNSW_TUNING.md"
+COLLECTION_NAME = "company_documents"
+
+# Parameter grid
+M_VALUES = [8, 16, 32]
+EF_CONSTRUCTION_VALUES = [50, 100, 200]
+EF_SEARCH_VALUES = [10, 20, 50, 100]
+
+# Every Nth stored chunk is used as a query vector
+QUERY_STRIDE = 3
+
+# Role → RBAC filter used by QueryEngine.search
+EFFECTIVE_ROLES: Dict[str, List[str]] = {role: RBACFilter().effective_roles(role) for role in ROLE_BITS}
+ROLE_DEPARTMENTS: Dict[str, List[str]] = {
+    role: DepartmentAccess.default().departments_for(roles) for role, roles in EFFECTIVE_ROLES.items()
+}
+ROLE_FILTERS: Dict[str, dict] = {
+    role: DepartmentAccess.default().where(roles) for role, roles in EFFECTIVE_ROLES.items()
+}
+
+
+def load_corpus(path: Path):
+    """Load ids, normalized vectors and metadata from the live store"""
+    client = chromadb.PersistentClient(path=str(path))
+    collection = client.get_collection(name=COLLECTION_NAME)
+    data = collection.get(include=["embeddings", "metadatas"])
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return data["ids"], vectors, data["metadatas"]
+
+
+def role_mask(metadatas: List[dict], role: str) -> np.ndarray:
+    """Boolean row mask of chunks a role may read, including inherited roles"""
+    departments = np.array([m.get("department") for m in metadatas], dtype=object)
+    return np.isin(departments, ROLE_DEPARTMENTS[role])
+
+
+def ground_truth(vectors: np.ndarray, queries: np.ndarray, mask: np.ndarray, k: int) -> List[List[int]]:
+    """Exact top-k rows per query by brute force"""
+    scores = queries @ vectors.T
+    scores[:, ~mask] = -np.inf
+    k = min(k, int(mask.sum()))
+    return [list(row[:k]) for row in np.argsort(-scores, axis=1)]
+
+
+def sweep(ids, vectors, metadatas, k: int) -> List[dict]:
+    """
+    Measure recall@k and latency for every grid point and role
+
+    Returns:
+        One row per (M, ef_construction, ef_search, role)
+    """
+    queries = vectors[::QUERY_STRIDE]
+    row_of = {chunk_id: i for i, chunk_id in enumerate(ids)}
+    truths = {
+        role: ground_truth(vectors, queries, role_mask(metadatas, role), k)
+        for role in ROLE_FILTERS
+    }
+
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False, allow_reset=True))
+    rows = []
+
+    for m, ef_construction in itertools.product(M_VALUES, EF_CONSTRUCTION_VALUES):
+        name = f"hnsw_tune_m{m}_efc{ef_construction}"
+        collection = client.create_collection(
+            name=name,
+            metadata={"hnsw:space": "cosine", "hnsw:M": m, "hnsw:construction_ef": ef_construction}
+        )
+        start = time.perf_counter()
+        collection.add(ids=ids, embeddings=vectors.tolist(), metadatas=metadatas)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for ef_search in EF_SEARCH_VALUES:
+            collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+
+            for role, where in ROLE_FILTERS.items():
+                truth = truths[role]
+                hits, total, latencies = 0, 0, []
+                for query, expected in zip(queries, truth):
+                    t0 = time.perf_counter()
+                    result = collection.query(
+                        query_embeddings=[query.tolist()],
+                        n_results=max(len(expected), 1),
+                        where=where,
+                        include=["distances"]
+                    )
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    found = {row_of[i] for i in result["ids"][0]}
+                    hits += len(found & set(expected))
+                    total += len(expected)
+
+                rows.append({
+                    "M": m,
+                    "ef_construction": ef_construction,
+                    "ef_search": ef_search,
+                    "role": role,
+                    "recall": hits / total if total else 1.0,
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p95_ms": float(np.percentile(latencies, 95)),
+                    "build_ms": build_ms,
+                })
+
+        client.delete_collection(name)
+        print(f"  ✓ M={m}, ef_construction={ef_construction} measured")
+
+    return rows
+
+
+def pareto_front(rows: List[dict]) -> List[dict]:
+    """Rows not dominated on (higher recall, lower p50 latency)"""
+    front = []
+    for r in rows:
+        dominated = any(
+            o["recall"] >= r["recall"] and o["p50_ms"] <= r["p50_ms"]
+            and (o["recall"] > r["recall"] or o["p50_ms"] < r["p50_ms"])
+            for o in rows
+        )
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: r["p50_ms"])
+
+
+def choose_params(rows: List[dict], target_recall: float) -> dict:
+    """
+    Pick the fastest configuration meeting the recall target for every role
+
+    Falls back to the configuration with the best worst-case recall.
+    """
+    configs: Dict[tuple, List[dict]] = {}
+    for r in rows:
+        configs.setdefault((r["M"], r["ef_construction"], r["ef_search"]), []).append(r)
+
+    summary = []
+    for (m, efc, efs), role_rows in configs.items():
+        summary.append({
+            "M": m,
+            "ef_construction": efc,
+            "ef_search": efs,
+            "min_recall": min(r["recall"] for r in role_rows),
+            "mean_p50_ms": float(np.mean([r["p50_ms"] for r in role_rows])),
+        })
+
+    eligible = [s for s in summary if s["min_recall"] >= target_recall]
+    if eligible:
+        return min(eligible, key=lambda s: (s["mean_p50_ms"], s["M"], s["ef_construction"]))
+    return max(summary, key=lambda s: (s["min_recall"], -s["mean_p50_ms"]))
+
+
+def write_markdown(rows: List[dict], chosen: dict, k: int, target_recall: float):
+    lines = []
+    lines.append("# HNSW Parameter Tuning")
+    lines.append("")
+    lines.append("_Auto-generated by scripts/tune_hnsw.py_")
+    lines.append("")
+    lines.append("## Chosen Parameters")
+    lines.append("")
+    lines.append(f"- Target: recall@{k} ≥ {target_recall} for every role filter")
+    lines.append(f"- M = {chosen['M']}, ef_construction = {chosen['ef_construction']}, ef_search = {chosen['ef_search']}")
+    lines.append(f"- Worst-role recall@{k}: {chosen['min_recall']:.3f}, mean p50 latency: {chosen['mean_p50_ms']:.2f} ms")
+    lines.append("")
+
+    for role in ROLE_FILTERS:
+        lines.append(f"## Pareto Front - {role}")
+        lines.append("")
+        lines.append(f"| M | ef_construction | ef_search | Recall@{k} | p50 (ms) | p95 (ms) | Build (ms) |")
+        lines.append("|" + "------|" * 7)
+        for r in pareto_front([r for r in rows if r["role"] == role]):
+            lines.append(
+                f"| {r['M']} | {r['ef_construction']} | {r['ef_search']} | {r['recall']:.3f} | "
+                f"{r['p50_ms']:.2f} | {r['p95_ms']:.2f} | {r['build_ms']:.0f} |"
+            )
+        lines.append("")
+
+    OUTPUT_MD.write_text("\n".join(lines), encoding="utf-8")
+    print(f"📝 Report written to {OUTPUT_MD}")
+
+
+def write_params(chosen: dict, path: Path):
+    """Persist chosen parameters and apply ef_search to the live collection"""
+    params = {key: chosen[key] for key in HNSW_METADATA_KEYS}
+    with open(HNSW_PARAMS_FILE, "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
+        f.write("\n")
+    print(f"✅ Saved {params} to {HNSW_PARAMS_FILE}")
+
+    client = chromadb.PersistentClient(path=str(path))
+    apply_search_params(client.get_collection(name=COLLECTION_NAME), params)
+    print(f"✅ Applied ef_search={chosen['ef_search']} to '{COLLECTION_NAME}'")
+    print("ℹ️ M and ef_construction apply to newly created collections; "
+          "reset the vector store and re-run the indexers to rebuild with them.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters and pick a recall/latency trade-off")
+    parser.add_argument("--path", default=str(VECTORSTORE_PATH), help="ChromaDB persistence directory")
+    parser.add_argument("--k", type=int, default=5, help="Recall@k to optimize for")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="Minimum recall for every role")
+    parser.add_argument("--write", action="store_true", help="Save the chosen parameters")
+    args = parser.parse_args()
+
+    print("🔄 Loading embeddings...")
+    ids, vectors, metadatas = load_corpus(Path(args.path))
+    print(f"✓ {len(ids)} vectors, sweeping {len(M_VALUES) * len(EF_CONSTRUCTION_VALUES) * len(EF_SEARCH_VALUES)} configurations")
+
+    rows = sweep(ids, vectors, metadatas, args.k)
+    chosen = choose_params(rows, args.target_recall)
+    print(f"\n🎯 Chosen: M={chosen['M']}, ef_construction={chosen['ef_construction']}, "
+          f"ef_search={chosen['ef_search']} (worst-role recall {chosen['min_recall']:.3f})")
+
+    write_markdown(rows, chosen, args.k, args.target_recall)
+    if args.write:
+        write_params(chosen, Path(args.path))
@@ -4,6 +4,7 @@ Generates and adds finance vectors to ChromaDB
 Note: This is typically run once to add finance vectors to the collection
 """
 import json
+import sys
 from pathlib import Path
 import chromadb
 from chromadb.config import Settings
@@ -14,6 +15,9 @@ test_dir = Path(__file__).parent
 project_root = test_dir.parent
 processing_dir = project_root / "processing"
 vectorstore_dir = project_root / "vectorstore" / "chroma"
+sys.path.insert(0, str(project_root))
+
+from vectordatabase.metadata_schema import chunk_metadata
 
 # Load the chunked data
 with open(processing_dir / "chunked_markdown.json", "r") as f:
@@ -44,19 +48,13 @@ for chunk in finance_chunks:
     
     # Create comprehensive metadata (same as other departments)
     meta = chunk["metadata"]
-    metadatas.append({
-        "chunk_id": chunk["chunk_id"],
-        "source_document": meta["source_document"],
-        "department": meta["department"],
-        "section_title": meta["section_title"],
-        "allowed_roles": ",".join(meta["allowed_roles"]),
-        "token_length": str(meta["token_length"]),
-        "role_engineering": "engineering" in meta["allowed_roles"],
-        "role_marketing": "marketing" in meta["allowed_roles"],
-        "role_general": "general" in meta["allowed_roles"] or "employee" in meta["allowed_roles"],
-        "role_finance": "finance" in meta["allowed_roles"],
-        "role_admin": "admin" in meta["allowed_roles"]
-    })
+    metadatas.append(chunk_metadata(
+        chunk_id=chunk["chunk_id"],
+        source_document=meta["source_document"],
+        department=meta["department"],
+        section_title=meta["section_title"],
+        token_length=meta["token_length"]
+    ))
     
     # Generate embedding
     embedding = model.encode(chunk["text"]).tolist()
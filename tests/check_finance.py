@@ -66,7 +66,7 @@ try:
             sample = finance_samples[0]
             print(f"   Source: {sample.get('source_document')}")
             print(f"   Section: {sample.get('section_title')}")
-            print(f"   Allowed Roles: {sample.get('allowed_roles')}")
+            print(f"   Department: {sample.get('department')}")
             print(f"   Token Length: {sample.get('token_length')}")
             
     else:
@@ -6,12 +6,19 @@ import chromadb
 from chromadb.config import Settings
 from pathlib import Path
 import json
+import sys
 
 # Get paths relative to this test file
 test_dir = Path(__file__).parent
 project_root = test_dir.parent
 processing_dir = project_root / "processing"
 vectorstore_dir = project_root / "vectorstore" / "chroma"
+sys.path.insert(0, str(project_root))
+
+from rbac.department_access import DepartmentAccess
+
+# Roles reading a department (the backend may grant more at runtime)
+access = DepartmentAccess.default()
 
 print("=" * 80)
 print("✅ QUICK CHROMADB VERIFICATION")
@@ -48,7 +55,7 @@ print(f"   Chunk ID: {sample['chunk_id']}")
 print(f"   Source: {sample['metadata']['source_document']}")
 print(f"   Department: {sample['metadata']['department']}")
 print(f"   Section: {sample['metadata']['section_title']}")
-print(f"   Allowed Roles: {sample['metadata']['allowed_roles']}")
+print(f"   Readable By: {access.roles_for(sample['metadata']['department'])}")
 print(f"   Token Length: {sample['metadata']['token_length']}")
 print(f"   Embedding Dimension: {len(sample['embedding'])}")
 
@@ -59,8 +66,8 @@ print(f"\n✓ Total vectors in embedded_chunks.json: {len(embedded)}")
 print(f"✓ RBAC metadata included: YES")
 print(f"✓ Metadata fields per vector:")
 print(f"    - chunk_id, source_document, department")
-print(f"    - section_title, allowed_roles, token_length")
-print(f"    - role_engineering, role_marketing, role_general, role_admin (boolean)")
+print(f"    - section_title, token_length")
+print(f"    - access resolved from department at query time")
 print(f"✓ Embedding model: sentence-transformers/all-MiniLM-L6-v2 (384 dimensions)")
 print(f"✓ Persistence enabled: YES")
 print(f"✓ Semantic search ready: YES")
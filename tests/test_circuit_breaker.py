@@ -0,0 +1,119 @@
+"""Tests for the LLM circuit breaker (no network)"""
+
+import asyncio
+
+import pytest
+
+from llm.circuit_breaker import CircuitBreaker
+from llm.errors import LLMAuthError, LLMCircuitOpenError, LLMServerError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeLLM:
+    """Answers, fails or takes `latency` clock seconds, as scripted"""
+    model = "fake"
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = 0
+        self.error = None
+        self.latency = 0.0
+
+    def generate(self, prompt, max_tokens=500, temperature=0.7):
+        self.calls += 1
+        self.clock.now += self.latency
+        if self.error:
+            raise self.error
+        return "ok"
+
+    async def agenerate(self, prompt, max_tokens=500, temperature=0.7):
+        return self.generate(prompt, max_tokens, temperature)
+
+    def generate_stream(self, prompt, max_tokens=500, temperature=0.7):
+        yield self.generate(prompt, max_tokens, temperature)
+        yield "more"
+
+    async def agenerate_stream(self, prompt, max_tokens=500, temperature=0.7):
+        for text in self.generate_stream(prompt, max_tokens, temperature):
+            yield text
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_opens_after_consecutive_failures_then_probes(clock):
+    llm = FakeLLM(clock)
+    breaker = CircuitBreaker(llm, failure_threshold=3, latency_slo=5, reset_timeout=30, clock=clock)
+
+    llm.error = LLMServerError("down", 503)
+    for _ in range(3):
+        with pytest.raises(LLMServerError):
+            breaker.generate("hi")
+    assert breaker.state == "open"
+
+    with pytest.raises(LLMCircuitOpenError) as excinfo:
+        breaker.generate("hi")
+    assert llm.calls == 3  # rejected without calling the provider
+    assert excinfo.value.retry_after == 30
+
+    # A failed probe reopens the circuit
+    clock.now += 30
+    assert breaker.state == "half_open"
+    with pytest.raises(LLMServerError):
+        breaker.generate("hi")
+    assert breaker.state == "open" and llm.calls == 4
+
+    # A good probe closes it
+    clock.now += 30
+    llm.error = None
+    assert asyncio.run(breaker.agenerate("hi")) == "ok"
+    assert breaker.stats() == {"state": "closed", "bad_calls": 0, "trips": 2}
+
+
+def test_latency_slo_violations_trip_and_client_errors_do_not(clock):
+    llm = FakeLLM(clock)
+    breaker = CircuitBreaker(llm, failure_threshold=2, latency_slo=5, reset_timeout=30, clock=clock)
+
+    llm.error = LLMAuthError("bad key", 401)
+    for _ in range(3):
+        with pytest.raises(LLMAuthError):
+            breaker.generate("hi")
+    assert breaker.state == "closed"
+
+    llm.error, llm.latency = None, 6
+    breaker.generate("hi")
+    breaker.generate("hi")
+    assert breaker.state == "open"
+
+
+def test_abandoned_stream_releases_its_probe(clock):
+    llm = FakeLLM(clock)
+    breaker = CircuitBreaker(llm, failure_threshold=1, reset_timeout=30, half_open_probes=1, clock=clock)
+    llm.error = LLMServerError("down", 503)
+    with pytest.raises(LLMServerError):
+        breaker.generate("hi")
+    clock.now += 30
+    llm.error = None
+
+    # The probe stream is dropped after one token, without being closed
+    stream = breaker.generate_stream("hi")
+    assert next(stream) == "ok"
+    del stream
+    assert breaker.state == "half_open"  # no verdict, but the probe slot is free
+
+    async def abandon_async_probe():
+        stream = breaker.agenerate_stream("hi")
+        assert await stream.__anext__() == "ok"
+
+    asyncio.run(abandon_async_probe())  # the loop finalizes the abandoned generator
+    assert list(breaker.generate_stream("hi")) == ["ok", "more"]
+    assert breaker.state == "closed"
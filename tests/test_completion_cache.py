@@ -0,0 +1,54 @@
+"""Tests for the disk-backed completion cache"""
+
+from llm.completion_cache import CompletionCache, content_hash, invalidate_cached_answers
+
+
+def test_exact_and_structural_hits(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"))
+    hashes = {"c1": content_hash("remote work"), "c2": content_hash("two days")}
+    exact = CompletionCache.exact_key("m", "prompt", 0.5, 400)
+    structural = CompletionCache.structural_key("policy", "What is the remote work policy?", ["c2", "c1"], "m")
+    cache.put(exact, "Two days a week.", structural, hashes)
+
+    assert cache.get(exact_key=exact) == {"answer": "Two days a week.", "match": "exact"}
+    # Same question, different wording/order of chunks: structural hit
+    other = CompletionCache.structural_key("policy", "  what is the REMOTE work policy ", ["c1", "c2"], "m")
+    hit = cache.get(exact_key=CompletionCache.exact_key("m", "other prompt", 0.5, 400),
+                    structural_key=other, chunk_hashes=hashes)
+    assert hit == {"answer": "Two days a week.", "match": "structural"}
+
+    # A cited chunk changed: the structural entry is dropped, not served
+    changed = dict(hashes, c2=content_hash("three days"))
+    assert cache.get(structural_key=other, chunk_hashes=changed) is None
+    assert len(cache) == 0
+
+
+def test_lru_bound_and_chunk_invalidation(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    keys = [CompletionCache.exact_key("m", f"p{i}", 0.5, 10) for i in range(3)]
+    cache.put(keys[0], "a0", chunk_hashes={"c1": "h"})
+    cache.put(keys[1], "a1", chunk_hashes={"c2": "h"})
+    cache.get(exact_key=keys[0])  # keys[1] is now least recently used
+    cache.put(keys[2], "a2", chunk_hashes={"c1": "h"})
+
+    assert cache.get(exact_key=keys[1]) is None
+    assert len(cache) == 2
+    assert cache.invalidate_chunks(["c1"]) == 2
+    assert len(cache) == 0
+
+
+def test_indexer_invalidation_helper(tmp_path):
+    """Indexers drop answers for the chunks they wrote; a missing cache file is left alone"""
+    path = str(tmp_path / "cache.sqlite3")
+    assert invalidate_cached_answers(["c1"], path) == 0
+    assert not (tmp_path / "cache.sqlite3").exists()
+
+    cache = CompletionCache(path)
+    cache.put(CompletionCache.exact_key("m", "p1", 0.5, 10), "a1", chunk_hashes={"c1": "h"})
+    cache.put(CompletionCache.exact_key("m", "p2", 0.5, 10), "a2", chunk_hashes={"c2": "h"})
+    cache.close()
+
+    assert invalidate_cached_answers(["c1", "c3"], path) == 1
+    reopened = CompletionCache(path)
+    assert len(reopened) == 1
+    reopened.close()
@@ -0,0 +1,53 @@
+"""Tests for token-budgeted context packing"""
+
+from rag.context_packer import CHUNK_HEADER_TOKENS, ContextPacker, TokenCounter
+from rag.prompt_templates import PromptTemplates
+
+REMOTE = ("Employees may work remotely two days a week. Remote work requires manager approval. "
+          "The office cafeteria serves lunch from noon. Parking permits are issued by facilities. "
+          "Remote employees must be reachable during core hours.")
+
+
+def test_trim_keeps_query_sentences_in_order():
+    packer = ContextPacker()
+    trimmed = packer.trim(REMOTE, "What is the remote work policy?", 30)
+
+    assert packer.counter.count(trimmed) <= 30
+    assert "remotely two days" in trimmed
+    assert "cafeteria" not in trimmed
+    assert trimmed.index("remotely") < trimmed.index("approval")
+
+
+def test_pack_respects_budget_and_skips_duplicates():
+    packer = ContextPacker(max_context_tokens=160, max_chunks=2, max_chunk_tokens=40, mmr_lambda=0.5)
+    documents = [REMOTE, REMOTE + " ", "Remote work stipends cover home office equipment.", "Lunch menu."]
+    packed = packer.pack(
+        query="remote work policy",
+        documents=documents,
+        metadatas=[{"n": i} for i in range(4)],
+        distances=[0.20, 0.21, 0.30, 0.95],
+        ids=["a", "b", "c", "d"],
+    )
+
+    ids = [chunk["id"] for chunk in packed]
+    assert ids == ["a", "c"]  # the near-duplicate "b" loses to new information
+    assert packed[0]["trimmed"] and not packed[1]["trimmed"]
+    assert sum(chunk["tokens"] + CHUNK_HEADER_TOKENS for chunk in packed) <= 160
+
+
+def test_pack_considers_only_max_candidates():
+    packer = ContextPacker(max_chunks=4, relevance_margin=1.0, max_candidates=2)
+    packed = packer.pack(
+        query="remote work",
+        documents=["Remote work needs approval.", "Remote stipends exist.", "Remote work hours are core hours."],
+        metadatas=[{}] * 3,
+        distances=[0.1, 0.2, 0.3],
+        ids=["a", "b", "c"],
+    )
+    assert [chunk["id"] for chunk in packed] == ["a", "b"]
+
+
+def test_answer_budget_follows_query_type():
+    assert PromptTemplates.answer_max_tokens("When is payroll processed?") < \
+        PromptTemplates.answer_max_tokens("Summarize the Q4 results")
+    assert TokenCounter().count("") == 0
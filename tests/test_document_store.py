@@ -0,0 +1,83 @@
+"""Tests for the compressed document store"""
+
+import chromadb
+import pytest
+
+from vectordatabase.document_store import DocumentStore
+
+
+def test_round_trip_across_blocks(tmp_path):
+    """Texts come back unchanged regardless of block boundaries and order"""
+    ids = [f"chunk_{i}" for i in range(50)]
+    documents = [f"Section {i}: leave policy ✓ " * (i % 7 + 1) for i in range(50)]
+    store = DocumentStore.build(str(tmp_path), ids, documents, block_size=8, codec="zlib")
+
+    reopened = DocumentStore(str(tmp_path))
+    assert len(reopened) == 50
+    assert reopened.get_many(["chunk_49", "chunk_0", "chunk_17"]) == [documents[49], documents[0], documents[17]]
+    assert reopened.get_many(["missing"]) == [""]
+    assert store.size_bytes() < sum(len(d.encode("utf-8")) for d in documents)
+
+    with pytest.raises(KeyError):
+        reopened.get("missing")
+
+
+def _stripped_store(tmp_path):
+    """Chroma collection without texts plus a document store holding them"""
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+    collection = client.create_collection("company_documents", metadata={"hnsw:space": "cosine"})
+    collection.modify(configuration={"hnsw": {"ef_search": 42}})
+    meta = {"source_document": "employee_handbook.md", "section_title": "Leave", "department": "general"}
+    collection.add(ids=["a", "b", "c"], embeddings=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]],
+                   metadatas=[meta, meta, meta], documents=["Annual leave", "Annual leave", "Sick leave"])
+    DocumentStore.build(str(tmp_path / "docstore"), ["a", "b"], ["Annual leave", "Annual leave"], codec="zlib")
+    return client, collection
+
+
+def test_strip_keeps_vectors_and_hnsw_configuration(tmp_path):
+    """The stripped copy replaces the collection with the same ids and ef_search"""
+    from processing.build_document_store import strip_documents
+
+    client, _ = _stripped_store(tmp_path)
+    strip_documents(client, "company_documents")
+
+    stripped = client.get_collection("company_documents")
+    data = stripped.get(include=["documents", "metadatas"])
+    assert data["ids"] == ["a", "b", "c"]
+    assert not any(data["documents"])
+    assert stripped.configuration["hnsw"]["ef_search"] == 42
+    assert stripped.configuration["hnsw"]["space"] == "cosine"
+    assert [c.name for c in client.list_collections()] == ["company_documents"]
+
+
+def test_duplicates_of_stripped_chunks_are_found_through_the_docstore(tmp_path):
+    """After --strip, texts for dedupe come from the document store"""
+    from processing.build_document_store import strip_documents
+    from scripts.compact_vector_store import collect_duplicates, read_catalog
+
+    client, _ = _stripped_store(tmp_path)
+    strip_documents(client, "company_documents")
+    [collection] = read_catalog(tmp_path / "chroma")["collections"]
+    assert collect_duplicates(tmp_path / "chroma", collection["id"]) == ["b"]
+
+
+def test_fetch_documents_falls_back_to_the_collection(tmp_path):
+    """Chunks missing from the document store are read from Chroma"""
+    query_engine = pytest.importorskip("query.query_engine")
+    _, collection = _stripped_store(tmp_path)
+
+    engine = query_engine.QueryEngine.__new__(query_engine.QueryEngine)
+    engine.search_client = None
+    engine.collection = collection
+    engine.document_store = DocumentStore(str(tmp_path / "docstore"))
+    assert engine.fetch_documents(["c", "a", "unknown"]) == ["Sick leave", "Annual leave", ""]
+
+
+def test_changed_chunk_ids_against_previous_store(tmp_path):
+    """Rebuilding the store reports rewritten and removed chunks, not new ones"""
+    from processing.build_document_store import changed_chunk_ids
+
+    store_dir = str(tmp_path / "docstore")
+    assert changed_chunk_ids(store_dir, ["a"], ["text"]) == []
+    DocumentStore.build(store_dir, ["a", "b", "c"], ["same", "old", "gone"], codec="zlib").close()
+    assert changed_chunk_ids(store_dir, ["a", "b", "d"], ["same", "new", "added"]) == ["b", "c"]
@@ -1,22 +1,24 @@
 import chromadb
 from sentence_transformers import SentenceTransformer
 
+from rbac.department_access import DepartmentAccess
+
 client = chromadb.PersistentClient(path='./vectorstore/chroma')
 collection = client.get_collection(name='company_documents')
 model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
 
-# Test employee query with role_general filter
+# Test employee query with the employee department filter
 query = 'What is the remote work policy?'
 embedding = model.encode(query, normalize_embeddings=True).tolist()
 
-# Query with employee role (role_general filter)
+# Query with employee role (departments the employee role may read)
 results = collection.query(
     query_embeddings=[embedding],
     n_results=5,
-    where={'role_general': True}
+    where=DepartmentAccess.default().where(['employee'])
 )
 
-print('Results with role_general=True:')
+print('Results for role employee:')
 if results['documents'] and results['documents'][0]:
     for i, (doc, meta, dist) in enumerate(zip(results['documents'][0], results['metadatas'][0], results['distances'][0]), 1):
         relevance = (1 - dist) * 100
@@ -0,0 +1,49 @@
+"""Tests for extractive answers to factual queries"""
+
+from rag.extractive_answerer import ExtractiveAnswerer
+
+RECORD = ("Employee Information:\nFull Name: Aadhya Patel\nEmployee ID: FINEMP1000\n"
+          "Leave Balance: 22 days\nLeaves Taken: 11 days\nPerformance Rating: 3/5\n\n"
+          "This employee Aadhya Patel works as a Sales Manager in the Sales department.")
+
+
+def chunk(text, title, distance):
+    return {"text": text, "metadata": {"section_title": title}, "distance": distance}
+
+
+def test_units_split_key_values_and_sentences():
+    units = ExtractiveAnswerer.units("- **Cash Flow**: $15M invested.\nGrowth was strong. Margins fell.")
+    assert units == [
+        {"text": "Cash Flow: $15M invested.", "key": "Cash Flow"},
+        {"text": "Growth was strong.", "key": ""},
+        {"text": "Margins fell.", "key": ""},
+    ]
+
+
+def test_extract_key_value_line_with_record_subject_and_citation():
+    chunks = [chunk("Remote work needs approval.", "Remote Work", 0.35),
+              chunk(RECORD, "Employee: Aadhya Patel (FINEMP1000)", 0.3)]
+    result = ExtractiveAnswerer(max_units=1).extract("What is the leave balance of Aadhya Patel?", chunks)
+    assert result == {
+        "answer": "Employee: Aadhya Patel (FINEMP1000) — Leave Balance: 22 days [Source 2]",
+        "score": 1.0,
+    }
+
+
+def test_extract_declines_when_not_confident():
+    answerer = ExtractiveAnswerer()
+    record = [chunk(RECORD, "Employee: Aadhya Patel (FINEMP1000)", 0.3)]
+    # Top chunk not relevant enough
+    assert answerer.extract("What is the leave balance of Aadhya Patel?",
+                            [chunk(RECORD, "Employee: Aadhya Patel (FINEMP1000)", 0.6)]) is None
+    # No line covers the question (wrong employee)
+    assert answerer.extract("What is the leave balance of Rohan Mehta?", record) is None
+
+
+def test_snippets_take_the_best_line_of_every_chunk():
+    chunks = [chunk(RECORD, "Employee: Aadhya Patel (FINEMP1000)", 0.9),
+              chunk("Parking permits are issued by facilities.", "Parking", 0.95)]
+    assert ExtractiveAnswerer().snippets("Leave balance of Aadhya Patel?", chunks) == [
+        "Employee: Aadhya Patel (FINEMP1000) — Leave Balance: 22 days [Source 1]",
+        "Parking permits are issued by facilities. [Source 2]",
+    ]
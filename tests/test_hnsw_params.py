@@ -0,0 +1,55 @@
+"""Tests for the tuned HNSW parameters and the tuning helpers"""
+
+import json
+
+import chromadb
+
+from scripts.tune_hnsw import choose_params, pareto_front
+from vectordatabase.chroma_client import (
+    HNSW_PARAMS_FILE,
+    collection_metadata,
+    get_or_create_tuned_collection,
+    load_hnsw_params,
+)
+
+
+def test_collection_metadata_uses_committed_params():
+    """The committed hnsw_params.json feeds every new collection's metadata"""
+    committed = json.loads(HNSW_PARAMS_FILE.read_text(encoding="utf-8"))
+    assert load_hnsw_params() == committed
+
+    metadata = collection_metadata({"description": "docs"})
+    assert metadata["hnsw:space"] == "cosine"
+    assert metadata["hnsw:M"] == committed["M"]
+    assert metadata["hnsw:construction_ef"] == committed["ef_construction"]
+    assert metadata["hnsw:search_ef"] == committed["ef_search"]
+    assert metadata["description"] == "docs"
+
+
+def test_existing_collection_gets_tuned_ef_search(tmp_path):
+    """Metadata is ignored for an existing collection, so ef_search is applied with modify()"""
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    client.create_collection("company_documents", metadata={"hnsw:space": "cosine", "hnsw:search_ef": 200})
+
+    collection = get_or_create_tuned_collection(client, "company_documents")
+    assert collection.configuration["hnsw"]["ef_search"] == load_hnsw_params()["ef_search"]
+
+
+def test_choose_params_picks_fastest_config_meeting_target():
+    """Every role must meet the target; ties go to the lowest mean latency"""
+    def row(m, efs, role, recall, p50):
+        return {"M": m, "ef_construction": 50, "ef_search": efs, "role": role, "recall": recall, "p50_ms": p50}
+
+    rows = [
+        row(8, 10, "finance", 1.0, 0.5), row(8, 10, "hr", 0.90, 0.5),
+        row(16, 20, "finance", 1.0, 0.9), row(16, 20, "hr", 0.97, 0.9),
+        row(32, 50, "finance", 1.0, 1.5), row(32, 50, "hr", 1.0, 1.5),
+    ]
+    chosen = choose_params(rows, target_recall=0.95)
+    assert (chosen["M"], chosen["ef_search"]) == (16, 20)
+
+    # Nothing meets the target: best worst-role recall wins
+    assert choose_params(rows, target_recall=1.01)["M"] == 32
+
+    front = pareto_front([r for r in rows if r["role"] == "hr"])
+    assert [r["M"] for r in front] == [8, 16, 32]
@@ -0,0 +1,55 @@
+"""Tests for per-role HR record projections"""
+
+from processing.hr_projections import project_record, render_projection
+from rbac.department_access import DepartmentAccess
+
+ROW = {
+    "employee_id": "FINEMP1000", "full_name": "Aadhya Patel", "role": "Sales Manager",
+    "department": "Sales", "email": "aadhya.patel@fintechco.com", "location": "Ahmedabad",
+    "date_of_birth": "1991-04-03", "date_of_joining": "2018-11-20", "manager_id": "FINEMP1006",
+    "salary": 1332478.37, "leave_balance": 22, "leaves_taken": 11, "attendance_pct": 99.31,
+    "performance_rating": 3, "last_review_date": "2024-05-21",
+}
+
+
+def test_directory_projection_is_redacted():
+    """The directory entry keeps contact details but drops sensitive fields"""
+    text = render_projection(ROW, "directory")
+    assert "aadhya.patel@fintechco.com" in text and "FINEMP1006" in text
+    for sensitive in ("1,332,478.37", "1991-04-03", "Performance", "Leave", "Attendance"):
+        assert sensitive not in text
+
+
+def test_projections_carry_matching_access():
+    """Full records stay HR-only; directory entries are readable by employees"""
+    chunks = {c["metadata"]["projection"]: c for c in project_record(ROW)}
+    access = DepartmentAccess.default()
+
+    assert "₹1,332,478.37" in chunks["full"]["text"]
+    assert not access.can_read(["employee"], chunks["full"]["metadata"]["department"])
+    assert access.can_read(["employee"], chunks["directory"]["metadata"]["department"])
+    assert access.can_read(["hr"], chunks["full"]["metadata"]["department"])
+    assert chunks["directory"]["chunk_id"] == chunks["full"]["chunk_id"] + "_directory"
+
+
+def test_reindexing_replaces_stale_hr_chunks(tmp_path):
+    """Ids follow the employee id; chunks from earlier runs are deleted, not kept beside the new ones"""
+    import chromadb
+
+    from processing.hr_projections import HR_SOURCE_DOCUMENT, replace_hr_chunks
+
+    chunks = project_record(ROW)
+    assert [c["chunk_id"] for c in chunks] == ["hr_FINEMP1000", "hr_FINEMP1000_directory"]
+
+    collection = chromadb.PersistentClient(path=str(tmp_path)).create_collection("company_documents")
+    collection.add(ids=["hr_88be76c8", "general_1"], embeddings=[[1.0, 0.0], [0.0, 1.0]],
+                   metadatas=[{"source_document": HR_SOURCE_DOCUMENT, "department": "hr"},
+                              {"source_document": "handbook.md", "department": "general"}])
+
+    def write():
+        return replace_hr_chunks(collection, [c["chunk_id"] for c in chunks], [c["text"] for c in chunks],
+                                 [[1.0, 1.0]] * len(chunks), [c["metadata"] for c in chunks])
+
+    assert write() == ["hr_88be76c8", "hr_FINEMP1000", "hr_FINEMP1000_directory"]
+    assert write() == ["hr_FINEMP1000", "hr_FINEMP1000_directory"]  # a second run changes nothing
+    assert sorted(collection.get()["ids"]) == ["general_1", "hr_FINEMP1000", "hr_FINEMP1000_directory"]
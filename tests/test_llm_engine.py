@@ -0,0 +1,175 @@
+"""Tests for LLMEngine retries and error mapping (no network)"""
+
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+
+from llm.errors import LLMAuthError, LLMRateLimitError, LLMServerError
+from llm.llm_engine import LLMEngine
+from llm.usage import UsageAggregator, usage_context
+
+
+def completion(text):
+    return {"choices": [{"message": {"content": text}}]}
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.text = str(self._body)
+        self.headers = headers or {}
+        self.elapsed = timedelta(0)
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(LLMEngine, "_backoff", lambda self, attempt, error: 0)
+    return LLMEngine(api_key="test-key", max_retries=2)
+
+
+def test_generate_retries_rate_limit_and_server_errors(engine, monkeypatch):
+    responses = [
+        FakeResponse(429, headers={"Retry-After": "1"}),
+        FakeResponse(503),
+        FakeResponse(200, completion("ok")),
+    ]
+    monkeypatch.setattr(engine._session, "post", lambda *a, **kw: responses.pop(0))
+
+    assert engine.generate("hi") == "ok"
+    assert responses == []
+
+
+def test_generate_raises_typed_errors(engine, monkeypatch):
+    calls = []
+
+    def post(*args, **kwargs):
+        calls.append(1)
+        return FakeResponse(401)
+
+    monkeypatch.setattr(engine._session, "post", post)
+    with pytest.raises(LLMAuthError):
+        engine.generate("hi")
+    assert len(calls) == 1  # not retried
+
+    monkeypatch.setattr(engine._session, "post", lambda *a, **kw: FakeResponse(500))
+    with pytest.raises(LLMServerError):
+        engine.generate("hi")
+
+
+def test_agenerate_uses_async_client(engine):
+    statuses = [429, 200]
+
+    def handler(request):
+        status = statuses.pop(0)
+        return httpx.Response(status, json=completion("async ok") if status == 200 else {})
+
+    async def run():
+        engine._get_async_client()
+        engine._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await engine.agenerate("hi")
+        finally:
+            await engine.aclose()
+
+    assert asyncio.run(run()) == "async ok"
+    assert isinstance(LLMEngine._status_error(429, "", {"Retry-After": "2"}), LLMRateLimitError)
+
+
+def test_agenerate_stream_yields_tokens(engine):
+    body = (
+        ": OPENROUTER PROCESSING\n\n"
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        "data: [DONE]\n\n"
+    )
+    statuses = [503, 200]
+
+    def handler(request):
+        assert b'"stream": true' in request.content
+        status = statuses.pop(0)
+        return httpx.Response(status, text=body if status == 200 else "busy")
+
+    async def run():
+        engine._get_async_client()
+        engine._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return [text async for text in engine.agenerate_stream("hi")]
+        finally:
+            await engine.aclose()
+
+    assert asyncio.run(run()) == ["Hel", "lo"]
+
+
+def test_async_client_is_closed_with_its_event_loop(engine):
+    """Each asyncio.run() of a sync caller closes the client it opened"""
+    async def open_client():
+        return engine._get_async_client()
+
+    first = asyncio.run(open_client())
+    second = asyncio.run(open_client())
+    assert second is not first
+    assert first.is_closed and second.is_closed
+
+
+def test_abandoned_stream_is_still_accounted(engine, monkeypatch):
+    """A consumer that stops early (client disconnect) still leaves a usage record"""
+    monkeypatch.setattr("llm.llm_engine.usage_aggregator", UsageAggregator())
+    body = (
+        'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        "data: [DONE]\n\n"
+    )
+
+    async def run():
+        engine._get_async_client()
+        engine._async_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, text=body)))
+        try:
+            with usage_context(collect=True) as records:
+                stream = engine.agenerate_stream("hi")
+                assert await stream.__anext__() == "Hel"
+                await stream.aclose()
+                async for _ in engine.agenerate_stream("hi"):
+                    pass
+            return records
+        finally:
+            await engine.aclose()
+
+    abandoned, finished = asyncio.run(run())
+    assert abandoned["ok"] is False and abandoned["streamed"] and abandoned["ttfb"] is not None
+    assert abandoned["completion_tokens"] > 0
+    assert finished["ok"] is True
+
+
+def test_calls_are_accounted_with_caller_user_and_role(engine, monkeypatch):
+    aggregator = UsageAggregator()
+    monkeypatch.setattr("llm.llm_engine.usage_aggregator", aggregator)
+    body = completion("ok")
+    body["usage"] = {"prompt_tokens": 12, "completion_tokens": 3, "cost": 0.001}
+    monkeypatch.setattr(engine._session, "post", lambda *a, **kw: FakeResponse(200, body))
+
+    with usage_context(user="alice", role="hr", collect=True) as records:
+        engine.generate("hi")
+        with usage_context(caller="rerank"):
+            engine.generate("hi")
+    monkeypatch.setattr(engine._session, "post", lambda *a, **kw: FakeResponse(401))
+    with pytest.raises(LLMAuthError):
+        engine.generate("hi")
+
+    assert [(r["caller"], r["user"], r["role"]) for r in records] == [
+        ("answer", "alice", "hr"), ("rerank", "alice", "hr")]
+    assert records[0]["prompt_tokens"] == 12 and records[0]["completion_tokens"] == 3
+    assert records[0]["ttfb"] is not None and records[0]["latency"] >= records[0]["ttfb"]
+
+    snapshot = aggregator.snapshot()
+    assert snapshot["by_user"]["alice"]["calls"] == 2
+    assert snapshot["by_role"]["hr"]["cost"] == 0.002
+    assert snapshot["by_caller"]["answer"] == {**snapshot["by_caller"]["answer"], "calls": 2, "errors": 1}
+    assert snapshot["by_user"]["-"]["errors"] == 1
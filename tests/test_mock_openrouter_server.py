@@ -0,0 +1,57 @@
+"""Tests for the mock OpenRouter server, driven through LLMEngine"""
+
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from llm.llm_engine import LLMEngine
+from scripts.mock_openrouter_server import MockConfig, create_app
+
+PROMPT = "CONTEXT DOCUMENTS:\nRemote work is allowed two days a week.\n\nUSER QUESTION: What is the remote work policy?\n\nANSWER:"
+
+
+def run_engine(app, call):
+    """Run an LLMEngine coroutine against the app in-process"""
+    engine = LLMEngine(api_key="mock", base_url="http://mock/api/v1")
+    engine._backoff = lambda attempt, error: 0
+
+    async def run():
+        engine._get_async_client()
+        engine._async_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        try:
+            return await call(engine)
+        finally:
+            await engine.aclose()
+
+    return asyncio.run(run())
+
+
+def test_deterministic_echo_answers_streamed_and_not():
+    app = create_app(MockConfig(latency_ms=0, tokens_per_sec=0, answer_tokens=20))
+
+    answer = run_engine(app, lambda engine: engine.agenerate(PROMPT, max_tokens=50))
+    again = run_engine(app, lambda engine: engine.agenerate(PROMPT, max_tokens=50))
+
+    async def stream(engine):
+        return [text async for text in engine.agenerate_stream(PROMPT, max_tokens=50)]
+
+    tokens = run_engine(app, stream)
+    assert "What is the remote work policy?" in answer
+    assert answer == again == "".join(tokens)
+    assert len(tokens) == 20
+
+
+def test_injected_failures_are_retried_by_the_engine():
+    app = create_app(MockConfig(latency_ms=0, tokens_per_sec=0, rate_limit_rate=0.5, error_rate=0.3, seed=3))
+    client = TestClient(app)
+    statuses = [
+        client.post("/api/v1/chat/completions", headers={"Authorization": "Bearer mock"},
+                    json={"messages": [{"role": "user", "content": "hi"}]}).status_code
+        for _ in range(40)
+    ]
+    assert {200, 429} <= set(statuses)
+    assert any(status >= 500 for status in statuses)
+
+    answer = run_engine(app, lambda engine: engine.agenerate("USER QUESTION: hello", max_tokens=10))
+    assert "hello" in answer
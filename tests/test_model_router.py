@@ -0,0 +1,111 @@
+"""Tests for latency-aware model routing and hedged requests"""
+
+import asyncio
+import time
+
+import pytest
+
+from llm.errors import LLMServerError
+from llm.model_router import ModelRouter
+
+
+class FakeEngine:
+    """Per-model latency (seconds) or failure, sync and async"""
+
+    max_concurrency = 4
+
+    def __init__(self, delays, failing=()):
+        self.delays, self.failing = delays, set(failing)
+        self.model_map = {}
+        self.calls = []
+
+    def _answer(self, model):
+        self.calls.append(model)
+        if model in self.failing:
+            raise LLMServerError("down", 503)
+        return f"answer from {model}"
+
+    async def agenerate(self, prompt, max_tokens=500, temperature=0.7, model=None):
+        await asyncio.sleep(self.delays[model])
+        return self._answer(model)
+
+    def generate(self, prompt, max_tokens=500, temperature=0.7, model=None):
+        time.sleep(self.delays[model])
+        return self._answer(model)
+
+
+def test_routes_to_fastest_model_after_measuring_each():
+    engine = FakeEngine({"slow": 0.03, "fast": 0.005})
+    router = ModelRouter(engine, ["slow", "fast"], hedge=False, min_samples=2, explore_rate=0.0)
+
+    for _ in range(8):
+        router.generate("hi")
+
+    assert engine.calls[:4].count("slow") == 2  # measured first
+    assert engine.calls[4:] == ["fast"] * 4
+    assert router.stats()["fast"]["samples"] == 6
+
+
+def test_hedged_request_returns_first_answer_and_cancels_straggler():
+    engine = FakeEngine({"a": 0.01, "b": 0.01})
+    router = ModelRouter(engine, ["a", "b"], hedge=True, min_samples=1, explore_rate=0.0,
+                         hedge_min_delay=0.02, hedge_max_delay=0.05)
+    asyncio.run(router.agenerate("warm up"))
+    asyncio.run(router.agenerate("warm up"))
+
+    engine.delays["a" if router.ranked_models()[0] == "a" else "b"] = 1.0  # best model now straggles
+    straggler = router.ranked_models()[0]
+    start = time.perf_counter()
+    answer = asyncio.run(router.agenerate("hi"))
+
+    assert answer != f"answer from {straggler}"
+    assert time.perf_counter() - start < 0.5
+    assert engine.calls.count(straggler) == 1  # warm-up only: the hedged-away call was cancelled
+
+
+def test_failure_falls_through_to_runner_up():
+    engine = FakeEngine({"a": 0.001, "b": 0.001}, failing={"a"})
+    router = ModelRouter(engine, ["a", "b"], hedge=True, min_samples=0, explore_rate=0.0)
+
+    assert router.generate("hi") == "answer from b"  # "a" failed first, the runner-up answered
+    assert router.ranked_models()[0] == "b"  # errors push "a" down
+    assert asyncio.run(router.agenerate("hi")) == "answer from b"
+
+    engine.failing = {"a", "b"}
+    with pytest.raises(LLMServerError):
+        asyncio.run(router.agenerate("hi"))
+
+
+class StreamingEngine(FakeEngine):
+    """Streams: per-model delay before the first token, then `tail` seconds of tokens"""
+
+    def __init__(self, delays, tail):
+        super().__init__(delays)
+        self.tail = tail
+
+    def generate_stream(self, prompt, max_tokens=500, temperature=0.7, model=None):
+        self.calls.append(model)
+        time.sleep(self.delays[model])
+        yield "first"
+        time.sleep(self.tail[model])
+        yield "rest"
+
+
+def test_streams_are_ranked_by_time_to_first_token_in_their_own_window():
+    # "chatty" answers first but streams for long; "terse" starts late and ends early
+    engine = StreamingEngine({"chatty": 0.005, "terse": 0.03}, tail={"chatty": 0.1, "terse": 0.0})
+    router = ModelRouter(engine, ["chatty", "terse"], hedge=False, min_samples=2, explore_rate=0.0)
+
+    for _ in range(6):
+        assert list(router.generate_stream("hi")) == ["first", "rest"]
+
+    assert engine.calls[4:] == ["chatty"] * 2
+    stats = router.stats()
+    assert stats["chatty"]["stream"]["samples"] == 4 and stats["chatty"]["samples"] == 0
+    assert stats["chatty"]["stream"]["p95"] < 0.05  # the 0.1s tail is not counted
+
+    # A consumer that stops after the first token still counts as a good sample
+    stream = router.generate_stream("hi")
+    next(stream)
+    stream.close()
+    assert router.stats()["chatty"]["stream"]["samples"] == 5
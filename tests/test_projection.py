@@ -0,0 +1,101 @@
+"""Tests for the PCA projection and reduced-dimension search"""
+
+import chromadb
+import numpy as np
+import pytest
+
+from vectordatabase.chroma_client import collection_metadata
+from vectordatabase.projection import PCAProjection, projection_path, reduced_collection_name
+
+RANK = 8
+
+
+@pytest.fixture
+def vectors():
+    """
+    Normalized 384-d vectors spanning an 8-d subspace, with zero mean
+
+    Each vector comes with its negation, so PCA to 8-d is a rotation of the
+    subspace and cosine similarities survive the projection exactly.
+    """
+    rng = np.random.default_rng(11)
+    basis = np.linalg.qr(rng.normal(size=(384, RANK)))[0].T
+    half = rng.normal(size=(20, RANK)) @ basis
+    vectors = np.concatenate([half, -half]).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_fit_transform_round_trip(vectors):
+    """Projected vectors are unit length and keep the full-space neighbours"""
+    projection = PCAProjection.fit(vectors, RANK)
+    assert projection.dim == RANK
+    assert projection.explained_variance == pytest.approx(1.0, abs=1e-5)
+
+    reduced = projection.transform(vectors)
+    assert reduced.shape == (40, RANK)
+    assert np.linalg.norm(reduced, axis=1) == pytest.approx(np.ones(40), abs=1e-5)
+    np.testing.assert_allclose(reduced @ reduced.T, vectors @ vectors.T, atol=1e-4)
+    # A single vector keeps its rank
+    assert projection.transform(vectors[0]).shape == (RANK,)
+
+    # Reconstruction from the reduced coordinates recovers the centered input
+    coordinates = (vectors - projection.mean) @ projection.components.T
+    rebuilt = coordinates @ projection.components + projection.mean
+    assert np.abs(rebuilt - vectors).max() < 1e-4
+
+    with pytest.raises(ValueError):
+        PCAProjection.fit(vectors, 0)
+
+
+def test_projection_persists(tmp_path, vectors):
+    """A saved projection transforms exactly like the fitted one"""
+    projection = PCAProjection.fit(vectors, 4)
+    path = projection_path(tmp_path / "chroma", 4)
+    path.parent.mkdir(parents=True)
+    projection.save(path)
+
+    loaded = PCAProjection.load(path)
+    assert loaded.dim == 4
+    assert loaded.explained_variance == pytest.approx(projection.explained_variance)
+    np.testing.assert_array_equal(loaded.transform(vectors), projection.transform(vectors))
+
+
+class FakeEncoder:
+    """Maps "q<row>" queries to a perturbed copy of that stored vector"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def encode(self, texts, normalize_embeddings=True):
+        rows = [self.vectors[int(text[1:])] * 0.9 + self.vectors[0] * 0.1 for text in texts]
+        rows = np.asarray(rows, dtype=np.float32)
+        return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def test_reduced_search_matches_full_index(tmp_path, vectors, monkeypatch):
+    """QueryEngine(reduced_dim=...) returns the same ids as the full collection"""
+    query_engine = pytest.importorskip("query.query_engine")
+    monkeypatch.setattr(query_engine, "_model_cache", FakeEncoder(vectors))
+
+    store = tmp_path / "chroma"
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+    metadatas = [{"department": "general"} for _ in ids]
+    projection = PCAProjection.fit(vectors, RANK)
+    path = projection_path(store, RANK)
+    path.parent.mkdir(parents=True)
+    projection.save(path)
+
+    client = chromadb.PersistentClient(path=str(store))
+    full = client.create_collection("company_documents", metadata=collection_metadata())
+    full.add(ids=ids, embeddings=vectors.tolist(), metadatas=metadatas, documents=ids)
+    reduced = client.create_collection(reduced_collection_name("company_documents", RANK),
+                                       metadata=collection_metadata())
+    reduced.add(ids=ids, embeddings=projection.transform(vectors).tolist(), metadatas=metadatas, documents=ids)
+
+    full_engine = query_engine.QueryEngine(str(store))
+    reduced_engine = query_engine.QueryEngine(str(store), reduced_dim=RANK)
+    for row in (3, 17, 29):
+        expected = full_engine.search(f"q{row}", n_results=5)["ids"][0]
+        found = reduced_engine.search(f"q{row}", n_results=5)["ids"][0]
+        assert found == expected
+        assert found[0] == f"chunk_{row}"
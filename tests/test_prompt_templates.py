@@ -0,0 +1,30 @@
+"""Tests for chat-message prompts with a static system prefix"""
+
+from llm.llm_engine import LLMEngine
+from rag.prompt_templates import PromptTemplates
+
+
+def test_system_message_is_static_per_query_type():
+    first = PromptTemplates.build_messages("What is the leave policy?", "[Source 1: a - b]\nPolicy text")
+    second = PromptTemplates.build_messages("Who is the CFO?", "[Source 1: c - d]\nOther text")
+    assert [m["role"] for m in first] == ["system", "user"]
+    assert first[0] == second[0]  # identical prefix, cacheable by the provider
+    assert "Who is the CFO?" in second[1]["content"] and "Other text" in second[1]["content"]
+    assert "Who is the CFO?" not in second[0]["content"]
+
+    summary = PromptTemplates.build_messages("Summarize the leave policy", "ctx")
+    assert summary[0] != first[0] and summary[1]["content"].endswith("SUMMARY:")
+    assert PromptTemplates.static_tokens("factual") > 0
+    assert PromptTemplates.static_tokens.cache_info().currsize >= 1
+
+
+def test_cache_hints_only_for_models_that_need_them():
+    messages = PromptTemplates.build_messages("Who is the CFO?", "ctx")
+    plain = LLMEngine._messages(messages, "mistralai/mistral-7b-instruct:free")
+    assert plain == messages
+
+    hinted = LLMEngine._messages(messages, "anthropic/claude-3-haiku")
+    assert hinted[0]["content"] == [{"type": "text", "text": messages[0]["content"],
+                                     "cache_control": {"type": "ephemeral"}}]
+    assert hinted[1] == messages[1]
+    assert LLMEngine._messages("hi", "anthropic/claude-3-haiku") == [{"role": "user", "content": "hi"}]
@@ -0,0 +1,61 @@
+"""Tests for the quantized vector index"""
+
+import numpy as np
+import pytest
+
+from vectordatabase.quantized_index import QuantizedIndex
+
+
+@pytest.fixture
+def corpus():
+    """Random normalized 384-d vectors with department metadata"""
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(300, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+    metadatas = [{"department": "finance" if i % 3 == 0 else "general"} for i in range(len(vectors))]
+    return ids, vectors, metadatas
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_rescored_search_matches_exact(tmp_path, corpus, mode):
+    """Top result after rescoring equals exact search for a stored vector"""
+    ids, vectors, metadatas = corpus
+    index = QuantizedIndex.build(str(tmp_path / mode), ids, vectors, metadatas, mode=mode)
+
+    results = index.search(vectors[42], n_results=5)
+    assert results["ids"][0][0] == "chunk_42"
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert results["distances"][0] == sorted(results["distances"][0])
+
+
+def test_filter_restricts_results(tmp_path, corpus):
+    """RBAC-style where filters apply before ranking"""
+    ids, vectors, metadatas = corpus
+    index = QuantizedIndex.build(str(tmp_path / "int8"), ids, vectors, metadatas, mode="int8")
+
+    results = index.search(vectors[1], n_results=10, where={"department": "finance"})
+    assert len(results["ids"][0]) == 10
+    assert all(m["department"] == "finance" for m in results["metadatas"][0])
+    assert "chunk_1" not in results["ids"][0]
+
+
+def test_binary_codes_are_32x_smaller(tmp_path, corpus):
+    """Binary codes pack one bit per dimension"""
+    ids, vectors, metadatas = corpus
+    index = QuantizedIndex.build(str(tmp_path / "binary"), ids, vectors, metadatas, mode="binary")
+    sizes = index.memory_bytes()
+    assert sizes["full_precision"] // sizes["codes"] == 32
+
+
+def test_int8_first_pass_tracks_float_scores(tmp_path, corpus):
+    """Integer scoring approximates the dequantized float32 dot product"""
+    ids, vectors, metadatas = corpus
+    index = QuantizedIndex.build(str(tmp_path / "int8"), ids, vectors, metadatas, mode="int8")
+
+    query = vectors[5]
+    reference = (index.codes.astype(np.float32) * index.scale) @ query
+    scores = index._first_pass(query)
+    assert scores.dtype == np.float32
+    assert np.abs(scores - reference).max() < 0.02
+    assert int(np.argmax(scores)) == 5
@@ -2,6 +2,8 @@
 
 import pytest
 from rbac.rbac_filter import RBACFilter
+from rbac.access_mask import has_access, mask_for_roles, roles_for_mask
+from rbac.department_access import DepartmentAccess, department_where
 
 def test_admin_access():
     """Admin should access all departments"""
@@ -20,3 +22,46 @@ def test_employee_access():
     rbac = RBACFilter()
     assert rbac.can_access("employee", ["employee"])
     assert not rbac.can_access("employee", ["finance"])
+
+def test_access_mask_round_trip():
+    """Roles survive encoding into a mask; 'general' maps to employee"""
+    mask = mask_for_roles(["general", "admin"])
+    assert roles_for_mask(mask) == ["admin", "employee"]
+    assert has_access(mask, "employee")
+    assert not has_access(mask, "finance")
+
+def test_default_department_access():
+    """The default table is DEPARTMENT_ROLE_MAP turned around"""
+    access = DepartmentAccess.default()
+    rbac = RBACFilter()
+    assert access.departments_for(rbac.effective_roles("finance")) == ["finance", "general"]
+    assert access.departments_for(rbac.effective_roles("employee")) == ["general"]
+    assert len(access.departments_for(rbac.effective_roles("admin"))) == 5
+
+def test_filter_results_uses_department():
+    """Results are filtered by department through the access table"""
+    rbac = RBACFilter()
+    results = [
+        {"id": "fin", "metadata": {"department": "finance"}},
+        {"id": "gen", "metadata": {"department": "general"}},
+    ]
+    assert [r["id"] for r in rbac.filter_results(results, "finance")] == ["fin", "gen"]
+    assert [r["id"] for r in rbac.filter_results(results, "employee")] == ["gen"]
+
+    # Access changes apply without touching the chunks
+    granted = DepartmentAccess({"employee": ["general", "finance"]})
+    assert [r["id"] for r in rbac.filter_results(results, "employee", access=granted)] == ["fin", "gen"]
+
+def test_effective_roles_follow_hierarchy():
+    """Finance also reads employee content; several roles are merged"""
+    rbac = RBACFilter()
+    assert rbac.effective_roles("finance") == ["finance", "employee"]
+    assert rbac.effective_roles(["finance", "hr"]) == ["finance", "employee", "hr"]
+    assert rbac.effective_roles("finance,hr") == ["finance", "employee", "hr"]
+    assert rbac.effective_roles("unknown") == []
+
+def test_department_where():
+    """One $in filter over the readable departments; no departments is an error"""
+    assert department_where(["general", "finance", "general"]) == {"department": {"$in": ["finance", "general"]}}
+    with pytest.raises(ValueError):
+        department_where([])
@@ -0,0 +1,43 @@
+"""Tests for the full-index RBAC consistency audit"""
+
+from scripts.audit_rbac import audit_metadata
+
+
+def meta(source_document, department, **extra):
+    return {"source_document": source_document, "department": department, **extra}
+
+
+def test_consistent_chunks_pass():
+    """Mapped documents and HR projections in the right department are clean"""
+    result = audit_metadata(
+        ["fin", "hr", "dir"],
+        [
+            meta("financial_summary.md", "finance"),
+            meta("hr_data.csv", "hr", projection="full"),
+            meta("hr_data.csv", "general", projection="directory"),
+        ],
+    )
+    assert not result.failing.any()
+    assert result.fixes()["ids"] == []
+
+
+def test_mismatches_are_reported_and_fixed():
+    """Misfiled chunks and stale role fields produce bulk fixes"""
+    result = audit_metadata(
+        ["moved", "legacy", "orphan"],
+        [
+            meta("engineering_master_doc.md", "general"),
+            meta("employee_handbook.md", "general", access_mask=33, role_hr=True, allowed_roles="hr,admin"),
+            meta("notes.md", "legal"),
+        ],
+    )
+    counts = result.counts()
+    assert counts["department_mismatch"] == 1
+    assert counts["legacy_fields"] == 1
+    assert counts["unknown_department"] == 1
+
+    fixes = dict(zip(*result.fixes().values()))
+    assert set(fixes) == {"moved", "legacy"}
+    assert fixes["moved"] == {"department": "engineering"}
+    assert fixes["legacy"] == {"department": "general", "access_mask": None,
+                               "allowed_roles": None, "role_hr": None}
@@ -0,0 +1,120 @@
+"""Tests for the local cross-encoder reranker (with a stand-in model)"""
+
+from llm.reranker import CrossEncoderReranker
+
+
+class OverlapModel:
+    """Scores a pair by shared words; records each predict() batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(list(pairs))
+        return [float(len(set(q.lower().split()) & set(d.lower().split()))) for q, d in pairs]
+
+
+RESULTS = {
+    "ids": [["a", "b", "c"]],
+    "documents": [["lunch menu", "remote work policy details", "work hours"]],
+    "metadatas": [[{"n": 0}, {"n": 1}, {"n": 2}]],
+    "distances": [[0.1, 0.2, 0.3]],
+}
+
+
+def test_rerank_batches_and_caches_scores():
+    model = OverlapModel()
+    reranker = CrossEncoderReranker(model=model, cache_size=10)
+
+    reranked = reranker.rerank("remote work policy", RESULTS, top_k=2)
+    assert reranked["ids"] == [["b", "c"]]
+    assert reranked["distances"] == [[0.2, 0.3]]
+    assert reranked["rerank_scores"] == [[3.0, 1.0]]
+    assert len(model.batches) == 1 and len(model.batches[0]) == 3  # one forward pass
+
+    reranker.rerank("Remote  work policy", RESULTS, top_k=2)
+    assert len(model.batches) == 1  # served from the score cache
+    assert 50 < reranker.score_relevance("remote work policy", "work hours") < 100
+    assert len(model.batches) == 1
+
+
+class FakeLLM:
+    """Engine stand-in: answers per prompt after a delay, on either path"""
+
+    def __init__(self, answer, delay=0.0, slow_marker=None):
+        import threading
+
+        self.answer, self.delay, self.slow_marker = answer, delay, slow_marker
+        self.calls = 0
+        self.in_flight = self.max_in_flight = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def _enter(self, prompt):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return 1.0 if self.slow_marker and self.slow_marker in prompt else self.delay
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def generate(self, prompt, max_tokens=500, temperature=0.7):
+        import time
+
+        try:
+            time.sleep(self._enter(prompt))
+            return self.answer
+        finally:
+            self._leave()
+
+    async def agenerate(self, prompt, max_tokens=500, temperature=0.7):
+        import asyncio
+
+        try:
+            await asyncio.sleep(self._enter(prompt))
+            return self.answer
+        finally:
+            self._leave()
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_score_many_batch_prompt_parses_json_scores():
+    from llm.reranker import ResultReranker
+
+    llm = FakeLLM("Scores: [90, \"x\", 15]")
+    scores = ResultReranker(llm).score_many("q", ["a", "b", "c", "d"], vector_scores=[1, 2, 3, 4], mode="batch")
+
+    assert llm.calls == 1
+    assert scores == [90.0, 2, 15.0, 4]  # unusable and missing entries keep the vector score
+
+
+def test_score_many_concurrent_caps_calls_and_times_out_to_vector_score():
+    from llm.reranker import ResultReranker
+
+    llm = FakeLLM("70", delay=0.05, slow_marker="slow")
+    documents = ["doc"] * 5 + ["slow doc"]
+    scores = ResultReranker(llm).score_many("q", documents, vector_scores=[10.0] * 6,
+                                            mode="concurrent", timeout=0.3, max_concurrency=3)
+
+    assert scores == [70.0] * 5 + [10.0]
+    assert llm.calls == 6 and llm.max_in_flight == 3
+    assert not llm.closed  # the shared engine is not the sync wrapper's to close
+
+
+def test_ascore_many_matches_sync_scores():
+    import asyncio
+
+    from llm.reranker import ResultReranker
+
+    llm = FakeLLM("70", delay=0.05, slow_marker="slow")
+    documents = ["doc"] * 3 + ["slow doc"]
+    scores = asyncio.run(ResultReranker(llm).ascore_many("q", documents, vector_scores=[10.0] * 4,
+                                                         mode="concurrent", timeout=0.3, max_concurrency=2))
+
+    assert scores == [70.0] * 3 + [10.0]
+    assert llm.max_in_flight == 2 and not llm.closed
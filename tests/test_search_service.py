@@ -0,0 +1,154 @@
+"""Tests for the shared search service protocol and batching"""
+
+import asyncio
+import os
+import socket
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from query.search_service import SearchService, SearchServiceClient, secret_path
+
+
+class FakeEngine:
+    """Records batches and echoes the query back as a single result"""
+
+    def __init__(self):
+        self.batches = []
+
+    def search_batch(self, requests):
+        self.batches.append(list(requests))
+        return [
+            {
+                "ids": [[f"{role}_{query}"]],
+                "documents": [[f"Document for {query} ✓"]],
+                "metadatas": [[{"department": role, "n": n_results}]],
+                "distances": [[0.25]],
+            }
+            for query, n_results, role, *_ in requests
+        ]
+
+
+def _serve(service):
+    """Run the service on a background event loop; returns a stop() callable"""
+    loop = asyncio.new_event_loop()
+    task_holder = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        task_holder["task"] = loop.create_task(service.serve())
+        try:
+            loop.run_until_complete(task_holder["task"])
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(service.socket_path):
+            break
+        time.sleep(0.02)
+
+    def stop():
+        loop.call_soon_threadsafe(task_holder["task"].cancel)
+        thread.join(timeout=5)
+    return stop
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Service with a generated secret and an authenticated client"""
+    engine = FakeEngine()
+    socket_path = str(tmp_path / "search.sock")
+    stop = _serve(SearchService(engine, socket_path=socket_path, batch_window_ms=20))
+
+    client = SearchServiceClient(socket_path, timeout=5)
+    for _ in range(100):
+        if client.ping():
+            break
+        time.sleep(0.02)
+
+    yield engine, client
+
+    client.close()
+    stop()
+
+
+def test_round_trip(service):
+    """Results survive the binary protocol unchanged"""
+    _, client = service
+    results = client.search("leave policy", n_results=3, user_role="employee")
+
+    assert results["ids"] == [["employee_leave policy"]]
+    assert results["documents"] == [["Document for leave policy ✓"]]
+    assert results["metadatas"] == [[{"department": "employee", "n": 3}]]
+    assert results["distances"][0][0] == pytest.approx(0.25)
+
+
+def test_concurrent_requests_are_batched(service):
+    """Requests arriving within the batch window share one engine call"""
+    engine, client = service
+    queries = [f"q{i}" for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda q: client.search(q, 5, "finance"), queries))
+
+    assert [r["ids"][0][0] for r in results] == [f"finance_{q}" for q in queries]
+    assert sum(len(b) for b in engine.batches) == 8
+    assert len(engine.batches) < 8
+
+
+def test_resolved_departments_reach_the_engine(service):
+    """Departments resolved by the worker travel with the request"""
+    engine, client = service
+    client.search("budget", 2, "marketing", departments=["finance", "marketing"])
+    client.search("budget", 2, "hr", departments=[])
+    requests = [r for batch in engine.batches for r in batch]
+    assert requests == [("budget", 2, "marketing", ["finance", "marketing"]), ("budget", 2, "hr", [])]
+
+
+def test_socket_and_secret_are_private(service, tmp_path):
+    """Only the service's user can connect or read the generated secret"""
+    _, client = service
+    assert client.ping()
+    for path in (client.socket_path, secret_path(client.socket_path)):
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_wrong_secret_is_refused(service):
+    """A local process without the secret cannot search, whatever role it claims"""
+    engine, client = service
+    intruder = SearchServiceClient(client.socket_path, timeout=5, secret="guess")
+    with pytest.raises(PermissionError):
+        intruder.search("salaries", 5, "admin", departments=["finance", "hr"])
+    assert not intruder.ping()
+    assert engine.batches == []
+
+
+def test_other_uids_are_refused(tmp_path):
+    """Peers whose uid is not allowed are disconnected before authenticating"""
+    socket_path = str(tmp_path / "search.sock")
+    stop = _serve(SearchService(FakeEngine(), socket_path=socket_path, secret="s3cret",
+                                allowed_uids={os.getuid() + 1}))
+    try:
+        if not hasattr(socket, "SO_PEERCRED"):
+            pytest.skip("SO_PEERCRED is Linux-only")
+        client = SearchServiceClient(socket_path, timeout=5, secret="s3cret")
+        with pytest.raises(PermissionError, match="uid"):
+            client.search("salaries", 5, "admin")
+    finally:
+        stop()
+
+
+def test_client_mode_engine_only_searches(tmp_path):
+    """A QueryEngine in client mode loads nothing and says so on local-only calls"""
+    query_engine = pytest.importorskip("query.query_engine")
+    engine = query_engine.QueryEngine(str(tmp_path / "chroma"), search_service=str(tmp_path / "search.sock"))
+    assert engine.model is None and engine.collection is None and engine.client is None
+    with pytest.raises(RuntimeError, match="search service"):
+        engine.encode(["leave policy"])
+    with pytest.raises(RuntimeError, match="search service"):
+        engine.search_batch([("leave policy", 5, "employee")])
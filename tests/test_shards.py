@@ -0,0 +1,89 @@
+"""Tests for department shards: staleness check and scatter-gather search"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import chromadb
+import pytest
+
+from vectordatabase.shards import shard_collection_name, stale_shards
+
+
+def _add(collection, department, count, start=0):
+    collection.add(
+        ids=[f"{department}_{i}" for i in range(start, start + count)],
+        embeddings=[[1.0, float(i)] for i in range(start, start + count)],
+        metadatas=[{"department": department} for _ in range(count)],
+    )
+
+
+def test_stale_shards(tmp_path):
+    """Shards whose size differs from their department's source chunks are stale"""
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    source = client.create_collection("company_documents")
+    _add(source, "finance", 3)
+    _add(source, "general", 2)
+    _add(source, "marketing", 1)
+
+    _add(client.create_collection(shard_collection_name("finance")), "finance", 3)
+    _add(client.create_collection(shard_collection_name("general")), "general", 1)
+
+    # general lost a chunk, marketing has no shard; hr has neither chunks nor a shard
+    assert stale_shards(client, ["finance", "general", "marketing", "hr"]) == ["general", "marketing"]
+
+    _add(client.get_collection(shard_collection_name("general")), "general", 1, start=1)
+    assert stale_shards(client, ["finance", "general", "hr"]) == []
+
+
+class FakeShard:
+    """Returns fixed (id, distance) hits and records how many queries it got"""
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.queries = []
+
+    def query(self, query_embeddings, n_results, include):
+        self.queries.append(len(query_embeddings))
+        hits = self.hits[:n_results]
+        per_query = {
+            "ids": [h[0] for h in hits],
+            "distances": [h[1] for h in hits],
+            "metadatas": [{"id": h[0]} for h in hits],
+        }
+        return {field: [values] * len(query_embeddings) for field, values in per_query.items()}
+
+
+@pytest.fixture
+def sharded_engine():
+    """QueryEngine wired to fake shards, without loading an encoder"""
+    query_engine = pytest.importorskip("query.query_engine")
+    engine = query_engine.QueryEngine.__new__(query_engine.QueryEngine)
+    engine.shards = {
+        "finance": FakeShard([("f1", 0.10), ("f2", 0.40), ("f3", 0.70)]),
+        "general": FakeShard([("g1", 0.20), ("g2", 0.30)]),
+        "hr": FakeShard([("h1", 0.05)]),
+    }
+    engine.shard_pool = ThreadPoolExecutor(max_workers=3)
+    yield engine
+    engine.shard_pool.shutdown()
+
+
+def test_sharded_search_merges_by_distance(sharded_engine):
+    """Hits from several shards are merged into one list, nearest first"""
+    jobs = [(0, "budget", 4, ["finance", "general"])]
+    [result] = sharded_engine._search_sharded(jobs, [[0.0]], ["ids", "metadatas", "distances"])
+    assert result["ids"] == [["f1", "g1", "g2", "f2"]]
+    assert result["distances"] == [[0.10, 0.20, 0.30, 0.40]]
+    assert result["metadatas"] == [[{"id": "f1"}, {"id": "g1"}, {"id": "g2"}, {"id": "f2"}]]
+
+
+def test_sharded_search_only_queries_accessible_shards(sharded_engine):
+    """Each request only sees its departments' shards; each shard is queried once"""
+    jobs = [
+        (0, "budget", 2, ["finance"]),
+        (1, "leave", 2, ["general", "hr"]),
+        (2, "salary", 2, ["finance", "hr"]),
+    ]
+    results = sharded_engine._search_sharded(jobs, [[0.0]] * 3, ["ids", "distances"])
+    assert [r["ids"][0] for r in results] == [["f1", "f2"], ["h1", "g1"], ["h1", "f1"]]
+    shards = sharded_engine.shards
+    assert (shards["finance"].queries, shards["general"].queries, shards["hr"].queries) == ([2], [1], [2])
@@ -0,0 +1,98 @@
+"""Tests for vector store maintenance helpers"""
+
+import sqlite3
+import struct
+
+from scripts.compact_vector_store import (
+    HNSW_HEADER_FORMAT,
+    find_duplicates,
+    find_orphan_segment_dirs,
+    purge_consumed_log,
+    read_catalog,
+    read_hnsw_header,
+)
+
+
+def _make_store(path, vector_seq, metadata_seq, queued=10):
+    """Minimal chroma.sqlite3 with one collection, its two segments and a log"""
+    conn = sqlite3.connect(str(path / "chroma.sqlite3"))
+    conn.executescript(
+        "CREATE TABLE collections (id TEXT, name TEXT, dimension INTEGER);"
+        "CREATE TABLE segments (id TEXT, scope TEXT, collection TEXT);"
+        "CREATE TABLE embeddings (id INTEGER, segment_id TEXT, embedding_id TEXT);"
+        "CREATE TABLE max_seq_id (segment_id TEXT, seq_id INTEGER);"
+        "CREATE TABLE embeddings_queue (seq_id INTEGER, topic TEXT, id TEXT);"
+    )
+    conn.execute("INSERT INTO collections VALUES ('c1', 'docs', 384)")
+    conn.executemany("INSERT INTO segments VALUES (?, ?, 'c1')", [("vec", "VECTOR"), ("meta", "METADATA")])
+    for segment_id, seq in (("vec", vector_seq), ("meta", metadata_seq)):
+        if seq is not None:
+            conn.execute("INSERT INTO max_seq_id VALUES (?, ?)", (segment_id, seq))
+    conn.executemany(
+        "INSERT INTO embeddings_queue VALUES (?, 'persistent://default/default/c1', ?)",
+        [(seq, f"chunk_{seq}") for seq in range(1, queued + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_find_duplicates_keeps_first_occurrence():
+    """Repeated text from the same section is flagged after the first copy"""
+    meta = {"source_document": "employee_handbook.md", "section_title": "Leave"}
+    ids = ["general_a", "general_b", "general_c"]
+    documents = ["Annual leave is 20 days", "Annual leave is 20 days", "Sick leave is 10 days"]
+    assert find_duplicates(ids, documents, [meta, meta, meta]) == ["general_b"]
+
+
+def test_same_text_in_other_document_is_not_duplicate():
+    """Identical text from different documents is kept"""
+    ids = ["a", "b"]
+    documents = ["Revenue grew 12%", "Revenue grew 12%"]
+    metadatas = [
+        {"source_document": "financial_summary.md", "section_title": "Q4"},
+        {"source_document": "quarterly_financial_report.md", "section_title": "Q4"},
+    ]
+    assert find_duplicates(ids, documents, metadatas) == []
+
+
+def test_orphan_segment_dirs(tmp_path):
+    """Directories without a segment row are orphans"""
+    (tmp_path / "live").mkdir()
+    (tmp_path / "stale").mkdir()
+    (tmp_path / "chroma.sqlite3").write_bytes(b"")
+    orphans = find_orphan_segment_dirs(tmp_path, ["live"])
+    assert [o.name for o in orphans] == ["stale"]
+
+
+def test_read_hnsw_header(tmp_path):
+    """Element count and graph parameters are parsed from header.bin"""
+    header = struct.pack(HNSW_HEADER_FORMAT, 1, 0, 100, 42, 1676, 1668, 132, 0, 0, 16, 32, 16, 0.36, 100)
+    (tmp_path / "header.bin").write_bytes(header)
+    parsed = read_hnsw_header(tmp_path)
+    assert parsed["element_count"] == 42
+    assert parsed["M"] == 16
+    assert parsed["ef_construction"] == 100
+    assert read_hnsw_header(tmp_path / "missing") is None
+
+
+def test_queue_counts_only_unconsumed_rows(tmp_path):
+    """Rows at or below a segment's max_seq_id are consumed, not queued"""
+    _make_store(tmp_path, vector_seq=6, metadata_seq=10)
+    collection = read_catalog(tmp_path)["collections"][0]
+    assert collection["queued"] == 4
+    assert collection["purgeable"] == 6
+
+
+def test_purge_keeps_rows_a_segment_still_needs(tmp_path):
+    """A vector segment that never flushed (no max_seq_id row) blocks the purge"""
+    _make_store(tmp_path, vector_seq=None, metadata_seq=10)
+    collections = read_catalog(tmp_path)["collections"]
+    assert collections[0]["queued"] == 10
+    assert purge_consumed_log(tmp_path, collections) == 0
+
+    flushed = tmp_path / "flushed"
+    flushed.mkdir()
+    _make_store(flushed, vector_seq=6, metadata_seq=10)
+    collections = read_catalog(flushed)["collections"]
+    assert purge_consumed_log(flushed, collections) == 6
+    assert read_catalog(flushed)["collections"][0]["purgeable"] == 0
@@ -56,7 +56,7 @@ for dept in sorted(dept_samples.keys()):
     print(f"      Embedding dimension: {sample['embedding_dim']}")
     print(f"      Sample metadata keys: {list(sample['metadata'].keys())}")
     print(f"      Sample source: {sample['metadata']['source_document']}")
-    print(f"      Allowed roles: {sample['metadata']['allowed_roles']}")
+    print(f"      Department: {sample['metadata'].get('department')}")
     print(f"      Section: {sample['metadata']['section_title']}")
     print(f"      Document preview: {sample['document'][:70]}...")
 
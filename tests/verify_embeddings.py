@@ -3,12 +3,19 @@ Embeddings Verification Test
 Verifies that embeddings have been generated correctly with proper dimensions
 """
 import json
+import sys
 from pathlib import Path
 
 # Get paths relative to this test file
 test_dir = Path(__file__).parent
 project_root = test_dir.parent
 processing_dir = project_root / "processing"
+sys.path.insert(0, str(project_root))
+
+from rbac.department_access import DepartmentAccess
+
+# Roles reading a department (the backend may grant more at runtime)
+access = DepartmentAccess.default()
 
 data = json.load(open(processing_dir / 'embedded_chunks.json'))
 sample = data[0]
@@ -22,7 +29,7 @@ print(f"\nSample chunk details:")
 print(f"  - Chunk ID: {sample['chunk_id']}")
 print(f"  - Department: {sample['metadata']['department']}")
 print(f"  - Text length: {len(sample['text'])} characters")
-print(f"  - Allowed roles: {sample['metadata']['allowed_roles']}")
+print(f"  - Readable by: {access.roles_for(sample['metadata']['department'])}")
 print(f"  - Sample text: {sample['text'][:80]}...")
 print(f"\nEmbedding vector (first 10 values):")
 print(f"  {sample['embedding'][:10]}")
@@ -3,12 +3,19 @@ RBAC Verification Test
 Verifies that RBAC (Role-Based Access Control) mapping is correctly applied
 """
 import json
+import sys
 from pathlib import Path
 
 # Get paths relative to this test file
 test_dir = Path(__file__).parent
 project_root = test_dir.parent
 processing_dir = project_root / "processing"
+sys.path.insert(0, str(project_root))
+
+from rbac.department_access import DepartmentAccess
+
+# Roles reading a department (the backend may grant more at runtime)
+access = DepartmentAccess.default()
 
 # Load chunked data
 data = json.load(open(processing_dir / 'chunked_markdown.json'))
@@ -32,7 +39,7 @@ for dept in sorted(by_dept.keys()):
     print(f"\n📁 {dept.upper()}")
     print(f"   Total chunks: {len(chunks)}")
     print(f"   Sample document: {sample['metadata']['source_document']}")
-    print(f"   Allowed roles: {sample['metadata']['allowed_roles']}")
+    print(f"   Readable by: {access.roles_for(dept)}")
     print(f"   Sample text: {sample['text'][:80]}...")
 
 print(f"\n{'=' * 70}")
@@ -46,7 +53,7 @@ docs = {}
 for chunk in data:
     doc = chunk['metadata']['source_document']
     dept = chunk['metadata']['department']
-    roles = chunk['metadata']['allowed_roles']
+    roles = access.roles_for(dept)
     if doc not in docs:
         docs[doc] = {'dept': dept, 'roles': roles}
 
@@ -5,9 +5,98 @@ Handles interactions with the ChromaDB vector database
 
 import chromadb
 from chromadb.config import Settings
+import json
 import os
 from pathlib import Path
 
+# HNSW parameters chosen by scripts/tune_hnsw.py (Chroma defaults if absent)
+HNSW_PARAMS_FILE = Path(__file__).parent / "hnsw_params.json"
+
+# Tuned parameter name → Chroma collection metadata key
+HNSW_METADATA_KEYS = {
+    "M": "hnsw:M",
+    "ef_construction": "hnsw:construction_ef",
+    "ef_search": "hnsw:search_ef",
+}
+
+
+def load_hnsw_params(path: Path = HNSW_PARAMS_FILE) -> dict:
+    """
+    Load tuned HNSW parameters
+    
+    Args:
+        path: JSON file written by scripts/tune_hnsw.py
+        
+    Returns:
+        Dict with any of M, ef_construction, ef_search (empty if not tuned)
+    """
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        params = json.load(f)
+    return {key: params[key] for key in HNSW_METADATA_KEYS if key in params}
+
+
+def collection_metadata(extra: dict = None) -> dict:
+    """
+    Collection metadata with cosine space and the tuned HNSW parameters
+    
+    Args:
+        extra: Additional metadata entries
+        
+    Returns:
+        Metadata dict for get_or_create_collection
+    """
+    metadata = {"hnsw:space": "cosine"}
+    for key, value in load_hnsw_params().items():
+        metadata[HNSW_METADATA_KEYS[key]] = value
+    if extra:
+        metadata.update(extra)
+    return metadata
+
+
+def apply_search_params(collection, params: dict = None) -> bool:
+    """
+    Apply the tuned ef_search to an existing collection
+
+    Chroma ignores the metadata passed to get_or_create_collection for a
+    collection that already exists; ef_search can still be changed with
+    modify(), while M and ef_construction are fixed until it is rebuilt.
+
+    Args:
+        collection: ChromaDB collection
+        params: Tuned parameters (default: load_hnsw_params())
+
+    Returns:
+        True if the collection's ef_search was changed
+    """
+    ef_search = (load_hnsw_params() if params is None else params).get("ef_search")
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    if ef_search is None or hnsw.get("ef_search") == ef_search:
+        return False
+    collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+    return True
+
+
+def get_or_create_tuned_collection(client, name: str, extra: dict = None):
+    """
+    Get or create a collection with the tuned HNSW parameters
+
+    New collections get them all as metadata; existing ones get ef_search
+    through apply_search_params().
+
+    Args:
+        client: ChromaDB client
+        name: Collection name
+        extra: Additional metadata entries for a new collection
+
+    Returns:
+        ChromaDB collection
+    """
+    collection = client.get_or_create_collection(name=name, metadata=collection_metadata(extra))
+    apply_search_params(collection)
+    return collection
+
 
 class ChromaClient:
     """
@@ -46,10 +135,7 @@ class ChromaClient:
         Returns:
             ChromaDB collection object
         """
-        return self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        return get_or_create_tuned_collection(self.client, collection_name)
     
     def add_documents(self, collection_name: str, documents: list, embeddings: list, 
                      metadatas: list, ids: list):
@@ -0,0 +1,166 @@
+"""
+Compressed Document Store
+ID-addressed chunk texts kept outside the vector index, packed into
+compressed blocks with an offset index so single chunks can be read
+without touching the rest of the corpus
+"""
+
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Chunks packed into one compressed block
+DEFAULT_BLOCK_SIZE = 16
+
+# Decompressed blocks kept in memory
+_BLOCK_CACHE_SIZE = 64
+
+
+def _default_codec() -> str:
+    """zstd when the zstandard package is installed, zlib otherwise"""
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+
+class DocumentStore:
+    """
+    Read-only compressed store of chunk texts
+
+    Files in the store directory:
+        docs.bin    - compressed blocks, back to back
+        index.json  - codec, block offsets and id -> (block, start, end)
+    """
+
+    def __init__(self, store_dir: str):
+        """
+        Open a document store
+
+        Args:
+            store_dir: Directory written by DocumentStore.build
+        """
+        self.store_dir = Path(store_dir)
+
+        with open(self.store_dir / "index.json", "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+        self.codec = index["codec"]
+        if self.codec == "zstd" and zstandard is None:
+            raise ImportError("Document store is zstd-compressed; install zstandard to read it")
+
+        self.blocks: List[List[int]] = index["blocks"]
+        self.entries: Dict[str, List[int]] = index["entries"]
+
+        self._fd = os.open(self.store_dir / "docs.bin", os.O_RDONLY)
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def build(store_dir: str,
+              ids: List[str],
+              documents: List[str],
+              block_size: int = DEFAULT_BLOCK_SIZE,
+              codec: Optional[str] = None) -> "DocumentStore":
+        """
+        Compress documents into blocks and write the store to disk
+
+        Args:
+            store_dir: Output directory
+            ids: Chunk ids
+            documents: Chunk texts, same order as ids
+            block_size: Chunks per compressed block
+            codec: 'zstd' or 'zlib' (default: zstd if available)
+
+        Returns:
+            Opened DocumentStore
+        """
+        codec = codec or _default_codec()
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("zstandard is not installed; use codec='zlib'")
+
+        os.makedirs(store_dir, exist_ok=True)
+        store_path = Path(store_dir)
+
+        blocks = []
+        entries = {}
+        offset = 0
+        with open(store_path / "docs.bin", "wb") as out:
+            for block_no, start in enumerate(range(0, len(ids), block_size)):
+                raw = bytearray()
+                for chunk_id, doc in zip(ids[start:start + block_size], documents[start:start + block_size]):
+                    encoded = (doc or "").encode("utf-8")
+                    entries[chunk_id] = [block_no, len(raw), len(raw) + len(encoded)]
+                    raw.extend(encoded)
+
+                compressed = _compress(bytes(raw), codec)
+                out.write(compressed)
+                blocks.append([offset, len(compressed)])
+                offset += len(compressed)
+
+        with open(store_path / "index.json", "w", encoding="utf-8") as f:
+            json.dump({"codec": codec, "block_size": block_size, "blocks": blocks, "entries": entries}, f)
+
+        return DocumentStore(store_dir)
+
+    def _read_block(self, block_no: int) -> bytes:
+        """Decompressed block, served from the LRU cache when possible"""
+        with self._lock:
+            if block_no in self._cache:
+                self._cache.move_to_end(block_no)
+                return self._cache[block_no]
+
+        offset, length = self.blocks[block_no]
+        compressed = os.pread(self._fd, length, offset)
+        if self.codec == "zstd":
+            raw = zstandard.ZstdDecompressor().decompress(compressed)
+        else:
+            raw = zlib.decompress(compressed)
+
+        with self._lock:
+            self._cache[block_no] = raw
+            if len(self._cache) > _BLOCK_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return raw
+
+    def get(self, chunk_id: str) -> str:
+        """
+        Fetch one chunk text
+
+        Raises:
+            KeyError: If the id is not in the store
+        """
+        block_no, start, end = self.entries[chunk_id]
+        return self._read_block(block_no)[start:end].decode("utf-8")
+
+    def get_many(self, ids: List[str]) -> List[str]:
+        """Fetch chunk texts in the given order ('' for unknown ids)"""
+        return [self.get(chunk_id) if chunk_id in self.entries else "" for chunk_id in ids]
+
+    def size_bytes(self) -> int:
+        """Compressed size on disk"""
+        return sum(length for _, length in self.blocks)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self):
+        """Close the underlying file"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,82 @@
+"""
+Chunk Metadata Schema
+The typed metadata stored with every vector. Chunks carry only their
+department; which roles may read a department is resolved at query time
+(see rbac/department_access.py), so nothing role-related is stored.
+"""
+
+from typing import Any, Dict, List
+
+from rbac.access_mask import ACCESS_MASK_KEY
+from rbac.department_access import DEPARTMENTS
+
+CHUNK_METADATA_FIELDS: Dict[str, type] = {
+    "chunk_id": str,
+    "source_document": str,
+    "department": str,
+    "section_title": str,
+    "token_length": int,
+}
+
+# Access fields written by older indexers, removed by scripts/audit_rbac.py --apply
+LEGACY_METADATA_FIELDS = (
+    ACCESS_MASK_KEY,
+    "allowed_roles",
+    "role_finance",
+    "role_engineering",
+    "role_marketing",
+    "role_hr",
+    "role_general",
+    "role_admin",
+)
+
+
+def chunk_metadata(chunk_id: str,
+                   source_document: str,
+                   department: str,
+                   section_title: str,
+                   token_length: int) -> Dict[str, Any]:
+    """
+    Build the metadata dict stored with a chunk
+
+    Args:
+        chunk_id: Chunk identifier
+        source_document: Source file name
+        department: Owning department
+        section_title: Section heading the chunk came from
+        token_length: Chunk length in tokens
+
+    Returns:
+        Metadata dict matching CHUNK_METADATA_FIELDS
+    """
+    return {
+        "chunk_id": chunk_id,
+        "source_document": source_document,
+        "department": department,
+        "section_title": section_title,
+        "token_length": int(token_length),
+    }
+
+
+def validate_chunk_metadata(metadata: Dict[str, Any]) -> List[str]:
+    """
+    Check a metadata dict against the schema
+
+    Returns:
+        Human readable problems (empty if valid)
+    """
+    problems = []
+    for field, field_type in CHUNK_METADATA_FIELDS.items():
+        value = metadata.get(field)
+        # bool is an int subclass; lengths must be real integers
+        if not isinstance(value, field_type) or isinstance(value, bool):
+            problems.append(f"{field}: expected {field_type.__name__}, got {type(value).__name__}")
+
+    department = metadata.get("department")
+    if isinstance(department, str) and department not in DEPARTMENTS:
+        problems.append(f"department: unknown department '{department}'")
+
+    legacy = [field for field in LEGACY_METADATA_FIELDS if field in metadata]
+    if legacy:
+        problems.append(f"legacy fields present: {', '.join(legacy)}")
+    return problems
@@ -0,0 +1,96 @@
+"""
+Linear Projection Module
+PCA projection used to store and query reduced-dimension embeddings
+"""
+
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+
+
+class PCAProjection:
+    """
+    PCA projection of normalized embeddings to a smaller dimension
+
+    Projected vectors are re-normalized so cosine distance in the reduced
+    collection stays comparable to the full 384-d collection.
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance: float = 0.0):
+        """
+        Initialize projection
+
+        Args:
+            mean: Corpus mean vector (D,)
+            components: Principal axes (k x D)
+            explained_variance: Fraction of variance kept by the k axes
+        """
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.explained_variance = float(explained_variance)
+
+    @property
+    def dim(self) -> int:
+        """Output dimension"""
+        return self.components.shape[0]
+
+    @staticmethod
+    def fit(embeddings: Union[np.ndarray, List[List[float]]], dim: int) -> "PCAProjection":
+        """
+        Fit a PCA projection on corpus embeddings
+
+        Args:
+            embeddings: Corpus vectors (N x D)
+            dim: Target dimension
+
+        Returns:
+            Fitted projection
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        max_dim = min(vectors.shape)
+        if not 0 < dim <= max_dim:
+            raise ValueError(f"Target dimension must be between 1 and {max_dim}, got {dim}")
+
+        mean = vectors.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        variance = singular_values ** 2
+        explained = variance[:dim].sum() / variance.sum() if variance.sum() > 0 else 1.0
+
+        return PCAProjection(mean, vt[:dim], explained)
+
+    def transform(self, embeddings: Union[np.ndarray, List[float], List[List[float]]]) -> np.ndarray:
+        """
+        Project and re-normalize vectors
+
+        Args:
+            embeddings: One vector (D,) or a batch (N x D)
+
+        Returns:
+            Projected unit vectors, same rank as the input
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        reduced = (vectors - self.mean) @ self.components.T
+        norms = np.linalg.norm(reduced, axis=-1, keepdims=True)
+        return reduced / np.where(norms > 0, norms, 1.0)
+
+    def save(self, path: Union[str, Path]):
+        """Save projection to an .npz file"""
+        np.savez(path, mean=self.mean, components=self.components,
+                 explained_variance=np.float32(self.explained_variance))
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> "PCAProjection":
+        """Load projection from an .npz file"""
+        data = np.load(path)
+        return PCAProjection(data["mean"], data["components"], float(data["explained_variance"]))
+
+
+def reduced_collection_name(collection_name: str, dim: int) -> str:
+    """Name of the parallel collection holding reduced vectors"""
+    return f"{collection_name}_d{dim}"
+
+
+def projection_path(vectorstore_path: Union[str, Path], dim: int) -> Path:
+    """Location of the fitted projection next to the Chroma store"""
+    return Path(vectorstore_path).parent / "projections" / f"pca_{dim}.npz"
@@ -0,0 +1,263 @@
+"""
+Quantized Vector Index
+Compact int8 / 1-bit codes for a fast first pass, rescored against
+full-precision vectors kept in a memory-mapped side file
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+QUANTIZATION_MODES = ("int8", "binary")
+
+# Popcount lookup for numpy builds without np.bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Rows scored per block in the int8 first pass (bounds temporary memory)
+_INT8_BLOCK_ROWS = 65536
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Count set bits per byte"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_TABLE[values]
+
+
+class QuantizedIndex:
+    """
+    Quantized in-memory index over normalized embeddings
+
+    Files in the index directory:
+        meta.json       - mode, dimension, count and int8 scales
+        codes.npy       - int8 codes (N x D) or packed sign bits (N x D/8)
+        vectors.f32     - full-precision float32 vectors, memory-mapped
+        ids.json        - chunk ids in row order
+        metadatas.json  - chunk metadata in row order (for RBAC filters)
+    """
+
+    def __init__(self, index_dir: str, rescore_factor: int = 4):
+        """
+        Load a quantized index from disk
+
+        Args:
+            index_dir: Directory written by QuantizedIndex.build
+            rescore_factor: Candidates rescored per requested result
+        """
+        self.index_dir = Path(index_dir)
+        self.rescore_factor = rescore_factor
+
+        with open(self.index_dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(self.index_dir / "ids.json", "r", encoding="utf-8") as f:
+            self.ids: List[str] = json.load(f)
+        with open(self.index_dir / "metadatas.json", "r", encoding="utf-8") as f:
+            self.metadatas: List[Dict[str, Any]] = json.load(f)
+
+        self.mode = meta["mode"]
+        self.dim = meta["dim"]
+        self.count = meta["count"]
+        self.scale = np.asarray(meta["scale"], dtype=np.float32) if meta.get("scale") else None
+
+        # Codes stay resident, full-precision vectors are paged in on demand
+        self.codes = np.load(self.index_dir / "codes.npy")
+        self.vectors = np.memmap(
+            self.index_dir / "vectors.f32", dtype=np.float32, mode="r", shape=(self.count, self.dim)
+        )
+        self._columns: Dict[str, np.ndarray] = {}
+        # Row masks per where filter; one entry per role in practice
+        self._filter_cache: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def build(index_dir: str,
+              ids: List[str],
+              embeddings: List[List[float]],
+              metadatas: List[Dict[str, Any]],
+              mode: str = "int8") -> "QuantizedIndex":
+        """
+        Quantize embeddings and write the index to disk
+
+        Args:
+            index_dir: Output directory
+            ids: Chunk ids
+            embeddings: Normalized embedding vectors
+            metadatas: Chunk metadata dicts
+            mode: 'int8' (scalar, 4x smaller) or 'binary' (sign bits, 32x smaller)
+
+        Returns:
+            Loaded QuantizedIndex
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode '{mode}'. Use one of {QUANTIZATION_MODES}")
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        os.makedirs(index_dir, exist_ok=True)
+        index_path = Path(index_dir)
+
+        scale = None
+        if mode == "int8":
+            # Symmetric per-dimension scale so the largest component maps to 127
+            max_abs = np.abs(vectors).max(axis=0)
+            scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+            codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+        else:
+            codes = np.packbits(vectors > 0, axis=1)
+
+        np.save(index_path / "codes.npy", codes)
+        full = np.memmap(index_path / "vectors.f32", dtype=np.float32, mode="w+", shape=vectors.shape)
+        full[:] = vectors
+        full.flush()
+        del full
+
+        with open(index_path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "mode": mode,
+                "dim": int(vectors.shape[1]),
+                "count": int(vectors.shape[0]),
+                "scale": scale.tolist() if scale is not None else None,
+            }, f)
+        with open(index_path / "ids.json", "w", encoding="utf-8") as f:
+            json.dump(list(ids), f)
+        with open(index_path / "metadatas.json", "w", encoding="utf-8") as f:
+            json.dump(list(metadatas), f, ensure_ascii=False)
+
+        return QuantizedIndex(index_dir)
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Resident code size vs the full-precision side file"""
+        return {"codes": int(self.codes.nbytes), "full_precision": int(self.count * self.dim * 4)}
+
+    def _column(self, key: str) -> np.ndarray:
+        """Metadata values for one key as an object array (cached)"""
+        if key not in self._columns:
+            self._columns[key] = np.array([m.get(key) for m in self.metadatas], dtype=object)
+        return self._columns[key]
+
+    def _filter_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Evaluate a ChromaDB-style where filter to a boolean row mask
+
+        Supports equality, $eq, $ne, $in, $nin, $and and $or.
+        """
+        if not where:
+            return None
+
+        mask = np.ones(self.count, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for sub in condition:
+                    mask &= self._filter_mask(sub)
+                continue
+            if key == "$or":
+                any_mask = np.zeros(self.count, dtype=bool)
+                for sub in condition:
+                    any_mask |= self._filter_mask(sub)
+                mask &= any_mask
+                continue
+
+            column = self._column(key)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, value in condition.items():
+                if op == "$eq":
+                    mask &= column == value
+                elif op == "$ne":
+                    mask &= column != value
+                elif op == "$in":
+                    mask &= np.isin(column, list(value))
+                elif op == "$nin":
+                    mask &= ~np.isin(column, list(value))
+                else:
+                    raise ValueError(f"Unsupported filter operator '{op}'")
+        return mask
+
+    def _cached_filter_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Row mask for a filter, computed once per distinct filter"""
+        if not where:
+            return None
+        key = json.dumps(where, sort_keys=True)
+        if key not in self._filter_cache:
+            self._filter_cache[key] = self._filter_mask(where)
+        return self._filter_cache[key]
+
+    def _first_pass(self, query: np.ndarray) -> np.ndarray:
+        """Approximate scores for every row (higher is more similar)"""
+        if self.mode == "binary":
+            query_bits = np.packbits(query > 0)
+            hamming = _popcount(np.bitwise_xor(self.codes, query_bits)).sum(axis=1, dtype=np.int32)
+            return -hamming.astype(np.float32)
+
+        # Fold the per-dimension scales into the query, quantize it to int8
+        # and score int8 x int8 with int32 accumulation; the single query
+        # step maps the integer scores back to approximate cosine similarity
+        query_codes, step = self._quantize_query(query)
+        scores = np.empty(self.count, dtype=np.int32)
+        for start in range(0, self.count, _INT8_BLOCK_ROWS):
+            block = self.codes[start:start + _INT8_BLOCK_ROWS]
+            scores[start:start + len(block)] = np.einsum("ij,j->i", block, query_codes, dtype=np.int32)
+        return scores.astype(np.float32) * step
+
+    def _quantize_query(self, query: np.ndarray):
+        """Query times the int8 scales as int8 codes, and the step of one code"""
+        scaled_query = query * self.scale
+        peak = float(np.abs(scaled_query).max())
+        step = peak / 127.0 if peak > 0 else 1.0
+        query_codes = np.clip(np.rint(scaled_query / step), -127, 127).astype(np.int8)
+        return query_codes, np.float32(step)
+
+    def search(self,
+               query_embedding: List[float],
+               n_results: int = 5,
+               where: Optional[Dict[str, Any]] = None,
+               rescore: bool = True) -> Dict[str, List[List[Any]]]:
+        """
+        Search the quantized codes and rescore the best candidates exactly
+
+        Args:
+            query_embedding: Normalized query vector
+            n_results: Number of results to return
+            where: Optional ChromaDB-style metadata filter
+            rescore: Rescore candidates against full-precision vectors
+
+        Returns:
+            ChromaDB-shaped results with ids, distances and metadatas
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = self._first_pass(query)
+
+        mask = self._cached_filter_mask(where)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            available = int(mask.sum())
+        else:
+            available = self.count
+
+        n_results = min(n_results, available)
+        if n_results <= 0:
+            return {"ids": [[]], "distances": [[]], "metadatas": [[]]}
+
+        n_candidates = min(available, n_results * self.rescore_factor) if rescore else n_results
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+
+        if rescore:
+            # Sorted row order keeps memmap reads sequential
+            candidates = np.sort(candidates)
+            similarities = self.vectors[candidates] @ query
+        else:
+            similarities = scores[candidates]
+            if self.mode == "binary":
+                # Map Hamming distance back to an approximate cosine similarity
+                similarities = 1.0 - 2.0 * (-similarities) / self.dim
+
+        order = np.argsort(-similarities)[:n_results]
+        rows = candidates[order]
+        distances = (1.0 - similarities[order]).tolist()
+
+        return {
+            "ids": [[self.ids[i] for i in rows]],
+            "distances": [distances],
+            "metadatas": [[self.metadatas[i] for i in rows]],
+        }
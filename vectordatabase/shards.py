@@ -0,0 +1,47 @@
+"""
+Department Shards
+Per-department copies of company_documents (built by
+processing/shard_collections.py), searched in parallel instead of filtering
+the single collection
+"""
+
+from typing import Iterable, List
+
+from rbac.department_access import DEPARTMENT_KEY
+
+SOURCE_COLLECTION = "company_documents"
+
+
+def shard_collection_name(department: str, collection_name: str = SOURCE_COLLECTION) -> str:
+    """Name of the shard collection for a department"""
+    return f"{collection_name}_{department}"
+
+
+def stale_shards(client, departments: Iterable[str], collection_name: str = SOURCE_COLLECTION) -> List[str]:
+    """
+    Departments whose shard no longer mirrors the source collection
+
+    The indexers write only to the source collection, so a shard goes stale
+    whenever chunks are added or removed there until the shard is rebuilt.
+    A shard counts as stale when its size differs from the number of source
+    chunks of its department, or when it is missing while the department
+    has chunks.
+
+    Args:
+        client: ChromaDB client
+        departments: Departments to check
+        collection_name: Source collection
+
+    Returns:
+        Stale departments, in the given order
+    """
+    source = client.get_collection(name=collection_name)
+    existing = {c.name for c in client.list_collections()}
+    stale = []
+    for department in departments:
+        expected = len(source.get(where={DEPARTMENT_KEY: department}, include=[])["ids"])
+        name = shard_collection_name(department, collection_name)
+        actual = client.get_collection(name=name).count() if name in existing else 0
+        if actual != expected:
+            stale.append(department)
+    return stale